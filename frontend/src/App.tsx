@@ -4,8 +4,8 @@ import { onAuthStateChanged } from 'firebase/auth';
 import { auth } from './lib/firebase/config';
 import { logout } from './lib/firebase/auth';
 import { getProfile } from './api/profile';
-import { getItems, bulkImportItems, updateItem } from './api/items';
-import { getRooms } from './api/households';
+import { bulkImportItems, updateItem } from './api/items';
+import { getDashboardData } from './api/batch';
 import { createUser } from './api/users';
 import type { Item, Room } from './types/api';
 import AuthPage from './components/auth/AuthPage';
@@ -54,10 +54,7 @@ function App() {
     if (!userProfile?.householdId) return;
     try {
       setLoading(true);
-      const [itemsResponse, roomsResponse] = await Promise.all([
-        getItems(),
-        getRooms(userProfile.householdId),
-      ]);
+      const [itemsResponse, roomsResponse] = await getDashboardData(userProfile.householdId);
 
       if (itemsResponse.success && itemsResponse.data) {
         setItems(itemsResponse.data);
@@ -81,10 +78,7 @@ function App() {
   const refreshData = useCallback(async () => {
     if (!userProfile?.householdId) return;
     try {
-      const [itemsResponse, roomsResponse] = await Promise.all([
-        getItems(),
-        getRooms(userProfile.householdId),
-      ]);
+      const [itemsResponse, roomsResponse] = await getDashboardData(userProfile.householdId);
 
       if (itemsResponse.success && itemsResponse.data) {
         setItems(itemsResponse.data);
@@ -0,0 +1,46 @@
+import apiClient from './index';
+import type { Item, Room, ApiResponse, ApiError, BatchSubRequest, BatchSubResponse } from '../types/api';
+import { AxiosError } from 'axios';
+
+/**
+ * Sends several API calls in one HTTP request via `POST /api/batch`.
+ * Consecutive GETs run concurrently on the server; other methods run in order.
+ * @param requests - Up to 20 sub-requests, each with a path under `/api/`.
+ * @returns A promise that resolves with one response per sub-request, in request order.
+ */
+export const batchRequests = async (requests: BatchSubRequest[]): Promise<ApiResponse<BatchSubResponse[]>> => {
+  try {
+    const response = await apiClient.post<ApiResponse<{ responses: BatchSubResponse[] }>>('/api/batch', { requests });
+    const { success, data, error } = response.data;
+    return { success, data: data ? data.responses : null, error };
+  } catch (error: unknown) {
+    const axiosError = error as AxiosError;
+    const apiError = axiosError.response?.data as ApiError | undefined;
+    return {
+      success: false,
+      data: null,
+      error: {
+        code: apiError?.code || 'UNKNOWN_ERROR',
+        message: apiError?.message || axiosError.message,
+      },
+    };
+  }
+};
+
+/**
+ * Fetches everything the dashboard shows (items and rooms) in a single request.
+ * @param householdId - The ID of the user's household.
+ * @returns A promise that resolves with the items and rooms responses.
+ */
+export const getDashboardData = async (householdId: string): Promise<[ApiResponse<Item[]>, ApiResponse<Room[]>]> => {
+  const batch = await batchRequests([
+    { id: 'items', method: 'GET', path: '/api/items' },
+    { id: 'rooms', method: 'GET', path: `/api/households/${householdId}/rooms` },
+  ]);
+  const failed = { success: false, data: null, error: batch.error };
+  if (!batch.success || !batch.data) {
+    return [failed, failed];
+  }
+  const body = (id: string) => batch.data?.find((response) => response.id === id)?.body ?? failed;
+  return [body('items') as ApiResponse<Item[]>, body('rooms') as ApiResponse<Room[]>];
+};
@@ -1,6 +1,7 @@
 import apiClient from './index';
-import type { ApiResponse, ApiError, Household, Room } from '../types/api';
+import type { ApiResponse, ApiError, BinSuggestion, Household, HouseholdWithRooms, NewRoom, Room, RoomBins } from '../types/api';
 import { AxiosError } from 'axios';
+import { auth } from '../lib/firebase/config';
 
 /**
  * Calls the backend API to create a new household.
@@ -10,6 +11,11 @@ import { AxiosError } from 'axios';
 export const createHousehold = async (name: string): Promise<ApiResponse<Household>> => {
   try {
     const response = await apiClient.post<ApiResponse<Household>>('/api/households', { name });
+    if (response.data.success) {
+      // The backend mirrors household membership into a custom claim; refresh the
+      // ID token so subsequent requests carry it and skip the profile lookup.
+      await auth.currentUser?.getIdToken(true);
+    }
     return response.data;
   } catch (error: unknown) {
     const axiosError = error as AxiosError;
@@ -95,4 +101,103 @@ export const deleteRoom = async (householdId: string, roomId: string): Promise<A
             },
         };
     }
-};
\ No newline at end of file
+};
+
+/**
+ * Creates a household together with all of its rooms in a single request.
+ * @param name - The name of the household.
+ * @param rooms - The rooms to create in the new household.
+ * @returns A promise that resolves with the created household, including its rooms.
+ */
+export const bootstrapHousehold = async (name: string, rooms: NewRoom[]): Promise<ApiResponse<HouseholdWithRooms>> => {
+  try {
+    const response = await apiClient.post<ApiResponse<HouseholdWithRooms>>('/api/households:bootstrap', { name, rooms });
+    if (response.data.success) {
+      await auth.currentUser?.getIdToken(true);
+    }
+    return response.data;
+  } catch (error: unknown) {
+    const axiosError = error as AxiosError;
+    const apiError = axiosError.response?.data as ApiError | undefined;
+    return {
+      success: false,
+      data: null,
+      error: {
+        code: apiError?.code || 'UNKNOWN_ERROR',
+        message: apiError?.message || axiosError.message,
+      },
+    };
+  }
+};
+
+/**
+ * Creates many rooms in an existing household in a single request.
+ * @param householdId - The ID of the household.
+ * @param rooms - The rooms to create.
+ * @returns A promise that resolves with the created rooms.
+ */
+export const createRooms = async (householdId: string, rooms: NewRoom[]): Promise<ApiResponse<Room[]>> => {
+  try {
+    const response = await apiClient.post<ApiResponse<Room[]>>(`/api/households/${householdId}/rooms:batchCreate`, { rooms });
+    return response.data;
+  } catch (error: unknown) {
+    const axiosError = error as AxiosError;
+    const apiError = axiosError.response?.data as ApiError | undefined;
+    return {
+      success: false,
+      data: null,
+      error: {
+        code: apiError?.code || 'UNKNOWN_ERROR',
+        message: apiError?.message || axiosError.message,
+      },
+    };
+  }
+};
+
+/**
+ * Lists a room's bins with the number and IDs of the items in each.
+ * @param householdId - The ID of the household.
+ * @param roomId - The ID of the room.
+ * @returns A promise that resolves with the room's bin occupancy.
+ */
+export const getRoomBins = async (householdId: string, roomId: string): Promise<ApiResponse<RoomBins>> => {
+  try {
+    const response = await apiClient.get<ApiResponse<RoomBins>>(`/api/households/${householdId}/rooms/${roomId}/bins`);
+    return response.data;
+  } catch (error: unknown) {
+    const axiosError = error as AxiosError;
+    const apiError = axiosError.response?.data as ApiError | undefined;
+    return {
+      success: false,
+      data: null,
+      error: {
+        code: apiError?.code || 'UNKNOWN_ERROR',
+        message: apiError?.message || axiosError.message,
+      },
+    };
+  }
+};
+
+/**
+ * Suggests the least-full bin in a room for storing a new item.
+ * @param householdId - The ID of the household.
+ * @param roomId - The ID of the room.
+ * @returns A promise that resolves with the suggested bin and its current item count.
+ */
+export const suggestBin = async (householdId: string, roomId: string): Promise<ApiResponse<BinSuggestion>> => {
+  try {
+    const response = await apiClient.get<ApiResponse<BinSuggestion>>(`/api/households/${householdId}/rooms/${roomId}/bins:suggest`);
+    return response.data;
+  } catch (error: unknown) {
+    const axiosError = error as AxiosError;
+    const apiError = axiosError.response?.data as ApiError | undefined;
+    return {
+      success: false,
+      data: null,
+      error: {
+        code: apiError?.code || 'UNKNOWN_ERROR',
+        message: apiError?.message || axiosError.message,
+      },
+    };
+  }
+};
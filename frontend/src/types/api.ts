@@ -4,6 +4,27 @@ export interface Room {
   nBins: number;
 }
 
+export type NewRoom = Omit<Room, 'id'>;
+
+export interface BinOccupancy {
+  binNumber: number;
+  count: number;
+  itemIds: string[];
+}
+
+export interface RoomBins {
+  roomId: string;
+  nBins: number;
+  emptyBins: number[];
+  bins: BinOccupancy[];
+}
+
+export interface BinSuggestion {
+  roomId: string;
+  binNumber: number;
+  count: number;
+}
+
 export interface Item {
   id: string;
   name: string;
@@ -16,10 +37,67 @@ export interface Item {
   householdId: string;
   isPrivate: boolean;
   lastUpdated: string;
+  expiresAt?: string | null;
   metadata?: {
     category?: string;
     notes?: string;
   };
+  photo?: ItemPhoto | null;
+}
+
+/**
+ * Photo attached to an item via `PUT /api/items/{itemId}/photo`.
+ * `sizes` fills in once the thumbnail and preview have been rendered.
+ */
+export interface ItemPhoto {
+  hash: string;
+  contentType: string;
+  size: number;
+  original: string;
+  sizes: Partial<Record<ItemPhotoSize, string>>;
+  status: 'PROCESSING' | 'READY' | 'FAILED';
+  uploadedAt: string;
+}
+
+export type ItemPhotoSize = 'thumbnail' | 'preview';
+
+/**
+ * Compact item list returned by `GET /api/items?format=columnar`.
+ * `columns[i]` holds the values for `keys[i]`; `roomIndex` and `creatorIndex`
+ * point into `rooms` and `creators`.
+ */
+export interface ColumnarItems {
+  format: 'columnar';
+  count: number;
+  householdId: string | null;
+  rooms: string[];
+  creators: string[];
+  keys: string[];
+  columns: unknown[][];
+}
+
+export interface BatchGetItemsResult {
+  items: Item[];
+  missingIds: string[];
+}
+
+export type BatchItemOperation =
+  | { id: string; update: Partial<Pick<Item, 'name' | 'location' | 'status' | 'isPrivate' | 'metadata'>> }
+  | { id: string; delete: true };
+
+export interface BatchItemResult {
+  id: string | null;
+  status: 'UPDATED' | 'DELETED' | 'ERROR';
+  error: ApiError | null;
+}
+
+export interface BatchUpdateItemsResult {
+  results: BatchItemResult[];
+  summary: {
+    updated: number;
+    deleted: number;
+    failed: number;
+  };
 }
 
 export interface Household {
@@ -30,6 +108,10 @@ export interface Household {
   created: string;
 }
 
+export interface HouseholdWithRooms extends Household {
+  rooms: Room[];
+}
+
 export interface ApiError {
   code: string;
   message: string;
@@ -40,3 +122,22 @@ export interface ApiResponse<T> {
   data: T | null;
   error: ApiError | null;
 }
+
+/**
+ * One call inside a `POST /api/batch` request.
+ */
+export interface BatchSubRequest {
+  id: string;
+  method: 'GET' | 'POST' | 'PUT' | 'DELETE';
+  path: string;
+  body?: unknown;
+}
+
+/**
+ * The response to one `BatchSubRequest`, matched by `id`.
+ */
+export interface BatchSubResponse {
+  id: string;
+  status: number;
+  body: ApiResponse<unknown>;
+}
@@ -2,14 +2,29 @@
 # To get started, simply uncomment the below code or create your own.
 # Deploy with `firebase deploy`
 
-from firebase_functions import https_fn, options
+from firebase_functions import https_fn, options, scheduler_fn
 from firebase_admin import auth, firestore
 import firebase_admin
 import json # Import for json.dumps if needed, or direct dict passing
 import functools # Added for wrapper
 import re # Import for regular expressions
 import csv
+import datetime
+import gzip
+import hashlib
 import io
+import collections
+import copy
+import contextvars
+import math
+import os
+import random
+import threading
+import time
+import zlib
+import requests
+import werkzeug.test
+from concurrent.futures import ThreadPoolExecutor
 
 try:
     # This will work in Firebase Functions environment automatically
@@ -20,14 +35,21 @@ except ValueError as e:
 
 # Don't initialize here - do it lazily
 db = None
+_db_lock = threading.Lock()
 
 def get_db():
-    """Lazy initialization of Firestore client"""
+    """Lazy initialization of Firestore client.
+
+    Concurrent requests on one instance share the client (which is thread-safe);
+    the lock only makes sure it is created once.
+    """
     global db
     if db is None:
-        if not firebase_admin._apps:
-            firebase_admin.initialize_app()
-        db = firestore.client()
+        with _db_lock:
+            if db is None:
+                if not firebase_admin._apps:
+                    firebase_admin.initialize_app()
+                db = firestore.client()
     return db
 
 # CORS options for development (adjust for production)
@@ -44,11 +66,26 @@ def get_user_data_from_firestore(user_id: str) -> dict | None:
     Returns:
         A dictionary containing the user's data or None if not found.
     """
+    shared_profiles = _shared_profiles.get()
+    if shared_profiles is not None:
+        # Sub-requests of one POST /api/batch share a single profile read
+        with shared_profiles.lock:
+            if user_id not in shared_profiles.profiles:
+                shared_profiles.profiles[user_id] = _read_user_profile(user_id)
+            user_data = shared_profiles.profiles[user_id]
+        return copy.deepcopy(user_data) # Handlers modify the dict they get
+    return _read_user_profile(user_id)
+
+
+def _read_user_profile(user_id: str) -> dict | None:
     db = get_db()
     user_doc_ref = db.collection("users").document(user_id)
     user_doc = user_doc_ref.get()
     if user_doc.exists:
-        return user_doc.to_dict()
+        user_data = user_doc.to_dict()
+        # Remember the household so the rate limiter can key on it without a read
+        _remember_household_for_rate_limit(user_id, user_data.get("householdId"))
+        return user_data
     return None
 
 
@@ -64,8 +101,125 @@ def get_user_by_email(email: str) -> dict | None:
         return user_data
     return None
 
+HOUSEHOLD_CLAIM = "householdId" # Custom claim mirroring users/{uid}.householdId
+CLAIM_SYNC_MEMO_MAX_USERS = 10000
+
+_claim_sync_lock = threading.Lock()
+_claim_synced = {} # uid -> householdId this instance last mirrored into the user's claim
+_claim_sync_executor = None
+
+
+def set_household_claim(user_id: str, household_id: str | None) -> bool:
+    """Mirrors a user's household membership into their Firebase Auth custom claims.
+
+    Call this whenever users/{uid}.householdId changes. The new claim reaches the
+    client's ID token on its next refresh; until then handlers fall back to Firestore.
+
+    Args:
+        user_id: The UID of the user.
+        household_id: The user's new household, or None if they no longer belong to one.
+
+    Returns:
+        True if the claim was updated.
+    """
+    try:
+        user_record = auth.get_user(user_id)
+        custom_claims = dict(user_record.custom_claims or {})
+        if household_id:
+            custom_claims[HOUSEHOLD_CLAIM] = household_id
+        else:
+            custom_claims.pop(HOUSEHOLD_CLAIM, None)
+        auth.set_custom_user_claims(user_id, custom_claims or None)
+    except Exception as e:
+        # The Firestore profile stays authoritative, so a failed sync only costs a read later
+        print(f"Failed to set household claim for user {user_id}: {e}")
+        with _claim_sync_lock:
+            _claim_synced.pop(user_id, None)
+        return False
+    with _claim_sync_lock:
+        if len(_claim_synced) >= CLAIM_SYNC_MEMO_MAX_USERS and user_id not in _claim_synced:
+            _claim_synced.clear()
+        _claim_synced[user_id] = household_id
+    return True
+
+
+def schedule_household_claim_sync(user_id: str, household_id: str | None) -> None:
+    """Re-syncs a user's household claim in the background, once per instance.
+
+    A client keeps presenting its old token until it refreshes (up to an hour), so
+    without the memo every one of those requests would repeat the Admin API calls.
+    """
+    global _claim_sync_executor
+    with _claim_sync_lock:
+        if user_id in _claim_synced and _claim_synced[user_id] == household_id:
+            return
+        if len(_claim_synced) >= CLAIM_SYNC_MEMO_MAX_USERS:
+            _claim_synced.clear()
+        _claim_synced[user_id] = household_id # Claimed now so concurrent requests don't queue duplicates
+        if _claim_sync_executor is None:
+            _claim_sync_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="claim-sync")
+        executor = _claim_sync_executor
+    executor.submit(set_household_claim, user_id, household_id)
+
+
+def get_household_id_for_request(req: https_fn.Request, verify: bool = False) -> str | None:
+    """Returns the authenticated user's householdId.
+
+    Reads the household custom claim from current_user() when present, avoiding a Firestore
+    read. Falls back to the users document when the claim is missing, or when verify is
+    True because the claim may be stale. A missing or stale claim is re-synced in the
+    background, once per user and instance.
+
+    Args:
+        req: The request, authenticated by require_auth.
+        verify: If True, always read the users document.
+
+    Returns:
+        The householdId, or None if the user doesn't belong to a household.
+    """
+    claimed_household_id = current_user().get(HOUSEHOLD_CLAIM)
+    if claimed_household_id and not verify:
+        return claimed_household_id
+
+    auth_user_uid = current_user()["uid"]
+    user_profile = get_user_data_from_firestore(auth_user_uid)
+    household_id = user_profile.get("householdId") if user_profile else None
+    if (claimed_household_id or None) != (household_id or None):
+        schedule_household_claim_sync(auth_user_uid, household_id)
+    return household_id
+
+
+def user_in_household(req: https_fn.Request, household_id: str | None) -> bool:
+    """Checks whether the authenticated user belongs to household_id.
+
+    A matching claim is trusted; a mismatch is re-checked against Firestore in case
+    the claim predates a membership change.
+    """
+    if not household_id:
+        return False
+    if current_user().get(HOUSEHOLD_CLAIM) == household_id:
+        return True
+    return get_household_id_for_request(req, verify=True) == household_id
+
+
+# The verified ID token of the request being handled, as (id_token, decoded claims).
+# api() runs each request in a fresh context, so concurrent requests on an instance
+# never see each other's user, and threads started with contextvars.copy_context()
+# inherit the user of the request that started them.
+_request_auth = contextvars.ContextVar("request_auth", default=None)
+
+
+def current_user() -> dict | None:
+    """Returns the decoded ID token of the request being handled, set by require_auth."""
+    request_auth = _request_auth.get()
+    return request_auth[1] if request_auth is not None else None
+
+
 def require_auth(f):
-    """Decorator to check for Firebase Authentication ID token."""
+    """Decorator to check for Firebase Authentication ID token.
+
+    The decoded token is available to the handler through current_user().
+    """
     @functools.wraps(f)
     def decorated_function(req: https_fn.Request, *args, **kwargs):
         # Check for Authorization header
@@ -78,9 +232,21 @@ def require_auth(f):
             )
 
         id_token = auth_header.split("Bearer ")[1]
+        request_auth = _request_auth.get()
+        if request_auth is not None and request_auth[0] == id_token:
+            # Already verified in this request, e.g. by the POST /api/batch this sub-request belongs to
+            return f(req, *args, **kwargs)
+
         try:
             decoded_token = auth.verify_id_token(id_token)
-            req.user = decoded_token # Attach user info to the request object
+            _request_auth.set((id_token, decoded_token))
+            if decoded_token.get(HOUSEHOLD_CLAIM) and decoded_token["uid"] not in _household_by_uid:
+                # Profile reads are authoritative, so a verified claim only fills the gap
+                _remember_household_for_rate_limit(decoded_token["uid"], decoded_token[HOUSEHOLD_CLAIM])
+            # Admission control runs before any Firestore reads
+            rate_limited_response = _check_rate_limit(decoded_token)
+            if rate_limited_response is not None:
+                return rate_limited_response
             return f(req, *args, **kwargs)
         except auth.RevokedIdTokenError:
             return https_fn.Response(
@@ -109,6 +275,730 @@ def require_auth(f):
     return decorated_function
 
 
+# --- Item Storage Layout ---
+# Items are moving from the top-level `items` collection ("legacy") to
+# households/{householdId}/items ("scoped"). ITEMS_LAYOUT selects where handlers
+# read and write:
+#   legacy: top-level collection only (default, pre-migration behavior)
+#   dual:   reads check the household subcollection first, then the legacy
+#           collection; new items are written to the subcollection and legacy
+#           items are moved into it the first time they're updated
+#   scoped: household subcollection only (after scripts/migrate_items_to_households.py)
+ITEMS_LAYOUT = os.environ.get("ITEMS_LAYOUT", "legacy").lower()
+if ITEMS_LAYOUT not in ("legacy", "dual", "scoped"):
+    print(f"Unknown ITEMS_LAYOUT '{ITEMS_LAYOUT}', falling back to 'legacy'")
+    ITEMS_LAYOUT = "legacy"
+
+
+def legacy_items_collection():
+    return get_db().collection("items")
+
+
+def household_items_collection(household_id: str):
+    return get_db().collection("households").document(household_id).collection("items")
+
+
+def _is_legacy_item_ref(item_ref) -> bool:
+    """True if item_ref points into the top-level items collection."""
+    return item_ref.parent.parent is None
+
+
+def new_item_ref(household_id: str):
+    """Returns a reference for a new item in the active layout."""
+    if ITEMS_LAYOUT == "legacy":
+        return legacy_items_collection().document()
+    return household_items_collection(household_id).document()
+
+
+def get_item_snapshot(item_id: str, household_id: str | None):
+    """Reads an item from wherever the active layout keeps it.
+
+    Args:
+        item_id: The ID of the item.
+        household_id: The caller's household; required to find scoped items.
+
+    Returns:
+        The item's DocumentSnapshot, or None if it wasn't found.
+    """
+    if ITEMS_LAYOUT != "legacy" and household_id:
+        item_doc = household_items_collection(household_id).document(item_id).get()
+        if item_doc.exists:
+            return item_doc
+    if ITEMS_LAYOUT != "scoped":
+        item_doc = legacy_items_collection().document(item_id).get()
+        if item_doc.exists:
+            return item_doc
+    return None
+
+
+def get_item_snapshots(item_ids: list, household_id: str | None) -> dict:
+    """Reads many items with at most one get_all per layout.
+
+    Returns:
+        A dict of itemId -> DocumentSnapshot for the items that were found.
+    """
+    db = get_db()
+    found = {}
+    if ITEMS_LAYOUT != "legacy" and household_id:
+        scoped_items = household_items_collection(household_id)
+        for item_doc in db.get_all([scoped_items.document(item_id) for item_id in item_ids]):
+            if item_doc.exists:
+                found[item_doc.id] = item_doc
+    remaining_ids = [item_id for item_id in item_ids if item_id not in found]
+    if ITEMS_LAYOUT != "scoped" and remaining_ids:
+        legacy_items = legacy_items_collection()
+        for item_doc in db.get_all([legacy_items.document(item_id) for item_id in remaining_ids]):
+            if item_doc.exists:
+                found[item_doc.id] = item_doc
+    return found
+
+
+def stream_household_items(household_id: str, room_id: str | None = None, expires_before: datetime.datetime | None = None, transaction=None) -> list:
+    """Returns snapshots of all items in a household, optionally limited to one room
+    or to items expiring before expires_before (soonest first; not combinable with room_id).
+    With a transaction, the items are read (and locked) as part of it.
+
+    In the dual layout an item present in both places is returned once, from the
+    household subcollection.
+    """
+    def narrow(query):
+        if room_id:
+            query = query.where(filter=firestore.FieldFilter("location.roomId", "==", room_id))
+        if expires_before is not None:
+            # Uses the (householdId, expiresAt) composite index on the legacy collection
+            query = query.where(filter=firestore.FieldFilter("expiresAt", "<", expires_before)).order_by("expiresAt")
+        return query
+
+    queries = []
+    if ITEMS_LAYOUT != "legacy":
+        queries.append(narrow(household_items_collection(household_id)))
+    if ITEMS_LAYOUT != "scoped":
+        queries.append(narrow(legacy_items_collection().where(filter=firestore.FieldFilter("householdId", "==", household_id))))
+
+    seen_ids = set()
+    item_docs = []
+    for query in queries:
+        for item_doc in query.stream(transaction=transaction):
+            if item_doc.id not in seen_ids:
+                seen_ids.add(item_doc.id)
+                item_docs.append(item_doc)
+    if expires_before is not None and len(queries) > 1:
+        item_docs.sort(key=lambda item_doc: item_doc.get("expiresAt"))
+    return item_docs
+
+
+def add_item_update(batch, item_doc, household_id: str, update_payload: dict):
+    """Adds an item update to a batch, moving legacy items into the household in the dual layout.
+
+    Returns:
+        The reference where the item lives once the batch commits.
+    """
+    if "name" in update_payload:
+        update_payload = {**update_payload, ENTITY_NAME_KEY: entity_name_key(update_payload["name"])}
+    if ITEMS_LAYOUT == "dual" and _is_legacy_item_ref(item_doc.reference):
+        target_ref = household_items_collection(household_id).document(item_doc.id)
+        # set() replaces the whole document, so a cleared field is simply left out
+        moved_data = {field: value for field, value in {**item_doc.to_dict(), **update_payload}.items() if value is not firestore.DELETE_FIELD}
+        batch.set(target_ref, moved_data)
+        batch.delete(item_doc.reference)
+        return target_ref
+    batch.update(item_doc.reference, update_payload)
+    return item_doc.reference
+
+
+def add_item_delete(batch, item_doc, household_id: str) -> None:
+    """Adds an item delete to a batch, removing any copy left in the other layout."""
+    batch.delete(item_doc.reference)
+    if ITEMS_LAYOUT == "dual":
+        if _is_legacy_item_ref(item_doc.reference):
+            batch.delete(household_items_collection(household_id).document(item_doc.id))
+        else:
+            batch.delete(legacy_items_collection().document(item_doc.id))
+
+
+# --- Admission Control (Rate Limiting) ---
+# Token buckets live in memory per function instance. With max_instances=10 the
+# effective global limit is at most 10x these values; enable the sharded Firestore
+# counters below if a global view of consumption is needed.
+RATE_LIMIT_USER_CAPACITY = float(os.environ.get("RATE_LIMIT_USER_CAPACITY", "30"))
+RATE_LIMIT_USER_REFILL_PER_SEC = float(os.environ.get("RATE_LIMIT_USER_REFILL_PER_SEC", "5"))
+RATE_LIMIT_HOUSEHOLD_CAPACITY = float(os.environ.get("RATE_LIMIT_HOUSEHOLD_CAPACITY", "60"))
+RATE_LIMIT_HOUSEHOLD_REFILL_PER_SEC = float(os.environ.get("RATE_LIMIT_HOUSEHOLD_REFILL_PER_SEC", "10"))
+RATE_LIMIT_MAX_BUCKETS = 10000
+RATE_LIMIT_GLOBAL_COUNTERS = os.environ.get("RATE_LIMIT_GLOBAL_COUNTERS", "false").lower() == "true"
+RATE_LIMIT_COUNTER_SHARDS = 10
+RATE_LIMIT_FLUSH_INTERVAL_SEC = 30
+
+_rate_limit_lock = threading.Lock()
+_rate_limit_buckets = {} # key -> [tokens, last_refill_monotonic]
+_household_by_uid = {} # uid -> householdId, learned from verified claims and profile reads
+_rate_limit_pending_counts = {} # key -> admitted requests not yet flushed
+_rate_limit_flush_thread = None
+
+
+def _remember_household_for_rate_limit(user_id: str, household_id: str | None) -> None:
+    """Records a user's household so later requests can be limited per household."""
+    with _rate_limit_lock:
+        if not household_id:
+            _household_by_uid.pop(user_id, None)
+            return
+        if len(_household_by_uid) >= RATE_LIMIT_MAX_BUCKETS and user_id not in _household_by_uid:
+            _household_by_uid.clear()
+        _household_by_uid[user_id] = household_id
+
+
+def _take_token(key: str, capacity: float, refill_per_sec: float, now: float) -> float:
+    """Takes one token from the bucket for key.
+
+    Returns 0 if the request is admitted, otherwise the number of seconds until a
+    token becomes available. Must be called with _rate_limit_lock held.
+    """
+    bucket = _rate_limit_buckets.get(key)
+    if bucket is None:
+        if len(_rate_limit_buckets) >= RATE_LIMIT_MAX_BUCKETS:
+            # Full buckets carry no state worth keeping; drop them before growing further
+            for stale_key in [k for k, b in _rate_limit_buckets.items() if b[0] >= capacity]:
+                del _rate_limit_buckets[stale_key]
+        bucket = [capacity, now]
+        _rate_limit_buckets[key] = bucket
+    else:
+        bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * refill_per_sec)
+        bucket[1] = now
+
+    if bucket[0] >= 1:
+        bucket[0] -= 1
+        return 0
+    return (1 - bucket[0]) / refill_per_sec if refill_per_sec > 0 else float(RATE_LIMIT_FLUSH_INTERVAL_SEC)
+
+
+def _flush_rate_limit_counters() -> None:
+    """Writes accumulated admission counts to sharded Firestore counters.
+
+    Each key spreads its increments over RATE_LIMIT_COUNTER_SHARDS documents under
+    rateLimitCounters/{key}/shards so hot households don't contend on one document.
+    Runs on the background flush thread, never in a request.
+    """
+    with _rate_limit_lock:
+        pending = dict(_rate_limit_pending_counts)
+        _rate_limit_pending_counts.clear()
+    if not pending:
+        return
+    try:
+        db = get_db()
+        batch = db.batch()
+        window = time.strftime("%Y-%m-%dT%H:%M", time.gmtime())
+        for key, count in pending.items():
+            shard_ref = db.collection("rateLimitCounters").document(key.replace("/", "_"))\
+                .collection("shards").document(str(random.randrange(RATE_LIMIT_COUNTER_SHARDS)))
+            batch.set(shard_ref, {"count": firestore.Increment(count), "lastWindow": window}, merge=True)
+        batch.commit()
+    except Exception as e:
+        # Counters are best-effort; losing one flush must not affect request handling
+        print(f"Failed to flush rate limit counters: {e}")
+
+
+def _rate_limit_flush_loop() -> None:
+    while True:
+        time.sleep(RATE_LIMIT_FLUSH_INTERVAL_SEC)
+        _flush_rate_limit_counters()
+
+
+def _check_rate_limit(user: dict) -> https_fn.Response | None:
+    """Applies per-user and per-household token buckets to a request from a verified user.
+
+    Called by require_auth right after the ID token is verified, before any Firestore
+    reads, so a caller can only spend its own buckets. The household comes from
+    what this instance has learned from verified claims and profile reads, never
+    from the request itself. A POST /api/batch is charged here once, and then once
+    more for each of its sub-requests by _run_subrequest, since they reuse its
+    verified token and skip this check in require_auth.
+
+    Returns a 429 response if the caller is over its limit, or None if the request is admitted.
+    """
+    global _rate_limit_flush_thread
+    uid = user["uid"]
+    household_id = _household_by_uid.get(uid)
+    now = time.monotonic()
+    with _rate_limit_lock:
+        retry_after = _take_token(f"user/{uid}", RATE_LIMIT_USER_CAPACITY, RATE_LIMIT_USER_REFILL_PER_SEC, now)
+        if not retry_after and household_id:
+            retry_after = _take_token(f"household/{household_id}", RATE_LIMIT_HOUSEHOLD_CAPACITY, RATE_LIMIT_HOUSEHOLD_REFILL_PER_SEC, now)
+            if retry_after:
+                # Give back the user token so a household limit doesn't double-charge the user
+                _rate_limit_buckets[f"user/{uid}"][0] += 1
+        if not retry_after and RATE_LIMIT_GLOBAL_COUNTERS:
+            for key in (f"user/{uid}", f"household/{household_id}" if household_id else None):
+                if key:
+                    _rate_limit_pending_counts[key] = _rate_limit_pending_counts.get(key, 0) + 1
+            if _rate_limit_flush_thread is None:
+                # Counts are written every RATE_LIMIT_FLUSH_INTERVAL_SEC, off the request path
+                _rate_limit_flush_thread = threading.Thread(target=_rate_limit_flush_loop, name="rate-limit-flush", daemon=True)
+                _rate_limit_flush_thread.start()
+
+    if retry_after:
+        return https_fn.Response(
+            status=429,
+            response=json.dumps({"success": False, "data": None, "error": {"code": "RATE_LIMITED", "message": "Too many requests. Please retry later."}}),
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            mimetype="application/json"
+        )
+    return None
+
+
+# --- Read Replica for Hot Households ---
+# Optional per-instance cache of a household's items and rooms, kept current by
+# Firestore on_snapshot listeners. Listeners push changes in real time and only
+# call back when something changed, so a quiet household stays fresh for as long
+# as its listeners are still streaming; one whose listener has stopped (e.g. on
+# an unrecoverable stream error) is rebuilt.
+READ_REPLICA_ENABLED = os.environ.get("READ_REPLICA_ENABLED", "false").lower() == "true"
+READ_REPLICA_HOT_REQUESTS = int(os.environ.get("READ_REPLICA_HOT_REQUESTS", "20")) # Reads per window before a household is replicated
+READ_REPLICA_HOT_WINDOW_SEC = 60
+READ_REPLICA_MAX_ITEMS = int(os.environ.get("READ_REPLICA_MAX_ITEMS", "50000")) # Across all replicated households
+_REPLICA_ABSENT = object() # Marks a field the item document doesn't have
+
+
+class _ReplicaItem:
+    """Compact in-memory form of an item document.
+
+    Fields the document doesn't have are left out of to_dict, as they are when the
+    item is read from Firestore.
+    """
+    __slots__ = ("id", "name", "name_lower", "room_id", "bin_number", "status", "creator_user_id",
+                 "household_id", "is_private", "last_updated", "expires_at", "metadata", "photo")
+
+    def __init__(self, item_id: str, data: dict):
+        location = data.get("location")
+        last_updated = data.get("lastUpdated", _REPLICA_ABSENT)
+        expires_at = data.get("expiresAt", _REPLICA_ABSENT)
+        self.id = item_id
+        self.name = data.get("name", _REPLICA_ABSENT)
+        self.name_lower = data.get(ENTITY_NAME_KEY, _REPLICA_ABSENT)
+        self.room_id = location.get("roomId", _REPLICA_ABSENT) if isinstance(location, dict) else _REPLICA_ABSENT
+        self.bin_number = location.get("binNumber", _REPLICA_ABSENT) if isinstance(location, dict) else _REPLICA_ABSENT
+        self.status = data.get("status", _REPLICA_ABSENT)
+        self.creator_user_id = data.get("creatorUserId", _REPLICA_ABSENT)
+        self.household_id = data.get("householdId", _REPLICA_ABSENT)
+        self.is_private = data.get("isPrivate", _REPLICA_ABSENT)
+        self.last_updated = last_updated.isoformat() if hasattr(last_updated, "isoformat") else last_updated
+        self.expires_at = expires_at.isoformat() if hasattr(expires_at, "isoformat") else expires_at
+        self.metadata = data.get("metadata", _REPLICA_ABSENT)
+        self.photo = data.get("photo", _REPLICA_ABSENT)
+
+    def to_dict(self) -> dict:
+        """Returns the item in the same shape the API serves from Firestore."""
+        location = {key: value for key, value in (("roomId", self.room_id), ("binNumber", self.bin_number)) if value is not _REPLICA_ABSENT}
+        fields = {
+            "id": self.id,
+            "name": self.name,
+            ENTITY_NAME_KEY: self.name_lower,
+            "location": location or _REPLICA_ABSENT,
+            "status": self.status,
+            "creatorUserId": self.creator_user_id,
+            "householdId": self.household_id,
+            "isPrivate": self.is_private,
+            "lastUpdated": self.last_updated,
+            "expiresAt": self.expires_at,
+            "metadata": self.metadata,
+            "photo": self.photo,
+        }
+        return {key: value for key, value in fields.items() if value is not _REPLICA_ABSENT}
+
+
+class _HouseholdReplica:
+    """Items and rooms of one household, maintained by two snapshot listeners."""
+
+    def __init__(self, household_id: str):
+        self.household_id = household_id
+        self.items = {} # itemId -> _ReplicaItem
+        self.rooms = {} # roomId -> room document data
+        self.items_read_time = None # Server read time (epoch seconds) of the last items snapshot
+        self.rooms_read_time = None
+        self.min_read_time = 0.0 # Snapshots older than this miss a write made by this instance
+        self.lock = threading.Lock()
+        self.watches = []
+
+    def start(self) -> None:
+        db = get_db()
+        household_ref = db.collection("households").document(self.household_id)
+        if ITEMS_LAYOUT == "scoped":
+            items_query = household_items_collection(self.household_id)
+        else:
+            items_query = legacy_items_collection().where(filter=firestore.FieldFilter("householdId", "==", self.household_id))
+        self.watches = [
+            items_query.on_snapshot(self._on_items_snapshot),
+            household_ref.collection("rooms").on_snapshot(self._on_rooms_snapshot),
+        ]
+
+    def stop(self) -> None:
+        for watch in self.watches:
+            try:
+                watch.unsubscribe()
+            except Exception as e:
+                print(f"Failed to stop replica listener for household {self.household_id}: {e}")
+        self.watches = []
+
+    def _on_items_snapshot(self, docs, changes, read_time) -> None:
+        meter_firestore_ops(reads=len(changes), household_id=self.household_id, endpoint="replica listener")
+        with self.lock:
+            for change in changes:
+                if change.type.name == "REMOVED":
+                    self.items.pop(change.document.id, None)
+                else:
+                    self.items[change.document.id] = _ReplicaItem(change.document.id, change.document.to_dict())
+            self.items_read_time = read_time.timestamp()
+        _enforce_replica_memory_cap()
+
+    def _on_rooms_snapshot(self, docs, changes, read_time) -> None:
+        meter_firestore_ops(reads=len(changes), household_id=self.household_id, endpoint="replica listener")
+        with self.lock:
+            for change in changes:
+                if change.type.name == "REMOVED":
+                    self.rooms.pop(change.document.id, None)
+                else:
+                    self.rooms[change.document.id] = change.document.to_dict()
+            self.rooms_read_time = read_time.timestamp()
+
+    def read_time(self) -> float | None:
+        """Returns the read time both listeners have caught up to, or None before the first snapshots."""
+        if self.items_read_time is None or self.rooms_read_time is None:
+            return None
+        return min(self.items_read_time, self.rooms_read_time)
+
+    def is_listening(self) -> bool:
+        """True while both listeners are still streaming changes.
+
+        A listener stops for good on an unrecoverable stream error; transient
+        errors are retried by the client without stopping it.
+        """
+        return bool(self.watches) and all(watch.is_active for watch in self.watches)
+
+    def is_fresh(self) -> bool:
+        """True if the replica reflects this instance's writes and its listeners are still streaming."""
+        read_time = self.read_time()
+        return read_time is not None and read_time >= self.min_read_time and self.is_listening()
+
+    def items_list(self) -> list:
+        with self.lock:
+            return [item.to_dict() for item in self.items.values()]
+
+    def get_item(self, item_id: str) -> dict | None:
+        with self.lock:
+            item = self.items.get(item_id)
+            return item.to_dict() if item else None
+
+    def rooms_list(self) -> list:
+        with self.lock:
+            return [{**room_data, "id": room_id} for room_id, room_data in self.rooms.items()]
+
+
+_replica_lock = threading.Lock()
+_replicas = collections.OrderedDict() # householdId -> _HouseholdReplica, least recently used first
+_replica_refreshing = {} # householdId -> _HouseholdReplica being (re)built in the background
+_household_read_counts = {} # householdId -> reads in the current hotness window
+_household_read_window_start = time.monotonic()
+
+
+def _enforce_replica_memory_cap() -> None:
+    """Evicts least recently used households until the replicated item count fits the cap."""
+    evicted = []
+    with _replica_lock:
+        total_items = sum(len(replica.items) for replica in _replicas.values())
+        while _replicas and total_items > READ_REPLICA_MAX_ITEMS:
+            household_id, replica = _replicas.popitem(last=False)
+            total_items -= len(replica.items)
+            evicted.append(replica)
+            # Start counting afresh, or the next read would replicate it straight back
+            _household_read_counts.pop(household_id, None)
+    for replica in evicted:
+        replica.stop()
+
+
+def _promote_refreshed_replica(household_id: str) -> None:
+    """Swaps in a background-built replica once its first snapshots have arrived."""
+    with _replica_lock:
+        pending = _replica_refreshing.get(household_id)
+        if pending is None or pending.read_time() is None:
+            return
+        del _replica_refreshing[household_id]
+        previous = _replicas.pop(household_id, None)
+        _replicas[household_id] = pending
+    if previous is not None:
+        previous.stop()
+    _enforce_replica_memory_cap()
+
+
+def get_fresh_replica(household_id: str) -> _HouseholdReplica | None:
+    """Returns a replica of household_id that is safe to serve reads from, if any.
+
+    Also counts the read towards the household's hotness, starting listeners once
+    the household crosses READ_REPLICA_HOT_REQUESTS reads per window, and rebuilding
+    a replica whose listeners have stopped.
+    """
+    global _household_read_window_start
+    # Items are split across two collections mid-migration, so only replicate a settled layout
+    if not READ_REPLICA_ENABLED or not household_id or ITEMS_LAYOUT == "dual":
+        return None
+
+    _promote_refreshed_replica(household_id)
+    to_start = None
+    with _replica_lock:
+        replica = _replicas.get(household_id)
+        if replica is not None:
+            _replicas.move_to_end(household_id)
+            if replica.is_fresh():
+                return replica
+            # A replica whose listeners stopped (as opposed to one waiting on our own write) needs new ones
+            if replica.read_time() is not None and not replica.is_listening() and household_id not in _replica_refreshing:
+                to_start = _replica_refreshing[household_id] = _HouseholdReplica(household_id)
+        else:
+            now = time.monotonic()
+            if now - _household_read_window_start > READ_REPLICA_HOT_WINDOW_SEC:
+                _household_read_counts.clear()
+                _household_read_window_start = now
+            _household_read_counts[household_id] = _household_read_counts.get(household_id, 0) + 1
+            if _household_read_counts[household_id] >= READ_REPLICA_HOT_REQUESTS and household_id not in _replica_refreshing:
+                to_start = _replica_refreshing[household_id] = _HouseholdReplica(household_id)
+
+    if to_start is not None:
+        try:
+            to_start.start()
+        except Exception as e:
+            print(f"Failed to start replica listeners for household {household_id}: {e}")
+            with _replica_lock:
+                _replica_refreshing.pop(household_id, None)
+    return None
+
+
+def note_household_write(household_id: str | None) -> None:
+    """Marks that this instance just wrote to household_id.
+
+    The household's replica won't serve reads until its listeners deliver a snapshot
+    taken after this point, so a client always reads its own writes.
+    """
+    if not READ_REPLICA_ENABLED or not household_id:
+        return
+    now = time.time()
+    with _replica_lock:
+        for replica in (_replicas.get(household_id), _replica_refreshing.get(household_id)):
+            if replica is not None:
+                replica.min_read_time = now
+
+
+# --- Firestore Usage Metering ---
+# Every document read, write and delete is counted against the request that caused
+# it and attributed to the caller's household, user and endpoint. Counts are
+# aggregated in memory and periodically flushed to sharded counter documents under
+# usageMeters/{YYYY-MM}/counters by a background thread, and back the /api/usage
+# report. Counting hooks into the Firestore client classes, for every client in the
+# process, so handlers don't need to report their own ops. Off unless
+# USAGE_METERING_ENABLED=true, since the hooks add a little work to every operation.
+USAGE_METERING_ENABLED = os.environ.get("USAGE_METERING_ENABLED", "false").lower() == "true"
+USAGE_FLUSH_INTERVAL_SEC = 60
+USAGE_COUNTER_SHARDS = 4
+USAGE_MAX_PENDING_KEYS = 5000 # Flush early rather than grow without bound
+USAGE_BUDGET_READS = int(os.environ.get("USAGE_BUDGET_READS", "50000")) # Monthly, defaults to the free tier
+USAGE_BUDGET_WRITES = int(os.environ.get("USAGE_BUDGET_WRITES", "20000"))
+USAGE_BUDGET_DELETES = int(os.environ.get("USAGE_BUDGET_DELETES", "20000"))
+USAGE_OPS = ("requests", "reads", "writes", "deletes")
+USAGE_OPS_HEADER = os.environ.get("USAGE_OPS_HEADER", "false").lower() == "true" # Report each request's counts in X-Firestore-Ops (load tests)
+
+_usage_lock = threading.Lock()
+_usage_pending = {} # (period, scope, key) -> {"requests": n, "reads": n, "writes": n, "deletes": n}
+_usage_flush_wakeup = threading.Event()
+_usage_flush_thread = None
+_current_usage_meter = contextvars.ContextVar("current_usage_meter", default=None)
+
+
+class _UsageMeter:
+    """Firestore operation counts for one API request."""
+
+    __slots__ = ("endpoint", "reads", "writes", "deletes")
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.reads = 0
+        self.writes = 0
+        self.deletes = 0
+
+
+def meter_firestore_ops(reads: int = 0, writes: int = 0, deletes: int = 0, household_id: str | None = None, endpoint: str | None = None) -> None:
+    """Counts Firestore operations against the current request.
+
+    Outside a request (snapshot listeners, background flushes) the operations are
+    recorded directly, under `endpoint` (default "background") and household_id.
+    """
+    if not USAGE_METERING_ENABLED:
+        return
+    meter = _current_usage_meter.get()
+    if meter is not None:
+        with _usage_lock:
+            meter.reads += reads
+            meter.writes += writes
+            meter.deletes += deletes
+        return
+    _record_usage(household_id, None, endpoint or "background", {"reads": reads, "writes": writes, "deletes": deletes})
+
+
+def _record_usage(household_id: str | None, user_id: str | None, endpoint: str, counts: dict) -> None:
+    """Adds counts to the pending totals for each scope the operations belong to.
+
+    Never writes to Firestore itself: the background flush thread does, every
+    USAGE_FLUSH_INTERVAL_SEC or as soon as USAGE_MAX_PENDING_KEYS totals wait.
+    """
+    global _usage_flush_thread
+    period = time.strftime("%Y-%m", time.gmtime())
+    keys = [("endpoint", endpoint)]
+    if household_id:
+        keys += [("household", household_id), ("householdEndpoint", f"{household_id}|{endpoint}")]
+    if user_id:
+        keys.append(("user", user_id))
+    with _usage_lock:
+        for scope, key in keys:
+            totals = _usage_pending.setdefault((period, scope, key), dict.fromkeys(USAGE_OPS, 0))
+            for op, count in counts.items():
+                totals[op] += count
+        flush_now = len(_usage_pending) >= USAGE_MAX_PENDING_KEYS
+        if _usage_flush_thread is None:
+            _usage_flush_thread = threading.Thread(target=_usage_flush_loop, name="usage-flush", daemon=True)
+            _usage_flush_thread.start()
+    if flush_now:
+        _usage_flush_wakeup.set()
+
+
+def _usage_flush_loop() -> None:
+    while True:
+        _usage_flush_wakeup.wait(USAGE_FLUSH_INTERVAL_SEC)
+        _usage_flush_wakeup.clear()
+        _flush_usage_counters()
+
+
+def _flush_usage_counters() -> None:
+    """Writes pending usage totals to sharded counters, one Increment per key and op."""
+    with _usage_lock:
+        pending = dict(_usage_pending)
+        _usage_pending.clear()
+    if not pending:
+        return
+    try:
+        db = get_db()
+        items = list(pending.items())
+        for i in range(0, len(items), FIRESTORE_BATCH_LIMIT):
+            batch = db.batch()
+            for (period, scope, key), totals in items[i:i + FIRESTORE_BATCH_LIMIT]:
+                shard = random.randrange(USAGE_COUNTER_SHARDS)
+                counter_ref = db.collection("usageMeters").document(period).collection("counters")\
+                    .document(f"{scope}:{key.replace('/', '_')}:{shard}")
+                counter_data = {"scope": scope, "key": key, **{op: firestore.Increment(n) for op, n in totals.items() if n}}
+                if scope in ("household", "householdEndpoint"):
+                    counter_data["householdId"] = key.split("|", 1)[0] # Lets a household read its own counters
+                batch.set(counter_ref, counter_data, merge=True)
+            batch.commit()
+    except Exception as e:
+        # Metering is best-effort; losing one flush must not affect request handling
+        print(f"Failed to flush usage counters: {e}")
+
+
+def _usage_endpoint_label(method: str, path: str) -> str:
+    """Returns a route label for req.path with IDs replaced, e.g. 'PUT /api/items/{itemId}'."""
+    parts = path.rstrip("/").split("/")
+    if len(parts) >= 4 and parts[2] == "items" and parts[3] != "bulk":
+        parts[3] = "{itemId}"
+    elif len(parts) >= 4 and parts[2] == "households":
+        parts[3] = "{householdId}"
+        if len(parts) >= 6 and parts[4] == "rooms":
+            parts[5] = "{roomId}"
+    return f"{method} {'/'.join(parts)}"
+
+
+def begin_request_metering(req: https_fn.Request):
+    """Starts counting Firestore operations for req. Pass the result to end_request_metering."""
+    if not USAGE_METERING_ENABLED:
+        return None
+    meter = _UsageMeter(_usage_endpoint_label(req.method, req.path))
+    return meter, _current_usage_meter.set(meter)
+
+
+def end_request_metering(req: https_fn.Request, metering) -> dict | None:
+    """Stops counting for req and attributes its operations to its household and user.
+
+    Returns:
+        The request's counts ({"requests", "reads", "writes", "deletes"}), or None if metering is off.
+    """
+    if metering is None:
+        return None
+    meter, token = metering
+    _current_usage_meter.reset(token)
+    user = current_user() or {}
+    user_id = user.get("uid")
+    household_id = user.get(HOUSEHOLD_CLAIM) or (_household_by_uid.get(user_id) if user_id else None)
+    with _usage_lock:
+        counts = {"requests": 1, "reads": meter.reads, "writes": meter.writes, "deletes": meter.deletes}
+    _record_usage(household_id, user_id, meter.endpoint, counts)
+    return counts
+
+
+def _install_firestore_metering() -> None:
+    """Wraps the Firestore client's public read and write methods to call meter_firestore_ops.
+
+    Billing follows Firestore's rules: one read per document returned (and at least
+    one per query), one per aggregation query, one write or delete per document
+    written. Writes are counted as they are added to a batch or transaction, which
+    also covers DocumentReference.create/set/update (they commit a one-write batch),
+    so a batch that fails to commit, or a retried transaction, is counted in full.
+    Snapshot listener reads are metered by the listeners themselves.
+    """
+    try:
+        from google.cloud.firestore_v1.aggregation import AggregationQuery
+        from google.cloud.firestore_v1.base_batch import BaseWriteBatch
+        from google.cloud.firestore_v1.client import Client
+        from google.cloud.firestore_v1.document import DocumentReference
+        from google.cloud.firestore_v1.query import Query
+    except ImportError as e:
+        print(f"Firestore usage metering disabled: {e}")
+        return
+    if getattr(BaseWriteBatch.set, "_usage_metered", False):
+        return
+
+    def metered(method, **ops):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            meter_firestore_ops(**ops)
+            return method(*args, **kwargs)
+        wrapper._usage_metered = True
+        return wrapper
+
+    client_get_all = Client.get_all
+    def get_all(self, references, *args, **kwargs):
+        references = list(references)
+        meter_firestore_ops(reads=len(references)) # Missing documents are billed too
+        return client_get_all(self, references, *args, **kwargs)
+
+    query_stream = Query.stream
+    def stream(self, *args, **kwargs):
+        returned = 0
+        try:
+            for snapshot in query_stream(self, *args, **kwargs):
+                returned += 1
+                yield snapshot
+        finally:
+            # Also runs when the caller stops iterating early
+            meter_firestore_ops(reads=max(returned, 1))
+
+    DocumentReference.get = metered(DocumentReference.get, reads=1)
+    DocumentReference.delete = metered(DocumentReference.delete, deletes=1) # Commits directly, without a batch
+    Client.get_all = functools.wraps(client_get_all)(get_all) # Also serves Transaction.get
+    Query.stream = functools.wraps(query_stream)(stream)
+    AggregationQuery.get = metered(AggregationQuery.get, reads=1)
+    for method_name in ("create", "set", "update"):
+        setattr(BaseWriteBatch, method_name, metered(getattr(BaseWriteBatch, method_name), writes=1))
+    BaseWriteBatch.delete = metered(BaseWriteBatch.delete, deletes=1)
+
+
+if USAGE_METERING_ENABLED:
+    _install_firestore_metering()
+
+
 # --- Auth Endpoints (Existing) ---
 def _register_logic(req: https_fn.Request) -> https_fn.Response:
     """
@@ -252,8 +1142,460 @@ def _reset_password_logic(req: https_fn.Request) -> https_fn.Response:
         )
 
 
+# --- Item Activity Log ---
+# Every item mutation appends events to households/{hid}/activity and bumps
+# precomputed counters, so usage stats read a handful of documents:
+#   households/{hid}/activityDaily/{YYYY-MM-DD}_{shard}  per-household counts for one UTC day
+#   households/{hid}/itemStats/{itemId}                 per-item running totals and current status
+# Each day's counts are split over ACTIVITY_ROLLUP_SHARDS documents by item ID, so
+# a busy household doesn't hit one document's write rate limit and each shard's
+# byItem map only holds its share of the day's items. Readers sum the shards.
+ACTIVITY_EVENT_TYPES = ["CREATED", "STORED", "OUT", "MOVED", "DELETED"]
+ACTIVITY_ROLLUP_SHARDS = 8
+
+
+def _activity_rollup_shard(item_id: str) -> int:
+    return zlib.crc32(item_id.encode("utf-8")) % ACTIVITY_ROLLUP_SHARDS
+
+
+def item_activity_events(item_id: str, before: dict | None, after: dict | None, user_id: str) -> list:
+    """Derives activity events from an item's state before and after a mutation.
+
+    Args:
+        item_id: The ID of the mutated item.
+        before: The item's data before the mutation, or None if it was created.
+        after: The item's data after the mutation (merged with the update), or None if deleted.
+        user_id: The UID of the user making the change.
+
+    Returns:
+        A list of event dicts, empty if nothing relevant changed.
+    """
+    current = after if after is not None else before
+    base_event = {"itemId": item_id, "itemName": current.get("name"), "userId": user_id}
+    if before is None:
+        return [{**base_event, "type": "CREATED", "status": after.get("status"), "toLocation": after.get("location")}]
+    if after is None:
+        return [{**base_event, "type": "DELETED", "status": before.get("status"), "fromLocation": before.get("location")}]
+
+    events = []
+    if after.get("location") != before.get("location"):
+        events.append({**base_event, "type": "MOVED", "fromLocation": before.get("location"), "toLocation": after.get("location")})
+    if after.get("status") != before.get("status"):
+        events.append({**base_event, "type": after.get("status"), "location": after.get("location")})
+    return events
+
+
+def add_activity_writes(db, batch, household_id: str, events: list) -> int:
+    """Adds activity log and rollup writes for events to a batch.
+
+    Writes one document per event, one merged update per touched shard of today's
+    household rollup and one merged update per affected item, so callers must budget
+    len(events) + (distinct items) + ACTIVITY_ROLLUP_SHARDS writes in the batch.
+
+    Returns:
+        The number of writes added.
+    """
+    if not events:
+        return 0
+    household_ref = db.collection("households").document(household_id)
+    day = datetime.datetime.now(datetime.timezone.utc).date().isoformat()
+    now = firestore.SERVER_TIMESTAMP
+    writes = 0
+
+    daily_counts_by_shard = {}
+    item_updates = {}
+    for event in events:
+        batch.set(household_ref.collection("activity").document(), {**event, "timestamp": now})
+        writes += 1
+
+        event_type = event["type"]
+        daily_counts = daily_counts_by_shard.setdefault(_activity_rollup_shard(event["itemId"]), {"events": 0, "byType": {}, "byRoom": {}, "byItem": {}})
+        daily_counts["events"] += 1
+        daily_counts["byType"][event_type] = daily_counts["byType"].get(event_type, 0) + 1
+        item_counts = daily_counts["byItem"].setdefault(event["itemId"], {})
+        item_counts[event_type] = item_counts.get(event_type, 0) + 1
+        for location in (event.get("fromLocation"), event.get("toLocation"), event.get("location")):
+            room_id = location.get("roomId") if isinstance(location, dict) else None
+            if room_id:
+                daily_counts["byRoom"][room_id] = daily_counts["byRoom"].get(room_id, 0) + 1
+
+        item_update = item_updates.setdefault(event["itemId"], {"name": event.get("itemName"), "lastEventAt": now})
+        if event_type == "DELETED":
+            item_update["deleted"] = True
+        if event_type in ("OUT", "STORED", "CREATED"):
+            status = event["status"] if event_type == "CREATED" else event_type
+            item_update["status"] = status
+            if status == "OUT":
+                item_update["lastOutAt"] = now
+                item_update["outCount"] = item_update.get("outCount", 0) + 1
+            else:
+                item_update["lastStoredAt"] = now
+        if event_type == "MOVED":
+            item_update["moveCount"] = item_update.get("moveCount", 0) + 1
+
+    def as_increments(counts):
+        return {key: as_increments(value) if isinstance(value, dict) else firestore.Increment(value) for key, value in counts.items()}
+
+    for shard, daily_counts in daily_counts_by_shard.items():
+        rollup = as_increments(daily_counts)
+        rollup["date"] = day
+        batch.set(household_ref.collection("activityDaily").document(f"{day}_{shard}"), rollup, merge=True)
+        writes += 1
+
+    for item_id, item_update in item_updates.items():
+        item_stats_ref = household_ref.collection("itemStats").document(item_id)
+        if item_update.pop("deleted", False):
+            batch.delete(item_stats_ref)
+        else:
+            for counter in ("outCount", "moveCount"):
+                if counter in item_update:
+                    item_update[counter] = firestore.Increment(item_update[counter])
+            batch.set(item_stats_ref, item_update, merge=True)
+        writes += 1
+    return writes
+
+
+# --- Bin Occupancy Index ---
+# households/{hid}/binIndex/{roomId} lists the items in each bin of a room:
+#   {"roomId": ..., "nBins": 8, "built": True, "bins": {"5": {"itemIds": [...]}}}
+# Item writes keep it current with ArrayUnion/ArrayRemove in the same batch, so
+# "what's in bin 5" and "which bin is emptiest" are one document read. Counts are
+# the lengths of the ID lists, which can't drift the way a separate counter could.
+# Rooms without a built index (created before it existed) are rebuilt from their
+# items, in a transaction, on first read.
+
+def bin_index_ref(db, household_id: str, room_id: str):
+    return db.collection("households").document(household_id).collection("binIndex").document(room_id)
+
+
+def _bin_slot(item_data: dict | None) -> tuple[str, str] | None:
+    """Returns an item's (roomId, bin key) or None if it has no valid location."""
+    location = item_data.get("location") if item_data else None
+    if not isinstance(location, dict) or not location.get("roomId") or not isinstance(location.get("binNumber"), int):
+        return None
+    return (location["roomId"], str(location["binNumber"]))
+
+
+def add_bin_index_writes(db, batch, household_id: str, changes: list) -> int:
+    """Adds bin index updates for item mutations to a batch.
+
+    Args:
+        changes: A list of (item_id, before, after) tuples, where before is None for a
+            created item and after is None (or before merged with the update) otherwise.
+
+    Writes at most one removal and one addition per affected room, so callers must
+    budget 2 * (distinct rooms) writes in the batch.
+
+    Returns:
+        The number of writes added.
+    """
+    removals = {}
+    additions = {}
+    for item_id, before, after in changes:
+        before_slot = _bin_slot(before)
+        after_slot = _bin_slot(after)
+        if before_slot == after_slot:
+            continue
+        if before_slot:
+            removals.setdefault(before_slot[0], {}).setdefault(before_slot[1], []).append(item_id)
+        if after_slot:
+            additions.setdefault(after_slot[0], {}).setdefault(after_slot[1], []).append(item_id)
+
+    writes = 0
+    for room_bins, transform in ((removals, firestore.ArrayRemove), (additions, firestore.ArrayUnion)):
+        for room_id, bins in room_bins.items():
+            bin_updates = {bin_key: {"itemIds": transform(item_ids)} for bin_key, item_ids in bins.items()}
+            batch.set(bin_index_ref(db, household_id, room_id), {"roomId": room_id, "bins": bin_updates}, merge=True)
+            writes += 1
+    return writes
+
+
+def _load_bin_index_in(transaction, household_id: str, room_id: str) -> dict | None:
+    """Reads a room's bin index within a transaction, rebuilding it from the room's
+    items if needed. Makes only reads before its one write, so callers can add more
+    writes afterwards.
+
+    Every item write also writes the index doc, so reading the index in the
+    transaction orders the rebuild against them: an item batch that committed first
+    is seen by the item query, and one that commits later waits for the rebuild and
+    applies its ArrayUnion/ArrayRemove on top of it.
+    """
+    db = get_db()
+    index_ref = bin_index_ref(db, household_id, room_id)
+    index_doc = index_ref.get(transaction=transaction)
+    index_data = index_doc.to_dict() if index_doc.exists else None
+    if index_data and index_data.get("built"):
+        return index_data
+
+    room_doc = db.collection("households").document(household_id).collection("rooms").document(room_id).get(transaction=transaction)
+    if not room_doc.exists:
+        return None
+    bins = {}
+    for item_doc in stream_household_items(household_id, room_id=room_id, transaction=transaction):
+        slot = _bin_slot(item_doc.to_dict())
+        if slot:
+            bins.setdefault(slot[1], {"itemIds": []})["itemIds"].append(item_doc.id)
+    index_data = {"roomId": room_id, "nBins": room_doc.to_dict().get("nBins", 0), "built": True, "bins": bins}
+    transaction.set(index_ref, index_data)
+    return index_data
+
+
+def load_bin_index(household_id: str, room_id: str) -> dict | None:
+    """Reads a room's bin index, rebuilding it from the room's items if needed.
+
+    Returns:
+        The index data, or None if the room doesn't exist.
+    """
+    db = get_db()
+    index_data = bin_index_ref(db, household_id, room_id).get().to_dict()
+    if index_data and index_data.get("built"):
+        return index_data
+    return firestore.transactional(_load_bin_index_in)(db.transaction(), household_id, room_id)
+
+
+def bin_occupancy(index_data: dict) -> list:
+    """Lists every bin of a room (1..nBins) with its item count and item IDs."""
+    bins = index_data.get("bins") or {}
+    occupancy = []
+    for bin_number in range(1, index_data.get("nBins", 0) + 1):
+        item_ids = (bins.get(str(bin_number)) or {}).get("itemIds") or []
+        occupancy.append({"binNumber": bin_number, "count": len(item_ids), "itemIds": item_ids})
+    return occupancy
+
+
+# --- Dialogflow Entity Sync ---
+# The agent's @ItemName and @RoomName entities follow the names of items and rooms.
+# Write paths only queue changes; a background thread deduplicates them and applies
+# the diff against the agent's current values as batchCreate/batchDelete calls every
+# DIALOGFLOW_SYNC_INTERVAL_SEC, or sooner once DIALOGFLOW_SYNC_MAX_PENDING values wait.
+# Between requests an instance's CPU may be throttled, so a flush can wait for the
+# next request. Changes still queued when an instance shuts down are lost until the
+# same name is written again.
+DIALOGFLOW_ENTITY_SYNC_ENABLED = os.environ.get("DIALOGFLOW_ENTITY_SYNC_ENABLED", "false").lower() == "true"
+DIALOGFLOW_PROJECT_ID = os.environ.get("DIALOGFLOW_PROJECT_ID") or os.environ.get("GCLOUD_PROJECT")
+DIALOGFLOW_DEFAULT_API_URL = "https://dialogflow.googleapis.com/v2"
+DIALOGFLOW_API_URL = os.environ.get("DIALOGFLOW_API_URL", DIALOGFLOW_DEFAULT_API_URL) # e.g. scripts/dialogflow_entity_stub.py for local testing
+DIALOGFLOW_LANGUAGE_CODE = os.environ.get("DIALOGFLOW_LANGUAGE_CODE", "en")
+DIALOGFLOW_SYNC_INTERVAL_SEC = float(os.environ.get("DIALOGFLOW_SYNC_INTERVAL_SEC", "30"))
+DIALOGFLOW_SYNC_MAX_PENDING = 100
+DIALOGFLOW_BATCH_MAX_VALUES = 500 # Values per batchCreate/batchDelete call
+ENTITY_ITEM_NAME = "ItemName"
+ENTITY_ROOM_NAME = "RoomName"
+ENTITY_SOURCE_COLLECTIONS = {ENTITY_ITEM_NAME: "items", ENTITY_ROOM_NAME: "rooms"} # Collection group whose names feed each entity
+ENTITY_NAME_KEY = "nameLower" # entity_name_key() of an item's or room's name
+
+_entity_sync_lock = threading.Lock()
+_entity_flush_lock = threading.Lock() # One flush at a time, so the cached agent values stay consistent
+_entity_pending = {} # (entity type, lowercased value) -> (value, present); the latest change wins
+_entity_sync_wakeup = threading.Event()
+_entity_sync_thread = None
+_entity_client = None
+
+
+class _DialogflowEntityClient:
+    """Reads and batch-updates the agent's entity values over the Dialogflow ES v2 REST API.
+
+    Each entity type is listed once per instance; afterwards its values are tracked
+    locally, so a flush only sends values that are actually new or gone.
+    """
+
+    def __init__(self, api_url: str, project_id: str, session):
+        self.api_url = api_url.rstrip("/")
+        self.agent_url = f"{self.api_url}/projects/{project_id}/agent"
+        self.session = session
+        self.entity_types = {} # display name -> {"name": resource name, "values": {lowercased value: value}}
+
+    def _request(self, method: str, url: str, **kwargs) -> dict:
+        response = self.session.request(method, url, timeout=30, **kwargs)
+        response.raise_for_status()
+        return response.json() if response.content else {}
+
+    def _entity_type(self, display_name: str) -> dict:
+        if display_name not in self.entity_types:
+            found = None
+            params = {"languageCode": DIALOGFLOW_LANGUAGE_CODE}
+            while found is None:
+                listing = self._request("GET", f"{self.agent_url}/entityTypes", params=params)
+                found = next((entity_type for entity_type in listing.get("entityTypes", []) if entity_type.get("displayName") == display_name), None)
+                if not listing.get("nextPageToken"):
+                    break
+                params["pageToken"] = listing["nextPageToken"]
+            if found is None:
+                found = self._request("POST", f"{self.agent_url}/entityTypes", params={"languageCode": DIALOGFLOW_LANGUAGE_CODE}, json={"displayName": display_name, "kind": "KIND_MAP"})
+            self.entity_types[display_name] = {"name": found["name"], "values": {entity["value"].lower(): entity["value"] for entity in found.get("entities", [])}}
+        return self.entity_types[display_name]
+
+    def values(self, display_name: str) -> dict:
+        """Returns the entity type's current values as {lowercased value: value}."""
+        return dict(self._entity_type(display_name)["values"])
+
+    def batch_create(self, display_name: str, values: list) -> None:
+        entity_type = self._entity_type(display_name)
+        for i in range(0, len(values), DIALOGFLOW_BATCH_MAX_VALUES):
+            chunk = values[i:i + DIALOGFLOW_BATCH_MAX_VALUES]
+            entities = [{"value": value, "synonyms": [value]} for value in chunk]
+            self._request("POST", f"{self.api_url}/{entity_type['name']}/entities:batchCreate", json={"entities": entities, "languageCode": DIALOGFLOW_LANGUAGE_CODE})
+            entity_type["values"].update((value.lower(), value) for value in chunk)
+
+    def batch_delete(self, display_name: str, values: list) -> None:
+        entity_type = self._entity_type(display_name)
+        for i in range(0, len(values), DIALOGFLOW_BATCH_MAX_VALUES):
+            chunk = values[i:i + DIALOGFLOW_BATCH_MAX_VALUES]
+            self._request("POST", f"{self.api_url}/{entity_type['name']}/entities:batchDelete", json={"entityValues": chunk, "languageCode": DIALOGFLOW_LANGUAGE_CODE})
+            for value in chunk:
+                entity_type["values"].pop(value.lower(), None)
+
+
+def _get_entity_client() -> _DialogflowEntityClient:
+    """Returns the entity API client, creating it on first use. Call with _entity_flush_lock held."""
+    global _entity_client
+    if _entity_client is None:
+        if DIALOGFLOW_API_URL == DIALOGFLOW_DEFAULT_API_URL:
+            import google.auth
+            from google.auth.transport.requests import AuthorizedSession
+            credentials, _ = google.auth.default(scopes=["https://www.googleapis.com/auth/cloud-platform"])
+            session = AuthorizedSession(credentials)
+        else:
+            session = requests.Session() # A local stub of the API needs no credentials
+        _entity_client = _DialogflowEntityClient(DIALOGFLOW_API_URL, DIALOGFLOW_PROJECT_ID, session)
+    return _entity_client
+
+
+def _normalize_entity_value(value) -> str | None:
+    if not isinstance(value, str):
+        return None
+    return " ".join(value.split()) or None
+
+
+def entity_name_key(name) -> str | None:
+    """Returns the key entity values are matched by: the name with whitespace collapsed, lowercased.
+
+    Stored on items and rooms as ENTITY_NAME_KEY, so a name can be looked up regardless of case.
+    """
+    value = _normalize_entity_value(name)
+    return value.lower() if value else None
+
+
+def entity_item_name(item_data: dict | None) -> str | None:
+    """Returns the @ItemName value an item contributes: its name, unless it is private."""
+    if not item_data or item_data.get("isPrivate"):
+        return None
+    return item_data.get("name")
+
+
+def queue_entity_rename(entity_type: str, before, after) -> None:
+    """Queues the entity changes for a name going from before to after.
+
+    Pass before=None for a new item or room and after=None for a deleted one. For
+    items, pass entity_item_name() of the item data, so private items stay out. Never
+    blocks on Dialogflow; the change is applied by the next flush.
+    """
+    if not DIALOGFLOW_ENTITY_SYNC_ENABLED:
+        return
+    global _entity_sync_thread
+    before = _normalize_entity_value(before)
+    after = _normalize_entity_value(after)
+    if before == after:
+        return
+    with _entity_sync_lock:
+        if before and (not after or before.lower() != after.lower()):
+            _entity_pending[(entity_type, before.lower())] = (before, False)
+        if after:
+            _entity_pending[(entity_type, after.lower())] = (after, True)
+        flush_now = len(_entity_pending) >= DIALOGFLOW_SYNC_MAX_PENDING
+        if _entity_sync_thread is None:
+            _entity_sync_thread = threading.Thread(target=_entity_sync_loop, name="dialogflow-entity-sync", daemon=True)
+            _entity_sync_thread.start()
+    if flush_now:
+        _entity_sync_wakeup.set()
+
+
+def _entity_value_in_use(entity_type: str, value: str) -> bool:
+    """Checks whether any public item or any room (in any household) still has this name, in any case.
+
+    Documents written before ENTITY_NAME_KEY existed are only matched by their exact name.
+    """
+    collection_group = get_db().collection_group(ENTITY_SOURCE_COLLECTIONS[entity_type])
+    for field, match in ((ENTITY_NAME_KEY, entity_name_key(value)), ("name", value)):
+        query = collection_group.where(filter=firestore.FieldFilter(field, "==", match))
+        if entity_type == ENTITY_ITEM_NAME:
+            query = query.where(filter=firestore.FieldFilter("isPrivate", "==", False))
+        if any(True for _ in query.limit(1).stream()):
+            return True
+    return False
+
+
+def flush_dialogflow_entities() -> dict:
+    """Applies the queued entity changes to the Dialogflow agent.
+
+    Values that already match the agent are dropped, and a removed name is only
+    deleted once no item or room uses it anymore. If the flush fails, its changes
+    are queued again unless a newer change to the same value has arrived.
+
+    Returns:
+        A dict with the number of values created and deleted.
+    """
+    with _entity_flush_lock:
+        with _entity_sync_lock:
+            pending = dict(_entity_pending)
+            _entity_pending.clear()
+        summary = {"created": 0, "deleted": 0}
+        if not pending:
+            return summary
+        try:
+            client = _get_entity_client()
+            for entity_type in sorted({entity_type for entity_type, _ in pending}):
+                known = client.values(entity_type)
+                changes = [(key, value, present) for (change_type, key), (value, present) in pending.items() if change_type == entity_type]
+                to_create = [value for key, value, present in changes if present and key not in known]
+                to_delete = [known[key] for key, value, present in changes if not present and key in known and not _entity_value_in_use(entity_type, value)]
+                client.batch_create(entity_type, to_create)
+                client.batch_delete(entity_type, to_delete)
+                summary["created"] += len(to_create)
+                summary["deleted"] += len(to_delete)
+        except Exception as e:
+            # Already-applied values now match the cached agent values, so a retry skips them
+            print(f"Failed to sync Dialogflow entities: {e}")
+            with _entity_sync_lock:
+                for key, change in pending.items():
+                    _entity_pending.setdefault(key, change)
+        return summary
+
+
+def _entity_sync_loop() -> None:
+    while True:
+        _entity_sync_wakeup.wait(DIALOGFLOW_SYNC_INTERVAL_SEC)
+        _entity_sync_wakeup.clear()
+        flush_dialogflow_entities()
+
+
 # --- Item Management Endpoints ---
 
+def parse_expires_at(value) -> datetime.datetime | None:
+    """Parses an item's expiresAt from a request.
+
+    Accepts an ISO 8601 date ("2026-11-01", read as midnight UTC) or date-time. A
+    date-time without an offset is read as UTC. None means the item doesn't expire.
+
+    Returns:
+        A timezone-aware UTC datetime, or None.
+
+    Raises:
+        ValueError: If value is not a valid ISO 8601 string.
+    """
+    if value is None:
+        return None
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError("'expiresAt' must be an ISO 8601 date or date-time string.")
+    try:
+        parsed = datetime.datetime.fromisoformat(value.strip())
+    except ValueError:
+        raise ValueError("'expiresAt' must be an ISO 8601 date or date-time string.") from None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed.astimezone(datetime.timezone.utc)
+
+
 # @https_fn.on_request() # DECORATOR REMOVED
 # @require_auth # DECORATOR REMOVED
 def _create_item_logic(req: https_fn.Request) -> https_fn.Response: # RENAMED
@@ -296,13 +1638,16 @@ def _create_item_logic(req: https_fn.Request) -> https_fn.Response: # RENAMED
         if not isinstance(is_private, bool):
             return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "INVALID_ISPRIVATE", "message": "'isPrivate' must be a boolean."}}), mimetype="application/json")
 
-        auth_user_uid = req.user["uid"]
-        user_profile = get_user_data_from_firestore(auth_user_uid)
+        try:
+            expires_at = parse_expires_at(data.get("expiresAt"))
+        except ValueError as e:
+            return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "INVALID_EXPIRES_AT", "message": str(e)}}), mimetype="application/json")
 
-        if not user_profile or not user_profile.get("householdId"):
-            return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "USER_NOT_IN_HOUSEHOLD", "message": "User must belong to a household to create items."}}), mimetype="application/json")
+        auth_user_uid = current_user()["uid"]
+        household_id = get_household_id_for_request(req)
 
-        household_id = user_profile["householdId"]
+        if not household_id:
+            return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "USER_NOT_IN_HOUSEHOLD", "message": "User must belong to a household to create items."}}), mimetype="application/json")
         
         db = get_db()
         # Validate room exists and bin number is valid
@@ -317,6 +1662,7 @@ def _create_item_logic(req: https_fn.Request) -> https_fn.Response: # RENAMED
 
         item_data = {
             "name": name,
+            ENTITY_NAME_KEY: entity_name_key(name),
             "location": location,
             "status": status,
             "creatorUserId": auth_user_uid,
@@ -325,11 +1671,20 @@ def _create_item_logic(req: https_fn.Request) -> https_fn.Response: # RENAMED
             "lastUpdated": firestore.SERVER_TIMESTAMP,
             "metadata": metadata
         }
+        if expires_at is not None:
+            item_data["expiresAt"] = expires_at # Left unset otherwise, so the item stays out of expiry queries
 
-        item_ref = db.collection("items").add(item_data)
-        created_item_id = item_ref[1].id
+        item_ref = new_item_ref(household_id)
+        batch = db.batch()
+        batch.set(item_ref, item_data)
+        add_activity_writes(db, batch, household_id, item_activity_events(item_ref.id, None, item_data, auth_user_uid))
+        add_bin_index_writes(db, batch, household_id, [(item_ref.id, None, item_data)])
+        batch.commit()
+        note_household_write(household_id)
+        queue_entity_rename(ENTITY_ITEM_NAME, None, entity_item_name(item_data))
+        created_item_id = item_ref.id
 
-        new_item_doc = db.collection("items").document(created_item_id).get()
+        new_item_doc = item_ref.get()
         if not new_item_doc.exists:
             return https_fn.Response(status=500, response=json.dumps({"success": False, "error": {"code": "CREATE_FAILED", "message": "Failed to retrieve item after creation."}}), mimetype="application/json")
 
@@ -337,6 +1692,8 @@ def _create_item_logic(req: https_fn.Request) -> https_fn.Response: # RENAMED
         response_data["id"] = created_item_id
         if 'lastUpdated' in response_data and hasattr(response_data['lastUpdated'], 'isoformat'):
             response_data['lastUpdated'] = response_data['lastUpdated'].isoformat()
+        if 'expiresAt' in response_data and hasattr(response_data['expiresAt'], 'isoformat'):
+            response_data['expiresAt'] = response_data['expiresAt'].isoformat()
 
         return https_fn.Response(status=201, response=json.dumps({"success": True, "data": response_data, "error": None}), mimetype="application/json")
 
@@ -364,29 +1721,35 @@ def _update_item_logic(req: https_fn.Request, actual_item_id: str) -> https_fn.R
         if not data:
             return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "MISSING_BODY", "message": "Request body is missing or not JSON for update."}}), mimetype="application/json")
 
-        item_doc_ref = db.collection("items").document(actual_item_id)
-        item_doc = item_doc_ref.get()
+        db = get_db()
+        item_doc = get_item_snapshot(actual_item_id, get_household_id_for_request(req))
 
-        if not item_doc.exists:
+        if item_doc is None:
             return https_fn.Response(status=404, response=json.dumps({"success": False, "error": {"code": "ITEM_NOT_FOUND", "message": "Item to update not found."}}), mimetype="application/json")
 
         existing_item_data = item_doc.to_dict()
-        auth_user_uid = req.user["uid"]
-        user_profile = get_user_data_from_firestore(auth_user_uid)
+        auth_user_uid = current_user()["uid"]
 
         # Preliminary check for household and ownership (Firestore rules are primary)
-        if not user_profile or existing_item_data.get("householdId") != user_profile.get("householdId"):
+        if not user_in_household(req, existing_item_data.get("householdId")):
              return https_fn.Response(status=403, response=json.dumps({"success": False, "error": {"code": "FORBIDDEN", "message": "User cannot update item in this household."}}), mimetype="application/json")
         if existing_item_data.get("isPrivate") and existing_item_data.get("creatorUserId") != auth_user_uid:
             return https_fn.Response(status=403, response=json.dumps({"success": False, "error": {"code": "FORBIDDEN", "message": "User cannot update this private item."}}), mimetype="application/json")
         # If public, any household member can update as per tech doc (rules should enforce this)
 
         update_payload = {}
-        allowed_fields = ["name", "location", "status", "isPrivate", "metadata"]
+        allowed_fields = ["name", "location", "status", "isPrivate", "metadata", "expiresAt"]
         for field in allowed_fields:
             if field in data:
                 update_payload[field] = data[field]
 
+        if "expiresAt" in update_payload:
+            try:
+                expires_at = parse_expires_at(update_payload["expiresAt"])
+            except ValueError as e:
+                return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "INVALID_EXPIRES_AT", "message": str(e)}}), mimetype="application/json")
+            update_payload["expiresAt"] = expires_at if expires_at is not None else firestore.DELETE_FIELD
+
         if "status" in update_payload and update_payload["status"] not in ["STORED", "OUT"]:
             return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "INVALID_STATUS", "message": "'status' must be either 'STORED' or 'OUT'."}}), mimetype="application/json")
         if "isPrivate" in update_payload and not isinstance(update_payload["isPrivate"], bool):
@@ -419,13 +1782,23 @@ def _update_item_logic(req: https_fn.Request, actual_item_id: str) -> https_fn.R
 
         update_payload["lastUpdated"] = firestore.SERVER_TIMESTAMP
 
-        item_doc_ref.update(update_payload)
+        # Apply the update and its activity log entries atomically
+        batch = db.batch()
+        item_doc_ref = add_item_update(batch, item_doc, existing_item_data.get("householdId"), update_payload)
+        activity_events = item_activity_events(actual_item_id, existing_item_data, {**existing_item_data, **update_payload}, auth_user_uid)
+        add_activity_writes(db, batch, existing_item_data.get("householdId"), activity_events)
+        add_bin_index_writes(db, batch, existing_item_data.get("householdId"), [(actual_item_id, existing_item_data, {**existing_item_data, **update_payload})])
+        batch.commit()
+        note_household_write(existing_item_data.get("householdId"))
+        queue_entity_rename(ENTITY_ITEM_NAME, entity_item_name(existing_item_data), entity_item_name({**existing_item_data, **update_payload}))
 
         updated_item_doc = item_doc_ref.get() # Fetch after update
         response_data = updated_item_doc.to_dict()
         response_data["id"] = updated_item_doc.id
         if 'lastUpdated' in response_data and hasattr(response_data['lastUpdated'], 'isoformat'):
             response_data['lastUpdated'] = response_data['lastUpdated'].isoformat()
+        if 'expiresAt' in response_data and hasattr(response_data['expiresAt'], 'isoformat'):
+            response_data['expiresAt'] = response_data['expiresAt'].isoformat()
 
         return https_fn.Response(status=200, response=json.dumps({"success": True, "data": response_data, "error": None}), mimetype="application/json")
 
@@ -452,29 +1825,83 @@ def _delete_item_logic(req: https_fn.Request, actual_item_id: str) -> https_fn.R
 
     try:
         db = get_db()
-        item_doc_ref = db.collection("items").document(actual_item_id)
-        item_doc = item_doc_ref.get()
+        item_doc = get_item_snapshot(actual_item_id, get_household_id_for_request(req))
 
-        if not item_doc.exists:
+        if item_doc is None:
             return https_fn.Response(status=404, response=json.dumps({"success": False, "error": {"code": "ITEM_NOT_FOUND", "message": "Item to delete not found."}}), mimetype="application/json")
 
         existing_item_data = item_doc.to_dict()
-        auth_user_uid = req.user["uid"]
-        user_profile = get_user_data_from_firestore(auth_user_uid)
+        auth_user_uid = current_user()["uid"]
 
         # Preliminary check for household and ownership (Firestore rules are primary)
-        if not user_profile or existing_item_data.get("householdId") != user_profile.get("householdId"):
+        if not user_in_household(req, existing_item_data.get("householdId")):
              return https_fn.Response(status=403, response=json.dumps({"success": False, "error": {"code": "FORBIDDEN", "message": "User cannot delete item in this household."}}), mimetype="application/json")
         if existing_item_data.get("isPrivate") and existing_item_data.get("creatorUserId") != auth_user_uid:
             return https_fn.Response(status=403, response=json.dumps({"success": False, "error": {"code": "FORBIDDEN", "message": "User cannot delete this private item."}}), mimetype="application/json")
         # If public, any household member can delete as per tech doc (rules should enforce this)
 
-        item_doc_ref.delete()
+        batch = db.batch()
+        add_item_delete(batch, item_doc, existing_item_data.get("householdId"))
+        add_activity_writes(db, batch, existing_item_data.get("householdId"), item_activity_events(actual_item_id, existing_item_data, None, auth_user_uid))
+        add_bin_index_writes(db, batch, existing_item_data.get("householdId"), [(actual_item_id, existing_item_data, None)])
+        batch.commit()
+        note_household_write(existing_item_data.get("householdId"))
+        queue_entity_rename(ENTITY_ITEM_NAME, entity_item_name(existing_item_data), None)
+        release_item_photos(existing_item_data.get("householdId"), [existing_item_data.get("photo")])
         return https_fn.Response(status=200, response=json.dumps({"success": True, "data": {"message": f"Item {actual_item_id} deleted successfully."}}), mimetype="application/json")
 
     except Exception as e:
         return https_fn.Response(status=500, response=json.dumps({"success": False, "error": {"code": "INTERNAL_SERVER_ERROR", "message": str(e)}}), mimetype="application/json")
 
+COLUMNAR_ITEM_KEYS = ["id", "name", "roomIndex", "binNumber", "status", "creatorIndex", "isPrivate", "lastUpdated", "expiresAt", "metadata", "photo"]
+
+def encode_items_columnar(items: list, household_id: str | None) -> dict:
+    """Encodes a list of items as parallel value arrays.
+
+    Key names are sent once in "keys", and "columns" holds one array per key in the
+    same order. Room IDs and creator UIDs are interned into the "rooms" and "creators"
+    dictionaries and referenced by index. householdId is the same for every item, so
+    it is sent once. Decoded by decodeColumnarItems in frontend/src/api/items.ts.
+
+    Args:
+        items: Item dicts in the same shape as the default response.
+        household_id: The household all items belong to.
+
+    Returns:
+        A JSON-serializable dict.
+    """
+    room_indexes = {}
+    creator_indexes = {}
+    columns = [[] for _ in COLUMNAR_ITEM_KEYS]
+    ids, names, rooms, bins, statuses, creators, privates, updated, expiries, metadata, photos = columns
+
+    for item in items:
+        location = item.get("location") or {}
+        room_id = location.get("roomId")
+        creator_id = item.get("creatorUserId")
+        ids.append(item.get("id"))
+        names.append(item.get("name"))
+        rooms.append(room_indexes.setdefault(room_id, len(room_indexes)))
+        bins.append(location.get("binNumber"))
+        statuses.append(item.get("status"))
+        creators.append(creator_indexes.setdefault(creator_id, len(creator_indexes)))
+        privates.append(item.get("isPrivate", False))
+        updated.append(item.get("lastUpdated"))
+        expiries.append(item.get("expiresAt"))
+        metadata.append(item.get("metadata") or None)
+        photos.append(item.get("photo"))
+
+    return {
+        "format": "columnar",
+        "count": len(ids),
+        "householdId": household_id,
+        "rooms": list(room_indexes), # dicts keep insertion order, so position == index
+        "creators": list(creator_indexes),
+        "keys": COLUMNAR_ITEM_KEYS,
+        "columns": columns,
+    }
+
+
 # @https_fn.on_request() # DECORATOR REMOVED
 # @require_auth # DECORATOR REMOVED
 def _get_items_logic(req: https_fn.Request) -> https_fn.Response: # RENAMED from get_items
@@ -483,26 +1910,46 @@ def _get_items_logic(req: https_fn.Request) -> https_fn.Response: # RENAMED from
     Requires Authentication.
     Filters items based on the user's householdId and item's isPrivate status.
     Relies on Firestore security rules for fine-grained access control.
+    Pass ?format=columnar for the compact encoding produced by encode_items_columnar.
+    Pass ?expiringWithinDays=N for only the items expiring in the next N days (or
+    already expired), soonest first.
     """
     if req.method != "GET":
         return https_fn.Response(status=405, response=json.dumps({"success": False, "error": {"code": "METHOD_NOT_ALLOWED", "message": "Method not allowed"}}), mimetype="application/json")
 
+    response_format = req.args.get("format", "objects")
+    if response_format not in ("objects", "columnar"):
+        return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "INVALID_FORMAT", "message": "'format' must be either 'objects' or 'columnar'."}}), mimetype="application/json")
+
+    expires_before = None
+    if "expiringWithinDays" in req.args:
+        try:
+            expiring_within_days = int(req.args["expiringWithinDays"])
+        except ValueError:
+            expiring_within_days = -1
+        if not 0 <= expiring_within_days <= EXPIRY_MAX_WITHIN_DAYS:
+            return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "INVALID_PARAMETERS", "message": f"'expiringWithinDays' must be an integer between 0 and {EXPIRY_MAX_WITHIN_DAYS}."}}), mimetype="application/json")
+        expires_before = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=expiring_within_days)
+
     try:
-        auth_user_uid = req.user["uid"]
-        user_profile = get_user_data_from_firestore(auth_user_uid)
+        household_id = get_household_id_for_request(req)
 
-        if not user_profile or not user_profile.get("householdId"):
+        if not household_id:
              # This case might be handled by security rules, but an early check can be useful.
              # Or, if a user can exist without a household initially, they just won't see any items.
-            return https_fn.Response(status=200, response=json.dumps({"success": True, "data": [], "error": None}), mimetype="application/json")
+            empty_data = encode_items_columnar([], household_id) if response_format == "columnar" else []
+            return https_fn.Response(status=200, response=json.dumps({"success": True, "data": empty_data, "error": None}), mimetype="application/json")
+
+        # The replica holds whole households, so it only serves the unfiltered list
+        replica = get_fresh_replica(household_id) if expires_before is None else None
+        if replica is not None:
+            items_list = replica.items_list()
+            response_data = encode_items_columnar(items_list, household_id) if response_format == "columnar" else items_list
+            return https_fn.Response(status=200, response=json.dumps({"success": True, "data": response_data, "error": None}), mimetype="application/json")
 
-        household_id = user_profile["householdId"]
-        db = get_db()
-        items_query = db.collection("items")\
-            .where(filter=firestore.FieldFilter("householdId", "==", household_id))
         # Further filtering for isPrivate items would ideally be handled by Firestore security rules.
         # If we must do it here, it's less efficient as we fetch then filter in code:
-        # docs = items_query.stream()
+        # docs = stream_household_items(household_id)
         # accessible_items = []
         # for doc in docs:
         #     item = doc.to_dict()
@@ -512,10 +1959,10 @@ def _get_items_logic(req: https_fn.Request) -> https_fn.Response: # RENAMED from
         #         if 'lastUpdated' in item and hasattr(item['lastUpdated'], 'isoformat'):
         #             item['lastUpdated'] = item['lastUpdated'].isoformat()
         #         accessible_items.append(item)
-        # However, relying on security rules is better. The query above gets all household items.
+        # However, relying on security rules is better. The query below gets all household items.
         # The rules will then filter out private items not owned by the user during the read operation.
 
-        docs = items_query.stream()
+        docs = stream_household_items(household_id, expires_before=expires_before)
         items_list = []
         for doc in docs:
             item_data = doc.to_dict()
@@ -523,9 +1970,12 @@ def _get_items_logic(req: https_fn.Request) -> https_fn.Response: # RENAMED from
             # Ensure lastUpdated is JSON serializable
             if 'lastUpdated' in item_data and hasattr(item_data['lastUpdated'], 'isoformat'):
                 item_data['lastUpdated'] = item_data['lastUpdated'].isoformat()
+            if 'expiresAt' in item_data and hasattr(item_data['expiresAt'], 'isoformat'):
+                item_data['expiresAt'] = item_data['expiresAt'].isoformat()
             items_list.append(item_data)
 
-        return https_fn.Response(status=200, response=json.dumps({"success": True, "data": items_list, "error": None}), mimetype="application/json")
+        response_data = encode_items_columnar(items_list, household_id) if response_format == "columnar" else items_list
+        return https_fn.Response(status=200, response=json.dumps({"success": True, "data": response_data, "error": None}), mimetype="application/json")
 
     except Exception as e:
         return https_fn.Response(status=500, response=json.dumps({"success": False, "error": {"code": "INTERNAL_SERVER_ERROR", "message": str(e)}}), mimetype="application/json")
@@ -543,7 +1993,7 @@ def _get_profile_logic(req: https_fn.Request) -> https_fn.Response:
         )
 
     try:
-        auth_user_uid = req.user["uid"]
+        auth_user_uid = current_user()["uid"]
         user_profile = get_user_data_from_firestore(auth_user_uid)
 
         if not user_profile:
@@ -593,27 +2043,34 @@ def _get_item_logic(req: https_fn.Request, actual_item_id: str) -> https_fn.Resp
         return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "MISSING_ITEM_ID", "message": "Item ID is required."}}), mimetype="application/json")
 
     try:
-        db = get_db()
-        item_doc_ref = db.collection("items").document(actual_item_id)
-        item_doc = item_doc_ref.get()
+        household_id = get_household_id_for_request(req)
+        if not household_id:
+            # This should ideally be caught by Firestore rules if user has no householdId
+            return https_fn.Response(status=403, response=json.dumps({"success": False, "error": {"code": "FORBIDDEN", "message": "User not associated with a household."}}), mimetype="application/json")
+
+        # Items of a replicated household can be served from memory; anything else
+        # (including items from other households) goes through the Firestore checks below
+        replica = get_fresh_replica(household_id)
+        item_data = replica.get_item(actual_item_id) if replica is not None else None
+        if item_data is not None:
+            if item_data.get("isPrivate") and item_data.get("creatorUserId") != current_user()["uid"]:
+                return https_fn.Response(status=403, response=json.dumps({"success": False, "error": {"code": "FORBIDDEN", "message": "Access to this private item is restricted."}}), mimetype="application/json")
+            return https_fn.Response(status=200, response=json.dumps({"success": True, "data": item_data, "error": None}), mimetype="application/json")
+
+        item_doc = get_item_snapshot(actual_item_id, household_id)
 
-        if not item_doc.exists:
+        if item_doc is None:
             return https_fn.Response(status=404, response=json.dumps({"success": False, "error": {"code": "ITEM_NOT_FOUND", "message": "Item not found."}}), mimetype="application/json")
 
         item_data = item_doc.to_dict()
 
         # Security check based on tech doc (though Firestore rules should enforce this primarily)
-        auth_user_uid = req.user["uid"]
-        user_profile = get_user_data_from_firestore(auth_user_uid)
-
-        if not user_profile or not user_profile.get("householdId"):
-            # This should ideally be caught by Firestore rules if user has no householdId
-            return https_fn.Response(status=403, response=json.dumps({"success": False, "error": {"code": "FORBIDDEN", "message": "User not associated with a household."}}), mimetype="application/json")
+        auth_user_uid = current_user()["uid"]
 
         # If item is private, only creator can access.
         # If item is public, only members of the same household can access.
         # These checks are secondary to Firestore rules.
-        if item_data.get("householdId") != user_profile.get("householdId"):
+        if not user_in_household(req, item_data.get("householdId")):
             return https_fn.Response(status=403, response=json.dumps({"success": False, "error": {"code": "FORBIDDEN", "message": "Access to this item is restricted (household mismatch)."}}), mimetype="application/json")
 
         if item_data.get("isPrivate") and item_data.get("creatorUserId") != auth_user_uid:
@@ -622,30 +2079,682 @@ def _get_item_logic(req: https_fn.Request, actual_item_id: str) -> https_fn.Resp
         item_data["id"] = item_doc.id
         if 'lastUpdated' in item_data and hasattr(item_data['lastUpdated'], 'isoformat'):
             item_data['lastUpdated'] = item_data['lastUpdated'].isoformat()
+        if 'expiresAt' in item_data and hasattr(item_data['expiresAt'], 'isoformat'):
+            item_data['expiresAt'] = item_data['expiresAt'].isoformat()
 
         return https_fn.Response(status=200, response=json.dumps({"success": True, "data": item_data, "error": None}), mimetype="application/json")
 
     except Exception as e:
         return https_fn.Response(status=500, response=json.dumps({"success": False, "error": {"code": "INTERNAL_SERVER_ERROR", "message": str(e)}}), mimetype="application/json")
 
+BATCH_GET_MAX_IDS = 300
 
-# --- Household Management Logic ---
-def _create_household_logic(req: https_fn.Request) -> https_fn.Response:
-    """Creates a new household and assigns the authenticated user as the owner.
-    Updates the user's profile with the new householdId.
+def _batch_get_items_logic(req: https_fn.Request) -> https_fn.Response:
+    """Gets many items by ID in a single Firestore round trip.
+
+    Requires Authentication.
+    Expects a JSON body of the form {"ids": ["itemId1", "itemId2", ...]}.
+    Applies the same household and private-item checks as _get_item_logic, but the
+    user's profile is read only once. Items that don't exist or that the user may not
+    access are both reported in missingIds so existence isn't leaked.
     """
     if req.method != "POST":
-        return https_fn.Response(status=405, response=json.dumps({"success": False, "error": {"code": "METHOD_NOT_ALLOWED", "message": "Method not allowed."}}), mimetype="application/json")
+        return https_fn.Response(status=405, response=json.dumps({"success": False, "error": {"code": "METHOD_NOT_ALLOWED", "message": "Method not allowed"}}), mimetype="application/json")
 
-    auth_user_uid = req.user["uid"]
-    user_profile = get_user_data_from_firestore(auth_user_uid)
+    try:
+        data = req.get_json(silent=True)
+        item_ids = data.get("ids") if isinstance(data, dict) else None
 
-    if not user_profile:
-        # This should ideally not happen if require_auth is used and user exists in Auth but not Firestore
-        # Or if get_user_data_from_firestore failed for other reasons
-        return https_fn.Response(status=404, response=json.dumps({"success": False, "error": {"code": "USER_PROFILE_NOT_FOUND", "message": "User profile not found."}}), mimetype="application/json")
+        if not isinstance(item_ids, list) or not item_ids or not all(isinstance(item_id, str) and item_id and "/" not in item_id for item_id in item_ids):
+            return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "INVALID_IDS", "message": "'ids' must be a non-empty list of item ID strings."}}), mimetype="application/json")
 
-    if user_profile.get("householdId"):
+        item_ids = list(dict.fromkeys(item_ids)) # De-duplicate, preserving request order
+        if len(item_ids) > BATCH_GET_MAX_IDS:
+            return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "TOO_MANY_IDS", "message": f"At most {BATCH_GET_MAX_IDS} item IDs can be requested at once."}}), mimetype="application/json")
+
+        auth_user_uid = current_user()["uid"]
+        household_id = get_household_id_for_request(req)
+
+        if not household_id:
+            return https_fn.Response(status=403, response=json.dumps({"success": False, "error": {"code": "FORBIDDEN", "message": "User not associated with a household."}}), mimetype="application/json")
+
+        item_docs = list(get_item_snapshots(item_ids, household_id).values())
+
+        # Items from another household may just mean the household claim is stale
+        if any(item_doc.get("householdId") != household_id for item_doc in item_docs):
+            household_id = get_household_id_for_request(req, verify=True)
+            if not household_id:
+                return https_fn.Response(status=403, response=json.dumps({"success": False, "error": {"code": "FORBIDDEN", "message": "User not associated with a household."}}), mimetype="application/json")
+
+        accessible_items = {}
+        for item_doc in item_docs:
+            item_data = item_doc.to_dict()
+            if item_data.get("householdId") != household_id:
+                continue
+            if item_data.get("isPrivate") and item_data.get("creatorUserId") != auth_user_uid:
+                continue
+            item_data["id"] = item_doc.id
+            if 'lastUpdated' in item_data and hasattr(item_data['lastUpdated'], 'isoformat'):
+                item_data['lastUpdated'] = item_data['lastUpdated'].isoformat()
+            if 'expiresAt' in item_data and hasattr(item_data['expiresAt'], 'isoformat'):
+                item_data['expiresAt'] = item_data['expiresAt'].isoformat()
+            accessible_items[item_doc.id] = item_data
+
+        # get_all doesn't guarantee ordering, so rebuild it from the request
+        items_list = [accessible_items[item_id] for item_id in item_ids if item_id in accessible_items]
+        missing_ids = [item_id for item_id in item_ids if item_id not in accessible_items]
+
+        return https_fn.Response(status=200, response=json.dumps({"success": True, "data": {"items": items_list, "missingIds": missing_ids}, "error": None}), mimetype="application/json")
+
+    except Exception as e:
+        return https_fn.Response(status=500, response=json.dumps({"success": False, "error": {"code": "INTERNAL_SERVER_ERROR", "message": str(e)}}), mimetype="application/json")
+
+
+BATCH_UPDATE_MAX_OPERATIONS = 1000
+FIRESTORE_BATCH_LIMIT = 500 # Max writes per Firestore batch commit
+BATCH_COMMIT_WORKERS = 4
+ROOM_DELETE_CHUNK_SIZE = 120 # Each item is up to 2 deletes (both layouts) and 2 activity writes, plus the rollup shards
+BATCH_UPDATE_CHUNK_SIZE = 70 # Each operation is up to 2 item writes (a dual-layout move), 3 activity writes and 2 bin index writes, plus the rollup shards
+BULK_IMPORT_CHUNK_SIZE = 120 # Each item is 1 item write, 2 activity writes and at most 1 bin index write, plus the rollup shards
+
+def _commit_in_chunks(db, writes: list, chunk_size: int = FIRESTORE_BATCH_LIMIT, on_chunk=None) -> list:
+    """Commits writes in parallel batches of at most chunk_size.
+
+    Args:
+        db: The Firestore client.
+        writes: A list of (key, apply) tuples, where apply(batch) adds one write to a batch.
+        chunk_size: Writes per batch. Lower it if on_chunk adds writes of its own.
+        on_chunk: Optional callable(batch, keys) that adds extra writes to each batch
+            before it is committed, so they succeed or fail together with the chunk.
+
+    Returns:
+        The keys whose batch failed to commit, in the order given.
+    """
+    chunks = [writes[i:i + chunk_size] for i in range(0, len(writes), chunk_size)]
+
+    def commit_chunk(chunk):
+        batch = db.batch()
+        for _, apply in chunk:
+            apply(batch)
+        if on_chunk is not None:
+            on_chunk(batch, [key for key, _ in chunk])
+        batch.commit()
+
+    failed_keys = []
+    with ThreadPoolExecutor(max_workers=min(BATCH_COMMIT_WORKERS, max(1, len(chunks)))) as executor:
+        # Each worker runs in a copy of this context so its writes are metered against the request
+        futures = [(chunk, executor.submit(contextvars.copy_context().run, commit_chunk, chunk)) for chunk in chunks]
+        for chunk, future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Batch commit failed for {len(chunk)} writes: {e}")
+                failed_keys.extend(key for key, _ in chunk)
+    return failed_keys
+
+
+def _validate_item_update(update_payload: dict, rooms_map: dict) -> tuple[str, str] | None:
+    """Validates item update fields against a pre-fetched room map.
+
+    Args:
+        update_payload: The fields to update (subset of name, location, status, isPrivate, metadata, expiresAt).
+        rooms_map: A dict of roomId -> room data for the item's household.
+
+    Returns:
+        An (error_code, message) tuple if invalid, otherwise None.
+    """
+    if "name" in update_payload and (not isinstance(update_payload["name"], str) or not update_payload["name"].strip()):
+        return ("INVALID_NAME", "'name' must be a non-empty string.")
+    if "status" in update_payload and update_payload["status"] not in ["STORED", "OUT"]:
+        return ("INVALID_STATUS", "'status' must be either 'STORED' or 'OUT'.")
+    if "isPrivate" in update_payload and not isinstance(update_payload["isPrivate"], bool):
+        return ("INVALID_ISPRIVATE", "'isPrivate' must be a boolean.")
+    if "expiresAt" in update_payload:
+        try:
+            parse_expires_at(update_payload["expiresAt"])
+        except ValueError as e:
+            return ("INVALID_EXPIRES_AT", str(e))
+    if "location" in update_payload:
+        location = update_payload["location"]
+        if not isinstance(location, dict) or "roomId" not in location or "binNumber" not in location:
+            return ("INVALID_LOCATION_FORMAT", "Location must be an object with 'roomId' and 'binNumber'.")
+        bin_number = location["binNumber"]
+        if not isinstance(bin_number, int) or bin_number <= 0:
+            return ("INVALID_BIN_NUMBER", "binNumber must be a positive integer.")
+        room_data = rooms_map.get(location["roomId"])
+        if room_data is None:
+            return ("ROOM_NOT_FOUND", "The specified room does not exist in this household.")
+        if bin_number > room_data.get("nBins", 0):
+            return ("BIN_NUMBER_OUT_OF_RANGE", f"binNumber exceeds the number of bins available in this room ({room_data.get('nBins', 0)}).")
+    return None
+
+
+def _batch_update_items_logic(req: https_fn.Request) -> https_fn.Response:
+    """Applies many item updates and deletes in one request.
+
+    Requires Authentication.
+    Expects a JSON body of the form
+    {"operations": [{"id": "itemId", "update": {"location": {...}, "status": "OUT"}},
+                    {"id": "itemId2", "delete": true}, ...]}.
+    Items are read with one db.get_all, the user's profile and the household's rooms
+    are read once, and writes are committed in parallel chunked batches.
+    Returns a per-item outcome; one invalid operation does not block the others.
+    """
+    if req.method != "POST":
+        return https_fn.Response(status=405, response=json.dumps({"success": False, "error": {"code": "METHOD_NOT_ALLOWED", "message": "Method not allowed"}}), mimetype="application/json")
+
+    try:
+        data = req.get_json(silent=True)
+        operations = data.get("operations") if isinstance(data, dict) else None
+
+        if not isinstance(operations, list) or not operations:
+            return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "INVALID_OPERATIONS", "message": "'operations' must be a non-empty list."}}), mimetype="application/json")
+        if len(operations) > BATCH_UPDATE_MAX_OPERATIONS:
+            return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "TOO_MANY_OPERATIONS", "message": f"At most {BATCH_UPDATE_MAX_OPERATIONS} operations can be applied at once."}}), mimetype="application/json")
+
+        auth_user_uid = current_user()["uid"]
+        household_id = get_household_id_for_request(req)
+
+        if not household_id:
+            return https_fn.Response(status=403, response=json.dumps({"success": False, "error": {"code": "FORBIDDEN", "message": "User not associated with a household."}}), mimetype="application/json")
+
+        allowed_fields = ["name", "location", "status", "isPrivate", "metadata", "expiresAt"]
+
+        # Validate operation shapes before touching Firestore
+        results = [None] * len(operations)
+        pending = [] # (index, item_id, update_payload or None for delete)
+        seen_ids = set()
+        for index, operation in enumerate(operations):
+            item_id = operation.get("id") if isinstance(operation, dict) else None
+            if not isinstance(item_id, str) or not item_id or "/" in item_id:
+                results[index] = {"id": item_id if isinstance(item_id, str) else None, "status": "ERROR", "error": {"code": "MISSING_ITEM_ID", "message": "Each operation needs a valid 'id'."}}
+                continue
+            if item_id in seen_ids:
+                results[index] = {"id": item_id, "status": "ERROR", "error": {"code": "DUPLICATE_ITEM_ID", "message": "An item may appear in only one operation."}}
+                continue
+            seen_ids.add(item_id)
+
+            if operation.get("delete") is True:
+                pending.append((index, item_id, None))
+                continue
+
+            update = operation.get("update")
+            update_payload = {field: update[field] for field in allowed_fields if field in update} if isinstance(update, dict) else {}
+            if not update_payload:
+                results[index] = {"id": item_id, "status": "ERROR", "error": {"code": "NO_UPDATE_FIELDS", "message": "Operation must set 'delete': true or provide 'update' fields."}}
+                continue
+            pending.append((index, item_id, update_payload))
+
+        db = get_db()
+        items_by_id = {}
+        if pending:
+            items_by_id = get_item_snapshots([item_id for _, item_id, _ in pending], household_id)
+
+            # Items from another household may just mean the household claim is stale
+            if any(doc.get("householdId") != household_id for doc in items_by_id.values()):
+                household_id = get_household_id_for_request(req, verify=True)
+                if not household_id:
+                    return https_fn.Response(status=403, response=json.dumps({"success": False, "error": {"code": "FORBIDDEN", "message": "User not associated with a household."}}), mimetype="application/json")
+
+        rooms_map = {}
+        if any(payload and "location" in payload for _, _, payload in pending):
+            rooms_stream = db.collection("households").document(household_id).collection("rooms").stream()
+            rooms_map = {room.id: room.to_dict() for room in rooms_stream}
+
+        writes = []
+        activity_by_index = {}
+        item_changes_by_index = {}
+        for index, item_id, update_payload in pending:
+            item_doc = items_by_id.get(item_id)
+            if item_doc is None:
+                results[index] = {"id": item_id, "status": "ERROR", "error": {"code": "ITEM_NOT_FOUND", "message": "Item not found."}}
+                continue
+            existing_item_data = item_doc.to_dict()
+            if existing_item_data.get("householdId") != household_id:
+                results[index] = {"id": item_id, "status": "ERROR", "error": {"code": "FORBIDDEN", "message": "User cannot modify item in this household."}}
+                continue
+            if existing_item_data.get("isPrivate") and existing_item_data.get("creatorUserId") != auth_user_uid:
+                results[index] = {"id": item_id, "status": "ERROR", "error": {"code": "FORBIDDEN", "message": "User cannot modify this private item."}}
+                continue
+
+            if update_payload is None:
+                writes.append((index, lambda batch, doc=item_doc: add_item_delete(batch, doc, household_id)))
+                activity_by_index[index] = item_activity_events(item_id, existing_item_data, None, auth_user_uid)
+                item_changes_by_index[index] = (item_id, existing_item_data, None)
+                results[index] = {"id": item_id, "status": "DELETED", "error": None}
+                continue
+
+            validation_error = _validate_item_update(update_payload, rooms_map)
+            if validation_error:
+                results[index] = {"id": item_id, "status": "ERROR", "error": {"code": validation_error[0], "message": validation_error[1]}}
+                continue
+
+            if "expiresAt" in update_payload:
+                expires_at = parse_expires_at(update_payload["expiresAt"])
+                update_payload["expiresAt"] = expires_at if expires_at is not None else firestore.DELETE_FIELD
+            update_payload["lastUpdated"] = firestore.SERVER_TIMESTAMP
+            writes.append((index, lambda batch, doc=item_doc, payload=update_payload: add_item_update(batch, doc, household_id, payload)))
+            activity_by_index[index] = item_activity_events(item_id, existing_item_data, {**existing_item_data, **update_payload}, auth_user_uid)
+            item_changes_by_index[index] = (item_id, existing_item_data, {**existing_item_data, **update_payload})
+            results[index] = {"id": item_id, "status": "UPDATED", "error": None}
+
+        def add_chunk_activity(batch, indexes):
+            chunk_events = [event for index in indexes for event in activity_by_index.get(index, [])]
+            add_activity_writes(db, batch, household_id, chunk_events)
+            add_bin_index_writes(db, batch, household_id, [item_changes_by_index[index] for index in indexes if index in item_changes_by_index])
+
+        failed_indexes = _commit_in_chunks(db, writes, chunk_size=BATCH_UPDATE_CHUNK_SIZE, on_chunk=add_chunk_activity)
+        if writes:
+            note_household_write(household_id)
+        failed_index_set = set(failed_indexes)
+        for index, (_, before, after) in item_changes_by_index.items():
+            if index not in failed_index_set:
+                queue_entity_rename(ENTITY_ITEM_NAME, entity_item_name(before), entity_item_name(after))
+        release_item_photos(household_id, [before.get("photo") for index, (_, before, after) in item_changes_by_index.items() if after is None and index not in failed_index_set])
+        for index in failed_indexes:
+            results[index] = {"id": results[index]["id"], "status": "ERROR", "error": {"code": "COMMIT_FAILED", "message": "The write could not be committed. Please retry."}}
+
+        summary = {
+            "updated": sum(1 for result in results if result["status"] == "UPDATED"),
+            "deleted": sum(1 for result in results if result["status"] == "DELETED"),
+            "failed": sum(1 for result in results if result["status"] == "ERROR"),
+        }
+        return https_fn.Response(status=200, response=json.dumps({"success": True, "data": {"results": results, "summary": summary}, "error": None}), mimetype="application/json")
+
+    except Exception as e:
+        return https_fn.Response(status=500, response=json.dumps({"success": False, "error": {"code": "INTERNAL_SERVER_ERROR", "message": str(e)}}), mimetype="application/json")
+
+
+
+# --- Item Photos ---
+# Uploads are streamed from the request body into storage in fixed-size chunks and
+# hashed on the way. Each distinct photo is stored once per household, under its
+# SHA-256, so re-uploading the same photo costs no extra storage or rendering.
+# Thumbnail and preview JPEGs are rendered within the upload request from the
+# stored original (the body is never held in memory whole), while the instance
+# still has its CPU, so the item's photo is READY (or FAILED) by the time
+# the response is sent. Items left PROCESSING by uploads from before that (or by an
+# instance that died mid-request) are re-rendered by photo_processing_sweep.
+# A photo's objects are deleted once no item in its household references it.
+# By default photos go to the project's Cloud Storage bucket, which honors
+# STORAGE_EMULATOR_HOST. Set PHOTO_STORAGE_DIR to use a local directory instead.
+try:
+    from PIL import Image, ImageOps
+except ImportError: # Optional: without Pillow, photos are stored but no smaller sizes are rendered
+    Image = None
+
+PHOTO_STORAGE_DIR = os.environ.get("PHOTO_STORAGE_DIR")
+PHOTO_MAX_BYTES = 10 * 1024 * 1024
+PHOTO_STREAM_CHUNK_BYTES = 256 * 1024 # Cloud Storage resumable uploads need multiples of 256 KiB
+PHOTO_CONTENT_TYPES = {"image/jpeg": "jpg", "image/png": "png", "image/webp": "webp"}
+PHOTO_SIZES = {"thumbnail": 200, "preview": 1024} # Longest side in pixels
+PHOTO_JPEG_QUALITY = 85
+PHOTO_STALE_PROCESSING_MINUTES = 15
+PHOTO_SWEEP_MAX_ITEMS = 100 # Renders per sweep run
+
+
+class _LocalPhotoStore:
+    """Photo storage in a local directory, standing in for the bucket in development and tests."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, path: str) -> str:
+        full_path = os.path.join(self.root, *path.split("/"))
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        return full_path
+
+    def open_write(self, path: str, content_type: str):
+        return open(self._path(path), "wb")
+
+    def write(self, path: str, data: bytes, content_type: str) -> None:
+        with self.open_write(path, content_type) as out:
+            out.write(data)
+
+    def open_read(self, path: str):
+        return open(self._path(path), "rb")
+
+    def exists(self, path: str) -> bool:
+        return os.path.exists(self._path(path))
+
+    def rename(self, source_path: str, target_path: str) -> None:
+        os.replace(self._path(source_path), self._path(target_path))
+
+    def delete(self, path: str) -> None:
+        try:
+            os.remove(self._path(path))
+        except FileNotFoundError:
+            pass
+
+
+class _BucketPhotoStore:
+    """Photo storage in the project's default Cloud Storage bucket."""
+
+    def __init__(self):
+        from firebase_admin import storage
+        self.bucket = storage.bucket()
+
+    def open_write(self, path: str, content_type: str):
+        # Uploads one chunk at a time instead of buffering the whole object
+        return self.bucket.blob(path).open("wb", chunk_size=PHOTO_STREAM_CHUNK_BYTES, content_type=content_type)
+
+    def write(self, path: str, data: bytes, content_type: str) -> None:
+        self.bucket.blob(path).upload_from_string(data, content_type=content_type)
+
+    def open_read(self, path: str):
+        return self.bucket.blob(path).open("rb", chunk_size=PHOTO_STREAM_CHUNK_BYTES)
+
+    def exists(self, path: str) -> bool:
+        return self.bucket.blob(path).exists()
+
+    def rename(self, source_path: str, target_path: str) -> None:
+        self.bucket.rename_blob(self.bucket.blob(source_path), target_path)
+
+    def delete(self, path: str) -> None:
+        from google.api_core.exceptions import NotFound
+        try:
+            self.bucket.blob(path).delete()
+        except NotFound:
+            pass
+
+
+_photo_lock = threading.Lock()
+_photo_store = None
+
+
+def get_photo_store():
+    """Returns the photo store, creating it on first use."""
+    global _photo_store
+    with _photo_lock:
+        if _photo_store is None:
+            _photo_store = _LocalPhotoStore(PHOTO_STORAGE_DIR) if PHOTO_STORAGE_DIR else _BucketPhotoStore()
+        return _photo_store
+
+
+def _photo_prefix(household_id: str, digest: str) -> str:
+    return f"households/{household_id}/photos/{digest}"
+
+
+def _render_photo_sizes(source, sizes: dict) -> dict:
+    """Renders a JPEG no larger than each of sizes' longest sides.
+
+    Args:
+        source: A seekable binary file holding the image.
+        sizes: Size name -> longest side in pixels.
+
+    Returns:
+        A dict of size name -> JPEG bytes.
+    """
+    rendered = {}
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image).convert("RGB") # Bake in camera rotation; JPEG has no alpha
+        for name, longest_side in sizes.items():
+            resized = image.copy()
+            resized.thumbnail((longest_side, longest_side))
+            output = io.BytesIO()
+            resized.save(output, "JPEG", quality=PHOTO_JPEG_QUALITY, optimize=True)
+            rendered[name] = output.getvalue()
+    return rendered
+
+
+def _set_item_photo(item_id: str, household_id: str, photo: dict, expected_hash: str | None = None) -> bool:
+    """Writes photo to an item, optionally only if the item still references expected_hash.
+
+    Returns:
+        False if the item no longer exists or now references a different photo.
+    """
+    db = get_db()
+    item_doc = get_item_snapshot(item_id, household_id)
+    if item_doc is None:
+        return False
+    if expected_hash is not None and (item_doc.get("photo") or {}).get("hash") != expected_hash:
+        return False
+    batch = db.batch()
+    add_item_update(batch, item_doc, household_id, {"photo": photo, "lastUpdated": firestore.SERVER_TIMESTAMP})
+    batch.commit()
+    note_household_write(household_id)
+    return True
+
+
+def _render_photo(household_id: str, photo: dict) -> dict:
+    """Renders and stores the smaller sizes of a stored photo, reading its original from the store.
+
+    Returns:
+        photo marked READY with its sizes, or FAILED if the image couldn't be read or rendered.
+    """
+    prefix = _photo_prefix(household_id, photo["hash"])
+    store = get_photo_store()
+    try:
+        with store.open_read(photo["original"]) as original:
+            rendered = _render_photo_sizes(original, PHOTO_SIZES)
+        for name, jpeg in rendered.items():
+            store.write(f"{prefix}/{name}.jpg", jpeg, "image/jpeg")
+        return {**photo, "status": "READY", "sizes": {name: f"{prefix}/{name}.jpg" for name in rendered}}
+    except Exception as e:
+        print(f"Failed to render photo {prefix}: {e}")
+        return {**photo, "status": "FAILED"}
+
+
+def _photo_in_use(household_id: str, digest: str) -> bool:
+    """Checks whether any item in the household, in either layout, references the photo."""
+    query = get_db().collection_group("items")\
+        .where(filter=firestore.FieldFilter("householdId", "==", household_id))\
+        .where(filter=firestore.FieldFilter("photo.hash", "==", digest))\
+        .limit(1)
+    return any(True for _ in query.stream())
+
+
+def release_item_photos(household_id: str, photos: list) -> int:
+    """Deletes the stored objects of photos that no item in the household references any more.
+
+    Call after the items referencing photos were deleted or given another photo.
+    Best-effort: a failure leaves the objects in place and is only logged.
+
+    Returns:
+        The number of photos deleted.
+    """
+    photos_by_hash = {photo["hash"]: photo for photo in photos if photo and photo.get("hash")}
+    store = get_photo_store() if photos_by_hash else None
+    released = 0
+    for photo in photos_by_hash.values():
+        try:
+            if _photo_in_use(household_id, photo["hash"]):
+                continue
+            prefix = _photo_prefix(household_id, photo["hash"])
+            for path in {photo["original"], *(f"{prefix}/{name}.jpg" for name in PHOTO_SIZES)}:
+                store.delete(path)
+            released += 1
+        except Exception as e:
+            print(f"Failed to delete photo {photo['hash']} of household {household_id}: {e}")
+    return released
+
+
+def sweep_stale_photos(now: datetime.datetime | None = None) -> dict:
+    """Re-renders photos left PROCESSING for over PHOTO_STALE_PROCESSING_MINUTES.
+
+    Handles at most PHOTO_SWEEP_MAX_ITEMS items per run; the rest wait for the next.
+
+    Returns:
+        A summary dict with the number of items found and marked READY or FAILED.
+    """
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    cutoff = (now - datetime.timedelta(minutes=PHOTO_STALE_PROCESSING_MINUTES)).isoformat()
+    query = get_db().collection_group("items")\
+        .where(filter=firestore.FieldFilter("photo.status", "==", "PROCESSING"))\
+        .where(filter=firestore.FieldFilter("photo.uploadedAt", "<", cutoff))\
+        .limit(PHOTO_SWEEP_MAX_ITEMS)
+    summary = {"stale": 0, "READY": 0, "FAILED": 0}
+    rendered = {} # (householdId, hash) -> photo, so items sharing a photo render it once
+    for item_doc in query.stream():
+        item_data = item_doc.to_dict()
+        household_id = item_data.get("householdId")
+        photo = item_data["photo"]
+        summary["stale"] += 1
+        key = (household_id, photo["hash"])
+        if key not in rendered:
+            rendered[key] = _render_photo(household_id, photo)
+        try:
+            if _set_item_photo(item_doc.id, household_id, rendered[key], expected_hash=photo["hash"]):
+                summary[rendered[key]["status"]] += 1
+        except Exception as e:
+            print(f"Failed to update photo status of item {item_doc.id}: {e}")
+    return summary
+
+
+def _get_photo_item(req: https_fn.Request, actual_item_id: str, household_id: str | None):
+    """Loads an item for a photo request.
+
+    Returns:
+        (item_doc, None) if the user may access the item, otherwise (None, error response).
+    """
+    if not household_id:
+        return None, https_fn.Response(status=403, response=json.dumps({"success": False, "error": {"code": "FORBIDDEN", "message": "User not associated with a household."}}), mimetype="application/json")
+    item_doc = get_item_snapshot(actual_item_id, household_id)
+    if item_doc is None:
+        return None, https_fn.Response(status=404, response=json.dumps({"success": False, "error": {"code": "ITEM_NOT_FOUND", "message": "Item not found."}}), mimetype="application/json")
+    item_data = item_doc.to_dict()
+    if not user_in_household(req, item_data.get("householdId")):
+        return None, https_fn.Response(status=403, response=json.dumps({"success": False, "error": {"code": "FORBIDDEN", "message": "Access to this item is restricted (household mismatch)."}}), mimetype="application/json")
+    if item_data.get("isPrivate") and item_data.get("creatorUserId") != current_user()["uid"]:
+        return None, https_fn.Response(status=403, response=json.dumps({"success": False, "error": {"code": "FORBIDDEN", "message": "Access to this private item is restricted."}}), mimetype="application/json")
+    return item_doc, None
+
+
+def _upload_item_photo_logic(req: https_fn.Request, actual_item_id: str) -> https_fn.Response:
+    """Sets an item's photo from the raw request body.
+
+    Requires Authentication. The body is the image itself, with a Content-Type of
+    image/jpeg, image/png or image/webp, up to PHOTO_MAX_BYTES. The thumbnail and
+    preview sizes are rendered before responding, unless this photo was already
+    uploaded to the household. The previous photo is deleted if nothing else uses it.
+    """
+    if req.method != "PUT":
+        return https_fn.Response(status=405, response=json.dumps({"success": False, "error": {"code": "METHOD_NOT_ALLOWED", "message": "Method not allowed"}}), mimetype="application/json")
+
+    content_type = (req.mimetype or "").lower()
+    if content_type not in PHOTO_CONTENT_TYPES:
+        return https_fn.Response(status=415, response=json.dumps({"success": False, "error": {"code": "UNSUPPORTED_MEDIA_TYPE", "message": f"Content-Type must be one of: {', '.join(PHOTO_CONTENT_TYPES)}."}}), mimetype="application/json")
+    if req.content_length is not None and req.content_length > PHOTO_MAX_BYTES:
+        return https_fn.Response(status=413, response=json.dumps({"success": False, "error": {"code": "PHOTO_TOO_LARGE", "message": f"Photos are limited to {PHOTO_MAX_BYTES // (1024 * 1024)} MB."}}), mimetype="application/json")
+
+    try:
+        household_id = get_household_id_for_request(req)
+        item_doc, error_response = _get_photo_item(req, actual_item_id, household_id)
+        if error_response is not None:
+            return error_response
+
+        store = get_photo_store()
+        upload_path = f"households/{household_id}/photos/uploads/{os.urandom(16).hex()}"
+        hasher = hashlib.sha256()
+        size = 0
+        with store.open_write(upload_path, content_type) as upload:
+            while size <= PHOTO_MAX_BYTES:
+                chunk = req.stream.read(PHOTO_STREAM_CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                hasher.update(chunk)
+                upload.write(chunk)
+        if size > PHOTO_MAX_BYTES or size == 0:
+            # Content-Length can be absent (chunked uploads), so the limit is enforced while streaming
+            store.delete(upload_path)
+            if size == 0:
+                return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "EMPTY_PHOTO", "message": "Request body is empty."}}), mimetype="application/json")
+            return https_fn.Response(status=413, response=json.dumps({"success": False, "error": {"code": "PHOTO_TOO_LARGE", "message": f"Photos are limited to {PHOTO_MAX_BYTES // (1024 * 1024)} MB."}}), mimetype="application/json")
+
+        digest = hasher.hexdigest()
+        prefix = _photo_prefix(household_id, digest)
+        original_path = f"{prefix}/original.{PHOTO_CONTENT_TYPES[content_type]}"
+        if store.exists(original_path):
+            store.delete(upload_path) # Identical photo already stored for this household
+        else:
+            store.rename(upload_path, original_path)
+
+        photo = {
+            "hash": digest,
+            "contentType": content_type,
+            "size": size,
+            "original": original_path,
+            "sizes": {},
+            "status": "PROCESSING",
+            "uploadedAt": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        }
+        if Image is None:
+            photo["status"] = "READY"
+        elif all(store.exists(f"{prefix}/{name}.jpg") for name in PHOTO_SIZES):
+            photo["status"] = "READY"
+            photo["sizes"] = {name: f"{prefix}/{name}.jpg" for name in PHOTO_SIZES}
+        else:
+            photo = _render_photo(household_id, photo)
+
+        previous_photo = item_doc.to_dict().get("photo")
+        _set_item_photo(item_doc.id, household_id, photo)
+        if previous_photo and previous_photo.get("hash") != digest:
+            release_item_photos(household_id, [previous_photo])
+
+        return https_fn.Response(status=200, response=json.dumps({"success": True, "data": photo, "error": None}), mimetype="application/json")
+
+    except Exception as e:
+        return https_fn.Response(status=500, response=json.dumps({"success": False, "error": {"code": "INTERNAL_SERVER_ERROR", "message": str(e)}}), mimetype="application/json")
+
+
+def _get_item_photo_logic(req: https_fn.Request, actual_item_id: str) -> https_fn.Response:
+    """Streams an item's photo. ?size is thumbnail, preview or original (default).
+
+    Requires Authentication. Falls back to the original while the smaller sizes are
+    still rendering. Supports If-None-Match, with the photo's hash and size as ETag.
+    """
+    if req.method != "GET":
+        return https_fn.Response(status=405, response=json.dumps({"success": False, "error": {"code": "METHOD_NOT_ALLOWED", "message": "Method not allowed"}}), mimetype="application/json")
+
+    size_name = req.args.get("size", "original")
+    if size_name != "original" and size_name not in PHOTO_SIZES:
+        return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "INVALID_PARAMETERS", "message": f"'size' must be one of: original, {', '.join(PHOTO_SIZES)}."}}), mimetype="application/json")
+
+    try:
+        item_doc, error_response = _get_photo_item(req, actual_item_id, get_household_id_for_request(req))
+        if error_response is not None:
+            return error_response
+        photo = item_doc.to_dict().get("photo")
+        if not photo:
+            return https_fn.Response(status=404, response=json.dumps({"success": False, "error": {"code": "PHOTO_NOT_FOUND", "message": "Item has no photo."}}), mimetype="application/json")
+
+        path = photo.get("sizes", {}).get(size_name) or photo["original"]
+        mimetype = photo["contentType"] if path == photo["original"] else "image/jpeg"
+        etag = f"{photo['hash']}-{size_name if path != photo['original'] else 'original'}"
+        if etag in req.if_none_match:
+            return https_fn.Response(status=304, headers={"ETag": f'"{etag}"'})
+
+        photo_file = get_photo_store().open_read(path)
+
+        def stream_photo():
+            with photo_file:
+                while chunk := photo_file.read(PHOTO_STREAM_CHUNK_BYTES):
+                    yield chunk
+
+        return https_fn.Response(stream_photo(), status=200, mimetype=mimetype, headers={"ETag": f'"{etag}"', "Cache-Control": "private, max-age=3600"})
+
+    except Exception as e:
+        return https_fn.Response(status=500, response=json.dumps({"success": False, "error": {"code": "INTERNAL_SERVER_ERROR", "message": str(e)}}), mimetype="application/json")
+
+
+# --- Household Management Logic ---
+def _create_household_logic(req: https_fn.Request) -> https_fn.Response:
+    """Creates a new household and assigns the authenticated user as the owner.
+    Updates the user's profile with the new householdId.
+    """
+    if req.method != "POST":
+        return https_fn.Response(status=405, response=json.dumps({"success": False, "error": {"code": "METHOD_NOT_ALLOWED", "message": "Method not allowed."}}), mimetype="application/json")
+
+    auth_user_uid = current_user()["uid"]
+    user_profile = get_user_data_from_firestore(auth_user_uid)
+
+    if not user_profile:
+        # This should ideally not happen if require_auth is used and user exists in Auth but not Firestore
+        # Or if get_user_data_from_firestore failed for other reasons
+        return https_fn.Response(status=404, response=json.dumps({"success": False, "error": {"code": "USER_PROFILE_NOT_FOUND", "message": "User profile not found."}}), mimetype="application/json")
+
+    if user_profile.get("householdId"):
         return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "ALREADY_IN_HOUSEHOLD", "message": "User already belongs to a household."}}), mimetype="application/json")
 
     try:
@@ -677,6 +2786,9 @@ def _create_household_logic(req: https_fn.Request) -> https_fn.Response:
 
         batch.commit()
 
+        # Mirror membership into the ID token so later requests can skip the profile read
+        set_household_claim(auth_user_uid, new_household_ref.id)
+
         # Fetch the created household to return its data (including server-generated timestamp)
         created_household_doc = new_household_ref.get()
         response_data = created_household_doc.to_dict()
@@ -691,6 +2803,100 @@ def _create_household_logic(req: https_fn.Request) -> https_fn.Response:
         # print(f"Error creating household: {e}")
         return https_fn.Response(status=500, response=json.dumps({"success": False, "error": {"code": "INTERNAL_SERVER_ERROR", "message": str(e)}}), mimetype="application/json")
 
+BOOTSTRAP_MAX_ROOMS = 400 # Leaves headroom under FIRESTORE_BATCH_LIMIT for the household and user writes
+
+def _validate_rooms_payload(rooms) -> tuple[str, str] | None:
+    """Validates a list of {"name", "nBins"} room definitions.
+
+    Returns:
+        An (error_code, message) tuple if invalid, otherwise None.
+    """
+    if not isinstance(rooms, list):
+        return ("INVALID_ROOMS", "'rooms' must be a list of {name, nBins} objects.")
+    if len(rooms) > BOOTSTRAP_MAX_ROOMS:
+        return ("TOO_MANY_ROOMS", f"At most {BOOTSTRAP_MAX_ROOMS} rooms can be created at once.")
+    for room in rooms:
+        if not isinstance(room, dict) or not isinstance(room.get("name"), str) or not room["name"].strip():
+            return ("MISSING_FIELDS", "Each room requires a non-empty 'name' (string).")
+        n_bins = room.get("nBins")
+        if not isinstance(n_bins, int) or isinstance(n_bins, bool) or n_bins <= 0:
+            return ("INVALID_NBINS", "Each room requires 'nBins' (positive integer).")
+    return None
+
+
+def _bootstrap_household_logic(req: https_fn.Request) -> https_fn.Response:
+    """Creates a household and all of its rooms in a single atomic batch.
+
+    Expects a JSON body of the form {"name": "My Home", "rooms": [{"name": "Garage", "nBins": 16}, ...]}.
+    Like _create_household_logic, the authenticated user becomes the owner and their
+    profile's householdId is updated. Nothing is re-read after the commit; the
+    household's created timestamp is taken from the commit's write result.
+    """
+    if req.method != "POST":
+        return https_fn.Response(status=405, response=json.dumps({"success": False, "error": {"code": "METHOD_NOT_ALLOWED", "message": "Method not allowed."}}), mimetype="application/json")
+
+    auth_user_uid = current_user()["uid"]
+
+    # A household claim already proves membership without a read
+    if current_user().get(HOUSEHOLD_CLAIM):
+        return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "ALREADY_IN_HOUSEHOLD", "message": "User already belongs to a household."}}), mimetype="application/json")
+
+    user_profile = get_user_data_from_firestore(auth_user_uid)
+
+    if not user_profile:
+        return https_fn.Response(status=404, response=json.dumps({"success": False, "error": {"code": "USER_PROFILE_NOT_FOUND", "message": "User profile not found."}}), mimetype="application/json")
+
+    if user_profile.get("householdId"):
+        return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "ALREADY_IN_HOUSEHOLD", "message": "User already belongs to a household."}}), mimetype="application/json")
+
+    try:
+        data = req.get_json(silent=True)
+        if not isinstance(data, dict) or not isinstance(data.get("name"), str) or not data["name"].strip():
+            return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "MISSING_HOUSEHOLD_NAME", "message": "Household name is required."}}), mimetype="application/json")
+
+        rooms = data.get("rooms", [])
+        validation_error = _validate_rooms_payload(rooms)
+        if validation_error:
+            return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": validation_error[0], "message": validation_error[1]}}), mimetype="application/json")
+
+        household_data = {
+            "name": data["name"].strip(),
+            "ownerUserId": auth_user_uid,
+            "memberUserIds": [auth_user_uid],
+            "created": firestore.SERVER_TIMESTAMP
+        }
+        db = get_db()
+        batch = db.batch()
+
+        new_household_ref = db.collection("households").document()
+        batch.set(new_household_ref, household_data)
+
+        user_ref = db.collection("users").document(auth_user_uid)
+        batch.update(user_ref, {"householdId": new_household_ref.id})
+
+        created_rooms = []
+        rooms_ref = new_household_ref.collection("rooms")
+        for room in rooms:
+            room_data = {"name": room["name"].strip(), ENTITY_NAME_KEY: entity_name_key(room["name"]), "nBins": room["nBins"]}
+            room_ref = rooms_ref.document()
+            batch.set(room_ref, room_data)
+            created_rooms.append({**room_data, "id": room_ref.id})
+
+        write_results = batch.commit()
+
+        set_household_claim(auth_user_uid, new_household_ref.id)
+        for room in created_rooms:
+            queue_entity_rename(ENTITY_ROOM_NAME, None, room["name"])
+
+        response_data = {**household_data, "id": new_household_ref.id, "rooms": created_rooms}
+        response_data["created"] = write_results[0].update_time.isoformat() if write_results else None
+
+        return https_fn.Response(status=201, response=json.dumps({"success": True, "data": response_data, "error": None}), mimetype="application/json")
+
+    except Exception as e:
+        return https_fn.Response(status=500, response=json.dumps({"success": False, "error": {"code": "INTERNAL_SERVER_ERROR", "message": str(e)}}), mimetype="application/json")
+
+
 
 # --- Room Management Logic ---
 def _create_room_logic(req: https_fn.Request, household_id: str) -> https_fn.Response:
@@ -706,18 +2912,18 @@ def _create_room_logic(req: https_fn.Request, household_id: str) -> https_fn.Res
         if not name or not isinstance(n_bins, int):
             return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "MISSING_FIELDS", "message": "'name' (string) and 'nBins' (integer) are required."}}), mimetype="application/json")
 
-        auth_user_uid = req.user["uid"]
-        user_profile = get_user_data_from_firestore(auth_user_uid)
-
-        if not user_profile or user_profile.get("householdId") != household_id:
+        if not user_in_household(req, household_id):
             return https_fn.Response(status=403, response=json.dumps({"success": False, "error": {"code": "FORBIDDEN", "message": "User cannot create a room in this household."}}), mimetype="application/json")
 
         room_data = {
             "name": name,
+            ENTITY_NAME_KEY: entity_name_key(name),
             "nBins": n_bins,
         }
         db = get_db()
         _, room_ref = db.collection("households").document(household_id).collection("rooms").add(room_data)
+        note_household_write(household_id)
+        queue_entity_rename(ENTITY_ROOM_NAME, None, name)
         
         created_room_doc = room_ref.get()
         response_data = created_room_doc.to_dict()
@@ -728,17 +2934,56 @@ def _create_room_logic(req: https_fn.Request, household_id: str) -> https_fn.Res
     except Exception as e:
         return https_fn.Response(status=500, response=json.dumps({"success": False, "error": {"code": "INTERNAL_SERVER_ERROR", "message": str(e)}}), mimetype="application/json")
 
+def _batch_create_rooms_logic(req: https_fn.Request, household_id: str) -> https_fn.Response:
+    """Creates many rooms in a household in a single atomic batch.
+
+    Expects a JSON body of the form {"rooms": [{"name": "Garage", "nBins": 16}, ...]}.
+    """
+    if req.method != "POST":
+        return https_fn.Response(status=405, response=json.dumps({"success": False, "error": {"code": "METHOD_NOT_ALLOWED", "message": "Method not allowed"}}), mimetype="application/json")
+
+    try:
+        data = req.get_json(silent=True)
+        rooms = data.get("rooms") if isinstance(data, dict) else None
+        validation_error = _validate_rooms_payload(rooms) if rooms else ("MISSING_FIELDS", "'rooms' must be a non-empty list of {name, nBins} objects.")
+        if validation_error:
+            return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": validation_error[0], "message": validation_error[1]}}), mimetype="application/json")
+
+        if not user_in_household(req, household_id):
+            return https_fn.Response(status=403, response=json.dumps({"success": False, "error": {"code": "FORBIDDEN", "message": "User cannot create rooms in this household."}}), mimetype="application/json")
+
+        db = get_db()
+        batch = db.batch()
+        rooms_ref = db.collection("households").document(household_id).collection("rooms")
+        created_rooms = []
+        for room in rooms:
+            room_data = {"name": room["name"].strip(), ENTITY_NAME_KEY: entity_name_key(room["name"]), "nBins": room["nBins"]}
+            room_ref = rooms_ref.document()
+            batch.set(room_ref, room_data)
+            created_rooms.append({**room_data, "id": room_ref.id})
+        batch.commit()
+        note_household_write(household_id)
+        for room in created_rooms:
+            queue_entity_rename(ENTITY_ROOM_NAME, None, room["name"])
+
+        return https_fn.Response(status=201, response=json.dumps({"success": True, "data": created_rooms, "error": None}), mimetype="application/json")
+
+    except Exception as e:
+        return https_fn.Response(status=500, response=json.dumps({"success": False, "error": {"code": "INTERNAL_SERVER_ERROR", "message": str(e)}}), mimetype="application/json")
+
 def _get_rooms_logic(req: https_fn.Request, household_id: str) -> https_fn.Response:
     """Lists all rooms in a household."""
     if req.method != "GET":
         return https_fn.Response(status=405, response=json.dumps({"success": False, "error": {"code": "METHOD_NOT_ALLOWED", "message": "Method not allowed"}}), mimetype="application/json")
 
     try:
-        auth_user_uid = req.user["uid"]
-        user_profile = get_user_data_from_firestore(auth_user_uid)
-
-        if not user_profile or user_profile.get("householdId") != household_id:
+        if not user_in_household(req, household_id):
             return https_fn.Response(status=403, response=json.dumps({"success": False, "error": {"code": "FORBIDDEN", "message": "User cannot list rooms for this household."}}), mimetype="application/json")
+
+        replica = get_fresh_replica(household_id)
+        if replica is not None:
+            return https_fn.Response(status=200, response=json.dumps({"success": True, "data": replica.rooms_list(), "error": None}), mimetype="application/json")
+
         db = get_db()
         rooms_query = db.collection("households").document(household_id).collection("rooms").stream()
         rooms_list = []
@@ -758,10 +3003,7 @@ def _get_room_logic(req: https_fn.Request, household_id: str, room_id: str) -> h
         return https_fn.Response(status=405, response=json.dumps({"success": False, "error": {"code": "METHOD_NOT_ALLOWED", "message": "Method not allowed"}}), mimetype="application/json")
 
     try:
-        auth_user_uid = req.user["uid"]
-        user_profile = get_user_data_from_firestore(auth_user_uid)
-
-        if not user_profile or user_profile.get("householdId") != household_id:
+        if not user_in_household(req, household_id):
             return https_fn.Response(status=403, response=json.dumps({"success": False, "error": {"code": "FORBIDDEN", "message": "User cannot access this room."}}), mimetype="application/json")
 
         db = get_db()
@@ -779,6 +3021,54 @@ def _get_room_logic(req: https_fn.Request, household_id: str, room_id: str) -> h
     except Exception as e:
         return https_fn.Response(status=500, response=json.dumps({"success": False, "error": {"code": "INTERNAL_SERVER_ERROR", "message": str(e)}}), mimetype="application/json")
 
+def _get_room_bins_logic(req: https_fn.Request, household_id: str, room_id: str) -> https_fn.Response:
+    """Lists a room's bins with the count and IDs of the items in each.
+
+    Answered from the room's bin index. Private items are counted (they take up
+    space), but their details stay behind the item endpoints.
+    """
+    if req.method != "GET":
+        return https_fn.Response(status=405, response=json.dumps({"success": False, "error": {"code": "METHOD_NOT_ALLOWED", "message": "Method not allowed"}}), mimetype="application/json")
+
+    try:
+        if not user_in_household(req, household_id):
+            return https_fn.Response(status=403, response=json.dumps({"success": False, "error": {"code": "FORBIDDEN", "message": "User cannot access this room."}}), mimetype="application/json")
+
+        index_data = load_bin_index(household_id, room_id)
+        if index_data is None:
+            return https_fn.Response(status=404, response=json.dumps({"success": False, "error": {"code": "ROOM_NOT_FOUND", "message": "Room not found."}}), mimetype="application/json")
+
+        bins = bin_occupancy(index_data)
+        response_data = {"roomId": room_id, "nBins": index_data.get("nBins", 0), "emptyBins": [entry["binNumber"] for entry in bins if not entry["count"]], "bins": bins}
+        return https_fn.Response(status=200, response=json.dumps({"success": True, "data": response_data, "error": None}), mimetype="application/json")
+
+    except Exception as e:
+        return https_fn.Response(status=500, response=json.dumps({"success": False, "error": {"code": "INTERNAL_SERVER_ERROR", "message": str(e)}}), mimetype="application/json")
+
+def _suggest_bin_logic(req: https_fn.Request, household_id: str, room_id: str) -> https_fn.Response:
+    """Suggests the least-full bin in a room (the lowest-numbered one on a tie)."""
+    if req.method != "GET":
+        return https_fn.Response(status=405, response=json.dumps({"success": False, "error": {"code": "METHOD_NOT_ALLOWED", "message": "Method not allowed"}}), mimetype="application/json")
+
+    try:
+        if not user_in_household(req, household_id):
+            return https_fn.Response(status=403, response=json.dumps({"success": False, "error": {"code": "FORBIDDEN", "message": "User cannot access this room."}}), mimetype="application/json")
+
+        index_data = load_bin_index(household_id, room_id)
+        if index_data is None:
+            return https_fn.Response(status=404, response=json.dumps({"success": False, "error": {"code": "ROOM_NOT_FOUND", "message": "Room not found."}}), mimetype="application/json")
+
+        bins = bin_occupancy(index_data)
+        if not bins:
+            return https_fn.Response(status=409, response=json.dumps({"success": False, "error": {"code": "NO_BINS", "message": "This room has no bins."}}), mimetype="application/json")
+
+        suggestion = min(bins, key=lambda entry: (entry["count"], entry["binNumber"]))
+        response_data = {"roomId": room_id, "binNumber": suggestion["binNumber"], "count": suggestion["count"]}
+        return https_fn.Response(status=200, response=json.dumps({"success": True, "data": response_data, "error": None}), mimetype="application/json")
+
+    except Exception as e:
+        return https_fn.Response(status=500, response=json.dumps({"success": False, "error": {"code": "INTERNAL_SERVER_ERROR", "message": str(e)}}), mimetype="application/json")
+
 def _update_room_logic(req: https_fn.Request, household_id: str, room_id: str) -> https_fn.Response:
     """Updates a room in a household."""
     if req.method != "PUT":
@@ -789,6 +3079,7 @@ def _update_room_logic(req: https_fn.Request, household_id: str, room_id: str) -
         update_payload = {}
         if "name" in data:
             update_payload["name"] = data["name"]
+            update_payload[ENTITY_NAME_KEY] = entity_name_key(data["name"])
         if "nBins" in data:
             if not isinstance(data["nBins"], int):
                 return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "INVALID_NBINS", "message": "'nBins' must be an integer."}}), mimetype="application/json")
@@ -797,15 +3088,35 @@ def _update_room_logic(req: https_fn.Request, household_id: str, room_id: str) -
         if not update_payload:
             return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "NO_UPDATE_FIELDS", "message": "No valid fields provided for update."}}), mimetype="application/json")
 
-        auth_user_uid = req.user["uid"]
-        user_profile = get_user_data_from_firestore(auth_user_uid)
-
-        if not user_profile or user_profile.get("householdId") != household_id:
+        if not user_in_household(req, household_id):
             return https_fn.Response(status=403, response=json.dumps({"success": False, "error": {"code": "FORBIDDEN", "message": "User cannot update this room."}}), mimetype="application/json")
 
         db = get_db()
         room_ref = db.collection("households").document(household_id).collection("rooms").document(room_id)
-        room_ref.update(update_payload)
+
+        @firestore.transactional
+        def update_room(transaction):
+            """Returns (error response or None, the room's previous name)."""
+            room_doc = room_ref.get(transaction=transaction)
+            if not room_doc.exists:
+                return https_fn.Response(status=404, response=json.dumps({"success": False, "error": {"code": "ROOM_NOT_FOUND", "message": "Room not found."}}), mimetype="application/json"), None
+            if "nBins" in update_payload:
+                # Bins being removed must be empty, or their items would point at bins that no longer exist.
+                # Checked in the transaction, so an item can't be moved into one of them in between.
+                index_data = _load_bin_index_in(transaction, household_id, room_id)
+                occupied_bins = sorted(int(bin_key) for bin_key, entry in (index_data.get("bins") or {}).items() if int(bin_key) > update_payload["nBins"] and (entry or {}).get("itemIds"))
+                if occupied_bins:
+                    return https_fn.Response(status=409, response=json.dumps({"success": False, "error": {"code": "BINS_NOT_EMPTY", "message": f"Bins {', '.join(map(str, occupied_bins))} still hold items. Move them before reducing 'nBins' to {update_payload['nBins']}."}}), mimetype="application/json"), None
+                transaction.set(bin_index_ref(db, household_id, room_id), {"roomId": room_id, "nBins": update_payload["nBins"]}, merge=True)
+            transaction.update(room_ref, update_payload)
+            return None, room_doc.to_dict().get("name")
+
+        error_response, previous_name = update_room(db.transaction())
+        if error_response is not None:
+            return error_response
+        note_household_write(household_id)
+        if "name" in update_payload:
+            queue_entity_rename(ENTITY_ROOM_NAME, previous_name, update_payload["name"])
 
         updated_room_doc = room_ref.get()
         response_data = updated_room_doc.to_dict()
@@ -817,35 +3128,54 @@ def _update_room_logic(req: https_fn.Request, household_id: str, room_id: str) -
         return https_fn.Response(status=500, response=json.dumps({"success": False, "error": {"code": "INTERNAL_SERVER_ERROR", "message": str(e)}}), mimetype="application/json")
 
 def _delete_room_logic(req: https_fn.Request, household_id: str, room_id: str) -> https_fn.Response:
-    """Deletes a room and all items within it from a household."""
+    """Deletes a room and all items within it from a household.
+
+    Items are deleted first, in chunked batches that also record their DELETED
+    activity; the room itself only goes once every chunk has committed, so a
+    partial failure can simply be retried.
+    """
     if req.method != "DELETE":
         return https_fn.Response(status=405, response=json.dumps({"success": False, "error": {"code": "METHOD_NOT_ALLOWED", "message": "Method not allowed"}}), mimetype="application/json")
 
     try:
-        auth_user_uid = req.user["uid"]
-        user_profile = get_user_data_from_firestore(auth_user_uid)
-
-        if not user_profile or user_profile.get("householdId") != household_id:
+        if not user_in_household(req, household_id):
             return https_fn.Response(status=403, response=json.dumps({"success": False, "error": {"code": "FORBIDDEN", "message": "User cannot delete this room."}}), mimetype="application/json")
 
         db = get_db()
-        # Start a batch write
-        batch = db.batch()
 
         # 1. Find all items in the room to be deleted
-        items_to_delete_query = db.collection("items").where("location.roomId", "==", room_id).where("householdId", "==", household_id)
-        items_to_delete_docs = items_to_delete_query.stream()
-
-        # 2. Add delete operations for each item to the batch
-        for doc in items_to_delete_docs:
-            batch.delete(doc.reference)
-
-        # 3. Add the delete operation for the room itself to the batch
+        items_to_delete_docs = stream_household_items(household_id, room_id=room_id)
+
+        # 2. Delete each item in parallel chunked batches, each with its DELETED events
+        auth_user_uid = current_user()["uid"]
+        docs_by_id = {doc.id: doc for doc in items_to_delete_docs}
+        writes = [(doc.id, lambda batch, doc=doc: add_item_delete(batch, doc, household_id)) for doc in items_to_delete_docs]
+
+        def add_chunk_activity(batch, item_ids):
+            chunk_events = [event for item_id in item_ids for event in item_activity_events(item_id, docs_by_id[item_id].to_dict(), None, auth_user_uid)]
+            add_activity_writes(db, batch, household_id, chunk_events)
+
+        failed_item_ids = _commit_in_chunks(db, writes, chunk_size=ROOM_DELETE_CHUNK_SIZE, on_chunk=add_chunk_activity)
+        if writes:
+            note_household_write(household_id)
+        failed_item_id_set = set(failed_item_ids)
+        deleted_items = [doc.to_dict() for doc in items_to_delete_docs if doc.id not in failed_item_id_set]
+        for item_data in deleted_items:
+            queue_entity_rename(ENTITY_ITEM_NAME, entity_item_name(item_data), None)
+        release_item_photos(household_id, [item_data.get("photo") for item_data in deleted_items])
+        if failed_item_ids:
+            # The room is kept, so repeating the delete finishes the job
+            return https_fn.Response(status=500, response=json.dumps({"success": False, "error": {"code": "PARTIAL_DELETE", "message": f"{len(failed_item_ids)} of {len(writes)} items could not be deleted. Please retry."}}), mimetype="application/json")
+
+        # 3. Delete the room itself once it is empty
         room_ref = db.collection("households").document(household_id).collection("rooms").document(room_id)
+        room_name = (room_ref.get().to_dict() or {}).get("name") if DIALOGFLOW_ENTITY_SYNC_ENABLED else None
+        batch = db.batch()
         batch.delete(room_ref)
-
-        # 4. Commit the batch
+        batch.delete(bin_index_ref(db, household_id, room_id))
         batch.commit()
+        note_household_write(household_id)
+        queue_entity_rename(ENTITY_ROOM_NAME, room_name, None)
 
         return https_fn.Response(status=200, response=json.dumps({"success": True, "data": {"message": f"Room {room_id} and all its items deleted successfully."}, "error": None}), mimetype="application/json")
 
@@ -853,6 +3183,322 @@ def _delete_room_logic(req: https_fn.Request, household_id: str, room_id: str) -
         return https_fn.Response(status=500, response=json.dumps({"success": False, "error": {"code": "INTERNAL_SERVER_ERROR", "message": str(e)}}), mimetype="application/json")
 
 
+# --- Usage Statistics Logic ---
+STATS_DEFAULT_DAYS = 30
+STATS_MAX_DAYS = 90
+STATS_DEFAULT_LIMIT = 10
+STATS_MAX_LIMIT = 100
+
+
+def _read_daily_rollups(db, household_id: str, days: int) -> list:
+    """Reads the activityDaily rollups for the last `days` UTC days in one query.
+
+    Returns every shard of each day, as well as the unsharded {YYYY-MM-DD} documents
+    written before the rollups were sharded. Callers sum them, so the split doesn't
+    matter to them.
+    """
+    first_day = (datetime.datetime.now(datetime.timezone.utc).date() - datetime.timedelta(days=days - 1)).isoformat()
+    rollups_ref = db.collection("households").document(household_id).collection("activityDaily")
+    return [doc.to_dict() for doc in rollups_ref.where(filter=firestore.FieldFilter("date", ">=", first_day)).stream()]
+
+
+def _get_stats_logic(req: https_fn.Request, household_id: str, stat_name: str) -> https_fn.Response:
+    """Serves usage statistics for a household from precomputed rollups.
+
+    Supported stat_name values:
+        most-used: items taken OUT most often over the last ?days (default 30).
+        out-longest: items currently OUT, longest first.
+        room-activity: activity events per room over the last ?days.
+    ?limit caps the number of entries returned (default 10).
+    """
+    if req.method != "GET":
+        return https_fn.Response(status=405, response=json.dumps({"success": False, "error": {"code": "METHOD_NOT_ALLOWED", "message": "Method not allowed"}}), mimetype="application/json")
+
+    try:
+        days = int(req.args.get("days", STATS_DEFAULT_DAYS))
+        limit = int(req.args.get("limit", STATS_DEFAULT_LIMIT))
+    except ValueError:
+        return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "INVALID_PARAMETERS", "message": "'days' and 'limit' must be integers."}}), mimetype="application/json")
+    if not 1 <= days <= STATS_MAX_DAYS or not 1 <= limit <= STATS_MAX_LIMIT:
+        return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "INVALID_PARAMETERS", "message": f"'days' must be between 1 and {STATS_MAX_DAYS} and 'limit' between 1 and {STATS_MAX_LIMIT}."}}), mimetype="application/json")
+
+    try:
+        if not user_in_household(req, household_id):
+            return https_fn.Response(status=403, response=json.dumps({"success": False, "error": {"code": "FORBIDDEN", "message": "User cannot view statistics for this household."}}), mimetype="application/json")
+
+        db = get_db()
+        household_ref = db.collection("households").document(household_id)
+
+        if stat_name == "most-used":
+            out_counts = {}
+            for rollup in _read_daily_rollups(db, household_id, days):
+                for item_id, counts in rollup.get("byItem", {}).items():
+                    if counts.get("OUT"):
+                        out_counts[item_id] = out_counts.get(item_id, 0) + counts["OUT"]
+            top_items = sorted(out_counts.items(), key=lambda entry: entry[1], reverse=True)[:limit]
+            stats_docs = {doc.id: doc for doc in db.get_all([household_ref.collection("itemStats").document(item_id) for item_id, _ in top_items])} if top_items else {}
+            response_data = [
+                {"itemId": item_id, "name": stats_docs[item_id].get("name") if item_id in stats_docs and stats_docs[item_id].exists else None, "outCount": count}
+                for item_id, count in top_items
+            ]
+
+        elif stat_name == "out-longest":
+            query = household_ref.collection("itemStats")\
+                .where(filter=firestore.FieldFilter("status", "==", "OUT"))\
+                .order_by("lastOutAt")\
+                .limit(limit)
+            now = datetime.datetime.now(datetime.timezone.utc)
+            response_data = []
+            for doc in query.stream():
+                item_stats = doc.to_dict()
+                last_out_at = item_stats.get("lastOutAt")
+                response_data.append({
+                    "itemId": doc.id,
+                    "name": item_stats.get("name"),
+                    "lastOutAt": last_out_at.isoformat() if hasattr(last_out_at, "isoformat") else last_out_at,
+                    "outForSeconds": int((now - last_out_at).total_seconds()) if isinstance(last_out_at, datetime.datetime) else None,
+                })
+
+        elif stat_name == "room-activity":
+            room_counts = {}
+            for rollup in _read_daily_rollups(db, household_id, days):
+                for room_id, count in rollup.get("byRoom", {}).items():
+                    room_counts[room_id] = room_counts.get(room_id, 0) + count
+            room_names = {room.id: room.to_dict().get("name") for room in household_ref.collection("rooms").stream()}
+            response_data = [
+                {"roomId": room_id, "name": room_names.get(room_id), "events": count}
+                for room_id, count in sorted(room_counts.items(), key=lambda entry: entry[1], reverse=True)[:limit]
+            ]
+
+        else:
+            return https_fn.Response(status=404, response=json.dumps({"success": False, "error": {"code": "NOT_FOUND", "message": f"Unknown statistic '{stat_name}'."}}), mimetype="application/json")
+
+        return https_fn.Response(status=200, response=json.dumps({"success": True, "data": response_data, "error": None}), mimetype="application/json")
+
+    except Exception as e:
+        return https_fn.Response(status=500, response=json.dumps({"success": False, "error": {"code": "INTERNAL_SERVER_ERROR", "message": str(e)}}), mimetype="application/json")
+
+
+# --- Firestore Usage Report Logic ---
+USAGE_REPORT_DEFAULT_LIMIT = 10
+USAGE_REPORT_MAX_LIMIT = 100
+
+
+def _get_usage_report_logic(req: https_fn.Request) -> https_fn.Response:
+    """Reports a month's metered Firestore operations against the configured budget.
+
+    Users with the `admin` custom claim see the heaviest households, users and
+    endpoints across the project; everyone else sees their own household's totals and
+    its heaviest endpoints. ?period selects the month (YYYY-MM, default current) and
+    ?limit caps each ranking (default 10).
+    """
+    if req.method != "GET":
+        return https_fn.Response(status=405, response=json.dumps({"success": False, "error": {"code": "METHOD_NOT_ALLOWED", "message": "Method not allowed"}}), mimetype="application/json")
+
+    current_period = time.strftime("%Y-%m", time.gmtime())
+    period = req.args.get("period", current_period)
+    try:
+        limit = int(req.args.get("limit", USAGE_REPORT_DEFAULT_LIMIT))
+        datetime.datetime.strptime(period, "%Y-%m")
+    except ValueError:
+        return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "INVALID_PARAMETERS", "message": "'period' must be YYYY-MM and 'limit' an integer."}}), mimetype="application/json")
+    if not 1 <= limit <= USAGE_REPORT_MAX_LIMIT:
+        return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "INVALID_PARAMETERS", "message": f"'limit' must be between 1 and {USAGE_REPORT_MAX_LIMIT}."}}), mimetype="application/json")
+
+    try:
+        is_admin = current_user().get("admin") is True
+        household_id = None if is_admin else get_household_id_for_request(req)
+        if not is_admin and not household_id:
+            return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "USER_NOT_IN_HOUSEHOLD", "message": "User must belong to a household to view usage."}}), mimetype="application/json")
+
+        # Include this instance's unflushed counts so the report reflects recent requests
+        _flush_usage_counters()
+
+        db = get_db()
+        counters_query = db.collection("usageMeters").document(period).collection("counters")
+        if household_id:
+            counters_query = counters_query.where(filter=firestore.FieldFilter("householdId", "==", household_id))
+
+        totals = {} # (scope, key) -> op counts, summed over shards
+        for counter_doc in counters_query.stream():
+            counter = counter_doc.to_dict()
+            summed = totals.setdefault((counter.get("scope"), counter.get("key")), dict.fromkeys(USAGE_OPS, 0))
+            for op in USAGE_OPS:
+                summed[op] += counter.get(op, 0)
+
+        budget = {"reads": USAGE_BUDGET_READS, "writes": USAGE_BUDGET_WRITES, "deletes": USAGE_BUDGET_DELETES}
+
+        def with_budget(entry: dict) -> dict:
+            entry["budgetUsed"] = {op: round(entry[op] / budget[op], 4) if budget[op] else None for op in budget}
+            return entry
+
+        def ranking(scope: str, key_name: str) -> list:
+            entries = [with_budget({key_name: key.split("|", 1)[1] if scope == "householdEndpoint" else key, **counts})
+                       for (entry_scope, key), counts in totals.items() if entry_scope == scope]
+            return sorted(entries, key=lambda entry: entry["reads"] + entry["writes"] + entry["deletes"], reverse=True)[:limit]
+
+        if household_id:
+            overall = totals.get(("household", household_id), dict.fromkeys(USAGE_OPS, 0))
+            report = {"householdId": household_id, "endpoints": ranking("householdEndpoint", "endpoint")}
+        else:
+            overall = dict.fromkeys(USAGE_OPS, 0)
+            for (scope, _), counts in totals.items():
+                if scope == "endpoint":
+                    for op in USAGE_OPS:
+                        overall[op] += counts[op]
+            report = {
+                "households": ranking("household", "householdId"),
+                "users": ranking("user", "userId"),
+                "endpoints": ranking("endpoint", "endpoint"),
+            }
+
+        report = {"period": period, "budget": budget, "totals": with_budget(dict(overall)), **report}
+        if period == current_period:
+            # Straight-line projection to the end of the month
+            now = datetime.datetime.now(datetime.timezone.utc)
+            month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+            next_month = (month_start + datetime.timedelta(days=32)).replace(day=1)
+            elapsed = (now - month_start) / (next_month - month_start)
+            report["projected"] = with_budget({op: round(overall[op] / elapsed) if elapsed else 0 for op in USAGE_OPS})
+
+        return https_fn.Response(status=200, response=json.dumps({"success": True, "data": report, "error": None}), mimetype="application/json")
+
+    except Exception as e:
+        return https_fn.Response(status=500, response=json.dumps({"success": False, "error": {"code": "INTERNAL_SERVER_ERROR", "message": str(e)}}), mimetype="application/json")
+
+
+# --- Expiry Digests ---
+# A daily sweep finds items expiring soon with one range query on the "items"
+# collection group. That group covers both the legacy collection and the household
+# subcollections. The sweep writes one digest per affected household to
+# households/{householdId}/expiryDigests/{YYYY-MM-DD}, so reads scale with the
+# number of expiring items rather than the size of the inventory.
+EXPIRY_MAX_WITHIN_DAYS = 365
+EXPIRY_DIGEST_WINDOW_DAYS = int(os.environ.get("EXPIRY_DIGEST_WINDOW_DAYS", "7"))
+EXPIRY_DIGEST_LOOKBACK_DAYS = 1 # Also list items that expired since the previous sweep
+EXPIRY_SWEEP_PAGE_SIZE = 500
+EXPIRY_DIGEST_MAX_ITEMS = 200 # Keeps digest documents well under the 1 MiB limit
+
+
+def sweep_expiring_items(now: datetime.datetime | None = None) -> dict:
+    """Writes today's expiry digest for every household with items in the digest window.
+
+    Args:
+        now: The sweep time; defaults to the current time.
+
+    Returns:
+        A summary with the number of expiring items, digests written and households whose digest failed.
+    """
+    db = get_db()
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    window_start = now - datetime.timedelta(days=EXPIRY_DIGEST_LOOKBACK_DAYS)
+    window_end = now + datetime.timedelta(days=EXPIRY_DIGEST_WINDOW_DAYS)
+    query = db.collection_group("items")\
+        .where(filter=firestore.FieldFilter("expiresAt", ">=", window_start))\
+        .where(filter=firestore.FieldFilter("expiresAt", "<", window_end))\
+        .order_by("expiresAt")\
+        .limit(EXPIRY_SWEEP_PAGE_SIZE)
+
+    digests = {} # householdId -> {"count", "publicCount", "privateCounts", "items"}
+    seen_item_ids = set() # In the dual layout the collection group holds both copies of an item
+    last_doc = None
+    while True:
+        page = list((query.start_after(last_doc) if last_doc is not None else query).stream())
+        for item_doc in page:
+            item_data = item_doc.to_dict()
+            household_id = item_data.get("householdId")
+            if not household_id or item_doc.id in seen_item_ids:
+                continue
+            seen_item_ids.add(item_doc.id)
+            digest = digests.setdefault(household_id, {"count": 0, "publicCount": 0, "privateCounts": {}, "items": []})
+            digest["count"] += 1
+            if item_data.get("isPrivate"):
+                # Counted per creator, so each member's total only includes what they may see
+                creator_id = item_data.get("creatorUserId")
+                digest["privateCounts"][creator_id] = digest["privateCounts"].get(creator_id, 0) + 1
+            else:
+                digest["publicCount"] += 1
+            if len(digest["items"]) < EXPIRY_DIGEST_MAX_ITEMS:
+                expires_at = item_data["expiresAt"]
+                digest["items"].append({
+                    "itemId": item_doc.id,
+                    "name": item_data.get("name"),
+                    "location": item_data.get("location"),
+                    "status": item_data.get("status"),
+                    "isPrivate": item_data.get("isPrivate", False),
+                    "creatorUserId": item_data.get("creatorUserId"),
+                    "expiresAt": expires_at.isoformat(),
+                    "expired": expires_at <= now,
+                })
+        if len(page) < EXPIRY_SWEEP_PAGE_SIZE:
+            break
+        last_doc = page[-1]
+
+    day = now.date().isoformat()
+    writes = []
+    for household_id, digest in digests.items():
+        digest_ref = db.collection("households").document(household_id).collection("expiryDigests").document(day)
+        digest_data = {
+            "date": day,
+            "generatedAt": now.isoformat(),
+            "windowEnd": window_end.isoformat(),
+            "count": digest["count"],
+            "publicCount": digest["publicCount"],
+            "privateCounts": digest["privateCounts"],
+            "truncated": digest["count"] > len(digest["items"]),
+            "items": digest["items"],
+        }
+        writes.append((household_id, lambda batch, ref=digest_ref, data=digest_data: batch.set(ref, data)))
+    failed_households = _commit_in_chunks(db, writes)
+
+    summary = {"expiringItems": sum(digest["count"] for digest in digests.values()), "digests": len(writes) - len(failed_households), "failedHouseholds": failed_households}
+    # Marks the day as swept, so a missing digest means "nothing expiring" rather than "not run yet"
+    db.collection("expirySweeps").document(day).set({**summary, "completedAt": firestore.SERVER_TIMESTAMP})
+    return summary
+
+
+def _get_expiry_digest_logic(req: https_fn.Request, household_id: str) -> https_fn.Response:
+    """Returns the household's latest expiry digest.
+
+    Requires Authentication. Uses today's digest once today's sweep has run, and
+    yesterday's before that. Private items of other members are left out of both
+    the items and the count.
+    """
+    if req.method != "GET":
+        return https_fn.Response(status=405, response=json.dumps({"success": False, "error": {"code": "METHOD_NOT_ALLOWED", "message": "Method not allowed"}}), mimetype="application/json")
+
+    try:
+        if not user_in_household(req, household_id):
+            return https_fn.Response(status=403, response=json.dumps({"success": False, "error": {"code": "FORBIDDEN", "message": "User cannot view this household's expiry digest."}}), mimetype="application/json")
+
+        db = get_db()
+        today = datetime.datetime.now(datetime.timezone.utc).date()
+        yesterday = today - datetime.timedelta(days=1)
+        digests_ref = db.collection("households").document(household_id).collection("expiryDigests")
+        sweep_ref = db.collection("expirySweeps").document(today.isoformat())
+        snapshots = {doc.reference.path: doc for doc in db.get_all([sweep_ref, digests_ref.document(today.isoformat()), digests_ref.document(yesterday.isoformat())])}
+
+        day = today if snapshots[sweep_ref.path].exists else yesterday
+        digest_doc = snapshots[digests_ref.document(day.isoformat()).path]
+        digest = digest_doc.to_dict() if digest_doc.exists else {"date": day.isoformat(), "count": 0, "truncated": False, "items": []}
+
+        auth_user_uid = current_user()["uid"]
+        digest["items"] = [item for item in digest["items"] if not item.get("isPrivate") or item.get("creatorUserId") == auth_user_uid]
+        public_count = digest.pop("publicCount", None)
+        private_counts = digest.pop("privateCounts", {})
+        if public_count is not None:
+            digest["count"] = public_count + private_counts.get(auth_user_uid, 0)
+        else:
+            # Digests from before per-creator counts only have a total that includes others' private items
+            digest["count"] = len(digest["items"])
+        digest["truncated"] = digest["count"] > len(digest["items"])
+
+        return https_fn.Response(status=200, response=json.dumps({"success": True, "data": digest, "error": None}), mimetype="application/json")
+
+    except Exception as e:
+        return https_fn.Response(status=500, response=json.dumps({"success": False, "error": {"code": "INTERNAL_SERVER_ERROR", "message": str(e)}}), mimetype="application/json")
+
+
 def _bulk_import_items_logic(req: https_fn.Request) -> https_fn.Response:
     """Bulk imports items from a CSV file.
 
@@ -870,14 +3516,12 @@ def _bulk_import_items_logic(req: https_fn.Request) -> https_fn.Response:
         if file.filename == '':
             return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "NO_FILE_SELECTED", "message": "No file selected."}}), mimetype="application/json")
 
-        auth_user_uid = req.user["uid"]
-        user_profile = get_user_data_from_firestore(auth_user_uid)
+        auth_user_uid = current_user()["uid"]
+        household_id = get_household_id_for_request(req)
 
-        if not user_profile or not user_profile.get("householdId"):
+        if not household_id:
             return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "USER_NOT_IN_HOUSEHOLD", "message": "User must belong to a household to import items."}}), mimetype="application/json")
 
-        household_id = user_profile["householdId"]
-
         # Decode the file content as text
         csv_file = io.StringIO(file.read().decode('utf-8'))
         reader = csv.DictReader(csv_file)
@@ -908,6 +3552,11 @@ def _bulk_import_items_logic(req: https_fn.Request) -> https_fn.Response:
             except ValueError:
                 continue
 
+            try:
+                expires_at = parse_expires_at(row.get('expiresAt') or None)
+            except ValueError:
+                continue
+
             location = {
                 "roomId": rooms_map[room_name]["id"],
                 "binNumber": bin_number
@@ -915,6 +3564,7 @@ def _bulk_import_items_logic(req: https_fn.Request) -> https_fn.Response:
 
             item_data = {
                 "name": name,
+                ENTITY_NAME_KEY: entity_name_key(name),
                 "location": location,
                 "status": row.get('status', 'STORED').upper(),
                 "isPrivate": row.get('isPrivate', 'false').lower() == 'true',
@@ -926,18 +3576,31 @@ def _bulk_import_items_logic(req: https_fn.Request) -> https_fn.Response:
                 "householdId": household_id,
                 "lastUpdated": firestore.SERVER_TIMESTAMP
             }
+            if expires_at is not None:
+                item_data["expiresAt"] = expires_at
             items_to_create.append(item_data)
 
         if not items_to_create:
             return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "NO_VALID_ITEMS", "message": "No valid items found in the CSV file."}}), mimetype="application/json")
 
-        batch = db.batch()
-        for item_data in items_to_create:
-            item_ref = db.collection("items").document()
-            batch.set(item_ref, item_data)
-        batch.commit()
+        # Items are created in parallel chunked batches, each with its CREATED events and bin index updates
+        item_refs = [new_item_ref(household_id) for _ in items_to_create]
+        writes = [(index, lambda batch, ref=item_ref, data=item_data: batch.set(ref, data)) for index, (item_ref, item_data) in enumerate(zip(item_refs, items_to_create))]
+
+        def add_chunk_activity(batch, indexes):
+            chunk_events = [event for index in indexes for event in item_activity_events(item_refs[index].id, None, items_to_create[index], auth_user_uid)]
+            add_activity_writes(db, batch, household_id, chunk_events)
+            add_bin_index_writes(db, batch, household_id, [(item_refs[index].id, None, items_to_create[index]) for index in indexes])
 
-        return https_fn.Response(status=200, response=json.dumps({"success": True, "data": {"count": len(items_to_create)}, "error": None}), mimetype="application/json")
+        failed_indexes = set(_commit_in_chunks(db, writes, chunk_size=BULK_IMPORT_CHUNK_SIZE, on_chunk=add_chunk_activity))
+        if len(failed_indexes) == len(items_to_create):
+            return https_fn.Response(status=500, response=json.dumps({"success": False, "error": {"code": "COMMIT_FAILED", "message": "No items could be imported. Please retry."}}), mimetype="application/json")
+        note_household_write(household_id)
+        for index, item_data in enumerate(items_to_create):
+            if index not in failed_indexes:
+                queue_entity_rename(ENTITY_ITEM_NAME, None, entity_item_name(item_data))
+
+        return https_fn.Response(status=200, response=json.dumps({"success": True, "data": {"count": len(items_to_create) - len(failed_indexes), "failed": len(failed_indexes)}, "error": None}), mimetype="application/json")
 
     except Exception as e:
         return https_fn.Response(status=500, response=json.dumps({"success": False, "error": {"code": "INTERNAL_SERVER_ERROR", "message": str(e)}}), mimetype="application/json")
@@ -1002,12 +3665,216 @@ def _create_user_logic(req: https_fn.Request) -> https_fn.Response:
             mimetype="application/json"
         )
 
-# --- API Router Function ---
-@https_fn.on_request(max_instances=10, memory=options.MemoryOption.MB_256, cors=options.CorsOptions(cors_origins="*", cors_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])) # Added default options, can be adjusted
-def api(req: https_fn.Request) -> https_fn.Response:
-    """Main API router function.
-    Inspects req.path and req.method to route to the appropriate logic function.
+# --- Response Compression ---
+# Brotli is optional; gzip from the standard library is always available.
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_MIN_BYTES = 1024 # Smaller bodies aren't worth the CPU or the header overhead
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 5
+COMPRESSIBLE_MIMETYPES = ("application/json", "text/csv", "text/plain")
+
+
+def _negotiate_encoding(accept_encoding: str | None) -> str | None:
+    """Picks the best supported content-coding from an Accept-Encoding header.
+
+    Honors q-values (q=0 disables a coding) and prefers brotli over gzip on ties.
+    """
+    if not accept_encoding:
+        return None
+    qualities = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[coding.strip().lower()] = quality
+
+    supported = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best = None
+    for coding in supported:
+        quality = qualities.get(coding, qualities.get("*", 0.0))
+        if quality > 0 and (best is None or quality > best[1]):
+            best = (coding, quality)
+    return best[0] if best else None
+
+
+def _compress_stream(chunks, encoding: str):
+    """Incrementally compresses an iterable of body chunks."""
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+        for chunk in chunks:
+            data = compressor.process(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+    else:
+        compressor = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31) # wbits=31 -> gzip container
+        for chunk in chunks:
+            data = compressor.compress(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+
+def compress_response(req: https_fn.Request, response: https_fn.Response) -> https_fn.Response:
+    """Compresses a response body according to the request's Accept-Encoding.
+
+    Buffered bodies below COMPRESSION_MIN_BYTES are left alone. Streamed (chunked)
+    responses are compressed incrementally so they are never buffered whole.
+    """
+    if response.headers.get("Content-Encoding") or response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+    if response.status_code < 200 or response.status_code in (204, 304):
+        return response
+
+    encoding = _negotiate_encoding(req.headers.get("Accept-Encoding"))
+    response.vary.add("Accept-Encoding")
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, encoding)
+        response.headers.pop("Content-Length", None)
+    else:
+        body = response.get_data()
+        if len(body) < COMPRESSION_MIN_BYTES:
+            return response
+        if encoding == "br":
+            compressed = brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY)
+        else:
+            compressed = gzip.compress(body, compresslevel=COMPRESSION_GZIP_LEVEL)
+        response.set_data(compressed)
+
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+# --- Request Multiplexing ---
+# POST /api/batch runs several API calls in one HTTP request, e.g. the dashboard's
+# profile, items and rooms. The batch is authenticated once. Its sub-requests go
+# through the normal router with that user attached and share one users/{uid} read.
+BATCH_MAX_SUBREQUESTS = 20
+BATCH_SUBREQUEST_WORKERS = 6
+
+
+class _SharedProfiles:
+    """Profiles read during one batch, keyed by user ID."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.profiles = {}
+
+
+_shared_profiles = contextvars.ContextVar("shared_profiles", default=None)
+
+
+def _run_subrequest(req: https_fn.Request, subrequest: dict) -> dict:
+    """Routes one sub-request and returns its entry for the batch response.
+
+    Each sub-request costs a token from the caller's rate limit buckets, like a
+    request of its own, and gets a 429 entry once they are empty.
     """
+    rate_limited_response = _check_rate_limit(current_user())
+    if rate_limited_response is not None:
+        return {"id": subrequest["id"], "status": 429, "body": json.loads(rate_limited_response.get_data())}
+
+    builder = werkzeug.test.EnvironBuilder(
+        path=subrequest["path"],
+        method=subrequest["method"],
+        json=subrequest.get("body"),
+        headers={"Authorization": req.headers.get("Authorization", "")},
+    )
+    sub_req = builder.get_request(cls=type(req))
+    try:
+        response = _route_api_request(sub_req)
+    except Exception as e:
+        # One failing sub-request must not take down the rest of the batch
+        return {"id": subrequest["id"], "status": 500, "body": {"success": False, "data": None, "error": {"code": "INTERNAL_SERVER_ERROR", "message": str(e)}}}
+    try:
+        if response.mimetype != "application/json":
+            return {"id": subrequest["id"], "status": 415, "body": {"success": False, "data": None, "error": {"code": "UNSUPPORTED_SUBREQUEST", "message": "Only endpoints that return JSON can be batched."}}}
+        return {"id": subrequest["id"], "status": response.status_code, "body": json.loads(response.get_data())}
+    finally:
+        response.close()
+
+
+def _batch_requests_logic(req: https_fn.Request) -> https_fn.Response:
+    """Runs up to BATCH_MAX_SUBREQUESTS API calls and returns all their responses.
+
+    Requires Authentication.
+    Request body: {"requests": [{"id": "items", "method": "GET", "path": "/api/items?format=columnar"}, ...]}
+    with an optional JSON "body" per sub-request. Consecutive GETs run concurrently.
+    Any other method runs on its own, in order, after everything before it, so later
+    sub-requests see its writes. Responses come back in request order as
+    {"id", "status", "body"}.
+    """
+    if req.method != "POST":
+        return https_fn.Response(status=405, response=json.dumps({"success": False, "error": {"code": "METHOD_NOT_ALLOWED", "message": "Method not allowed"}}), mimetype="application/json")
+
+    data = req.get_json(silent=True)
+    subrequests = data.get("requests") if isinstance(data, dict) else None
+    if not isinstance(subrequests, list) or not subrequests:
+        return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "INVALID_BATCH", "message": "Body must be {\"requests\": [...]} with at least one sub-request."}}), mimetype="application/json")
+    if len(subrequests) > BATCH_MAX_SUBREQUESTS:
+        return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "BATCH_TOO_LARGE", "message": f"A batch may contain at most {BATCH_MAX_SUBREQUESTS} sub-requests."}}), mimetype="application/json")
+
+    seen_ids = set()
+    for index, subrequest in enumerate(subrequests):
+        if not isinstance(subrequest, dict):
+            return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "INVALID_BATCH", "message": f"Sub-request {index} must be an object."}}), mimetype="application/json")
+        subrequest.setdefault("id", str(index))
+        if not isinstance(subrequest["id"], str):
+            return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "INVALID_BATCH", "message": f"Sub-request {index} needs a string 'id'."}}), mimetype="application/json")
+        subrequest["method"] = str(subrequest.get("method", "GET")).upper()
+        path = subrequest.get("path")
+        if not isinstance(path, str) or not path.startswith("/api/") or path.split("?", 1)[0].rstrip("/") == "/api/batch":
+            return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "INVALID_BATCH", "message": f"Sub-request {subrequest['id']} needs a 'path' under /api/ other than /api/batch."}}), mimetype="application/json")
+        if subrequest["method"] not in ("GET", "POST", "PUT", "DELETE"):
+            return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "INVALID_BATCH", "message": f"Sub-request {subrequest['id']} has an unsupported method."}}), mimetype="application/json")
+        if subrequest["id"] in seen_ids:
+            return https_fn.Response(status=400, response=json.dumps({"success": False, "error": {"code": "INVALID_BATCH", "message": f"Sub-request id '{subrequest['id']}' is used more than once."}}), mimetype="application/json")
+        seen_ids.add(subrequest["id"])
+
+    # Group consecutive GETs into stages that run concurrently; every write is a stage of its own
+    stages = []
+    for subrequest in subrequests:
+        if subrequest["method"] == "GET" and stages and stages[-1][0]["method"] == "GET":
+            stages[-1].append(subrequest)
+        else:
+            stages.append([subrequest])
+
+    shared_profiles = _SharedProfiles()
+    profiles_token = _shared_profiles.set(shared_profiles)
+    try:
+        responses = []
+        with ThreadPoolExecutor(max_workers=BATCH_SUBREQUEST_WORKERS) as executor:
+            for stage in stages:
+                if len(stage) == 1:
+                    responses.append(_run_subrequest(req, stage[0]))
+                else:
+                    # Each worker runs in a copy of this context, keeping the shared profiles and usage meter
+                    futures = [executor.submit(contextvars.copy_context().run, _run_subrequest, req, subrequest) for subrequest in stage]
+                    responses.extend(future.result() for future in futures)
+                if stage[0]["method"] != "GET":
+                    with shared_profiles.lock:
+                        shared_profiles.profiles.clear() # The write may have changed the profile
+    finally:
+        _shared_profiles.reset(profiles_token)
+
+    return https_fn.Response(status=200, response=json.dumps({"success": True, "data": {"responses": responses}, "error": None}), mimetype="application/json")
+
+
+# --- API Router Function ---
+def _route_api_request(req: https_fn.Request) -> https_fn.Response:
+    """Inspects req.path and req.method to route to the appropriate logic function."""
     # Normalize path to ensure consistent matching (e.g., remove trailing slash if any)
     # Firebase Functions req.path typically starts with '/', e.g., '/register' or '/items/some_id'
     # The rewrite rule in firebase.json will be {"source": "/api/**", "function": "api"}
@@ -1026,18 +3893,33 @@ def api(req: https_fn.Request) -> https_fn.Response:
     if normalized_path == "/api/households" and req.method == "POST":
         return require_auth(_create_household_logic)(req)
 
+    if normalized_path == "/api/households:bootstrap" and req.method == "POST":
+        return require_auth(_bootstrap_household_logic)(req)
+
     if normalized_path == "/api/items" and req.method == "POST":
         return require_auth(_create_item_logic)(req)
 
     if normalized_path == "/api/items" and req.method == "GET":
         return require_auth(_get_items_logic)(req)
 
+    if normalized_path == "/api/items:batchGet" and req.method == "POST":
+        return require_auth(_batch_get_items_logic)(req)
+
+    if normalized_path == "/api/items:batchUpdate" and req.method == "POST":
+        return require_auth(_batch_update_items_logic)(req)
+
     if normalized_path == "/api/items/bulk" and req.method == "POST":
         return require_auth(_bulk_import_items_logic)(req)
 
+    if normalized_path == "/api/batch" and req.method == "POST":
+        return require_auth(_batch_requests_logic)(req)
+
     if normalized_path == "/api/profile" and req.method == "GET":
         return require_auth(_get_profile_logic)(req)
 
+    if normalized_path == "/api/usage" and req.method == "GET":
+        return require_auth(_get_usage_report_logic)(req)
+
     # Handle /households/{householdId}/rooms and /households/{householdId}/rooms/{roomId}
     if normalized_path.startswith("/api/households/"):
         path_parts = normalized_path.split("/")
@@ -1051,6 +3933,19 @@ def api(req: https_fn.Request) -> https_fn.Response:
                 return require_auth(_update_room_logic)(req, household_id=household_id, room_id=room_id)
             elif req.method == "DELETE":
                 return require_auth(_delete_room_logic)(req, household_id=household_id, room_id=room_id)
+        # /api/households/{hid}/rooms/{rid}/bins and /api/households/{hid}/rooms/{rid}/bins:suggest
+        elif len(path_parts) == 7 and path_parts[4] == "rooms" and path_parts[6] in ("bins", "bins:suggest"):
+            household_id = path_parts[3]
+            room_id = path_parts[5]
+            if req.method == "GET" and path_parts[6] == "bins":
+                return require_auth(_get_room_bins_logic)(req, household_id=household_id, room_id=room_id)
+            elif req.method == "GET":
+                return require_auth(_suggest_bin_logic)(req, household_id=household_id, room_id=room_id)
+        # /api/households/{hid}/stats/{statName}
+        elif len(path_parts) == 6 and path_parts[4] == "stats":
+            household_id = path_parts[3]
+            if req.method == "GET":
+                return require_auth(_get_stats_logic)(req, household_id=household_id, stat_name=path_parts[5])
         # /api/households/{hid}/rooms -> ['', 'api', 'households', hid, 'rooms'] -> len=5
         elif len(path_parts) == 5 and path_parts[4] == "rooms":
             household_id = path_parts[3]
@@ -1058,6 +3953,16 @@ def api(req: https_fn.Request) -> https_fn.Response:
                 return require_auth(_create_room_logic)(req, household_id=household_id)
             elif req.method == "GET":
                 return require_auth(_get_rooms_logic)(req, household_id=household_id)
+        # /api/households/{hid}/expiry-digest
+        elif len(path_parts) == 5 and path_parts[4] == "expiry-digest":
+            household_id = path_parts[3]
+            if req.method == "GET":
+                return require_auth(_get_expiry_digest_logic)(req, household_id=household_id)
+        # /api/households/{hid}/rooms:batchCreate
+        elif len(path_parts) == 5 and path_parts[4] == "rooms:batchCreate":
+            household_id = path_parts[3]
+            if req.method == "POST":
+                return require_auth(_batch_create_rooms_logic)(req, household_id=household_id)
 
     # Handle /items/{item_id} type paths
     if normalized_path.startswith("/api/items/"):
@@ -1070,6 +3975,13 @@ def api(req: https_fn.Request) -> https_fn.Response:
                 return require_auth(_update_item_logic)(req, actual_item_id=actual_item_id)
             elif req.method == "DELETE":
                 return require_auth(_delete_item_logic)(req, actual_item_id=actual_item_id)
+        # /api/items/{item_id}/photo
+        elif len(path_parts) == 5 and path_parts[4] == "photo":
+            actual_item_id = path_parts[3]
+            if req.method == "PUT":
+                return require_auth(_upload_item_photo_logic)(req, actual_item_id=actual_item_id)
+            elif req.method == "GET":
+                return require_auth(_get_item_photo_logic)(req, actual_item_id=actual_item_id)
 
     if normalized_path == "/api/users" and req.method == "POST":
         return _create_user_logic(req)
@@ -1081,6 +3993,45 @@ def api(req: https_fn.Request) -> https_fn.Response:
         mimetype="application/json"
     )
 
+# Requests one instance serves at once. Module state shared between them (the
+# Firestore client, caches, rate-limit and usage counters) is guarded by locks, and
+# per-request state lives in context variables. Concurrency above 1 needs a whole CPU.
+API_CONCURRENCY = max(1, int(os.environ.get("API_CONCURRENCY", "16")))
+
+@https_fn.on_request(max_instances=10, concurrency=API_CONCURRENCY, cpu=1, memory=options.MemoryOption.MB_512, cors=options.CorsOptions(cors_origins="*", cors_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])) # Added default options, can be adjusted
+def api(req: https_fn.Request) -> https_fn.Response:
+    """Main API router function.
+    Routes the request while metering its Firestore operations, then compresses the
+    response if the client accepts it.
+    """
+    # A copy of the framework's context per request: worker threads are reused across
+    # requests, and state set by one request (its user, its usage meter) must not leak
+    # into the next, while Flask's app and request context must stay bound
+    return contextvars.copy_context().run(_handle_api_request, req)
+
+def _handle_api_request(req: https_fn.Request) -> https_fn.Response:
+    metering = begin_request_metering(req)
+    try:
+        response = _route_api_request(req)
+    finally:
+        counts = end_request_metering(req, metering)
+    if USAGE_OPS_HEADER and counts:
+        response.headers["X-Firestore-Ops"] = f"reads={counts['reads']}, writes={counts['writes']}, deletes={counts['deletes']}"
+    return compress_response(req, response)
+
+@scheduler_fn.on_schedule(schedule="every day 06:00", memory=options.MemoryOption.MB_256)
+def expiry_digest_sweep(event: scheduler_fn.ScheduledEvent) -> None:
+    """Writes the daily per-household expiry digests (see sweep_expiring_items)."""
+    summary = sweep_expiring_items()
+    print(f"Expiry sweep: {summary['expiringItems']} expiring items, {summary['digests']} digests written, {len(summary['failedHouseholds'])} failed")
+
+@scheduler_fn.on_schedule(schedule="every 15 minutes", memory=options.MemoryOption.MB_512)
+def photo_processing_sweep(event: scheduler_fn.ScheduledEvent) -> None:
+    """Re-renders photos stuck in PROCESSING (see sweep_stale_photos)."""
+    summary = sweep_stale_photos()
+    if summary["stale"]:
+        print(f"Photo sweep: {summary['stale']} stale photos, {summary['READY']} ready, {summary['FAILED']} failed")
+
 @https_fn.on_request()
 def test_ping(req: https_fn.Request) -> https_fn.Response:
     """A simple test endpoint that returns a JSON response."""
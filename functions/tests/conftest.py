@@ -0,0 +1,187 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("GCLOUD_PROJECT", "demo-test")
+
+import main # noqa: E402
+
+
+class FakeDocumentRef:
+    """A document reference that knows its path, and reads from its FakeDb's docs if it has one."""
+
+    def __init__(self, path: str, db=None):
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+        self._db = db
+
+    @property
+    def parent(self):
+        return FakeCollection(self.path.rsplit("/", 1)[0], self._db)
+
+    def collection(self, name: str):
+        return FakeCollection(f"{self.path}/{name}", self._db)
+
+    def get(self, transaction=None):
+        return FakeSnapshot(self, self._db.docs.get(self.path))
+
+    def set(self, data, merge=False):
+        self._db.docs[self.path] = data
+
+    def __eq__(self, other):
+        return isinstance(other, FakeDocumentRef) and other.path == self.path
+
+    def __hash__(self):
+        return hash(self.path)
+
+    def __repr__(self):
+        return f"FakeDocumentRef({self.path!r})"
+
+
+class FakeCollection:
+    def __init__(self, path: str, db=None):
+        self.path = path
+        self._db = db
+        self._next_id = 0
+
+    @property
+    def parent(self):
+        return FakeDocumentRef(self.path.rsplit("/", 1)[0], self._db) if "/" in self.path else None
+
+    def document(self, document_id: str | None = None):
+        if document_id is None:
+            # IDs are unique per FakeDb, like Firestore's random ones
+            counter = self._db if self._db is not None else self
+            counter._next_id += 1
+            document_id = f"auto{counter._next_id}"
+        return FakeDocumentRef(f"{self.path}/{document_id}", self._db)
+
+    def stream(self, transaction=None):
+        """Yields the documents in FakeDb.docs directly under this collection."""
+        for path, data in sorted(self._db.docs.items()):
+            if path.rsplit("/", 1)[0] == self.path:
+                yield FakeSnapshot(FakeDocumentRef(path, self._db), data)
+
+
+class FakeSnapshot:
+    """A document snapshot holding a copy of data."""
+
+    def __init__(self, reference, data: dict | None):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+    def get(self, field: str):
+        return self._data[field]
+
+
+class FakeQuery:
+    """A query over a fixed list of snapshots that records its filters and ignores them."""
+
+    def __init__(self, docs: list):
+        self.docs = docs
+        self.filters = []
+
+    def where(self, filter):
+        self.filters.append((filter.field_path, filter.op_string, filter.value))
+        return self
+
+    def order_by(self, field_path):
+        return self
+
+    def limit(self, count):
+        return self
+
+    def start_after(self, snapshot):
+        return FakeQuery(self.docs[self.docs.index(snapshot) + 1:])
+
+    def stream(self, transaction=None):
+        return iter(self.docs)
+
+
+class FakeBatch:
+    """Records the writes added to it as (op, path, data, merge) tuples."""
+
+    def __init__(self):
+        self.writes = []
+        self.committed = False
+
+    def set(self, ref, data, merge=False):
+        self.writes.append(("set", ref.path, data, merge))
+
+    def create(self, ref, data):
+        self.writes.append(("create", ref.path, data, False))
+
+    def update(self, ref, data):
+        self.writes.append(("update", ref.path, data, False))
+
+    def delete(self, ref):
+        self.writes.append(("delete", ref.path, None, False))
+
+    def commit(self):
+        self.committed = True
+        return []
+
+
+class FakeDb:
+    """Enough of the Firestore client to build references and batches, and to read
+    the documents put in docs (path -> data)."""
+
+    def __init__(self):
+        self.batches = []
+        self.docs = {}
+        self.group_docs = {}
+        self._next_id = 0
+
+    def collection(self, name: str):
+        return FakeCollection(name, self)
+
+    def collection_group(self, name: str):
+        """Returns a FakeQuery over the snapshots put in group_docs[name]."""
+        return FakeQuery(self.group_docs.get(name, []))
+
+    def get_all(self, refs):
+        return [ref.get() for ref in refs]
+
+    def batch(self):
+        batch = FakeBatch()
+        self.batches.append(batch)
+        return batch
+
+
+def make_request(method: str, path: str, json_body=None, headers: dict | None = None, data=None):
+    import flask
+    import werkzeug.test
+    return werkzeug.test.EnvironBuilder(path=path, method=method, json=json_body, headers=headers or {}, data=data).get_request(cls=flask.Request)
+
+
+def response_json(response):
+    return json.loads(response.get_data())
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    db = FakeDb()
+    monkeypatch.setattr(main, "get_db", lambda: db)
+    return db
+
+
+@pytest.fixture
+def user():
+    """Sets the verified user of the current request; call it with the token claims."""
+    tokens = []
+
+    def set_user(uid: str, **claims):
+        tokens.append(main._request_auth.set((f"token-{uid}", {"uid": uid, **claims})))
+        return main.current_user()
+
+    yield set_user
+    for token in reversed(tokens):
+        main._request_auth.reset(token)
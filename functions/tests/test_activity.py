@@ -0,0 +1,61 @@
+import io
+
+from conftest import make_request, response_json
+
+import main
+
+
+def test_created_and_deleted_events():
+    item = {"name": "Tent", "status": "STORED", "location": {"roomId": "r1", "binNumber": 2}}
+    assert main.item_activity_events("i1", None, item, "u1") == [
+        {"itemId": "i1", "itemName": "Tent", "userId": "u1", "type": "CREATED", "status": "STORED", "toLocation": item["location"]},
+    ]
+    assert main.item_activity_events("i1", item, None, "u1") == [
+        {"itemId": "i1", "itemName": "Tent", "userId": "u1", "type": "DELETED", "status": "STORED", "fromLocation": item["location"]},
+    ]
+
+
+def test_update_events_follow_location_and_status():
+    before = {"name": "Tent", "status": "STORED", "location": {"roomId": "r1", "binNumber": 2}}
+    after = {**before, "status": "OUT", "location": {"roomId": "r2", "binNumber": 1}}
+    assert [event["type"] for event in main.item_activity_events("i1", before, after, "u1")] == ["MOVED", "OUT"]
+    assert main.item_activity_events("i1", before, {**before, "name": "Big tent"}, "u1") == []
+
+
+def test_rollup_is_sharded_by_item(fake_db):
+    item_ids = [f"i{n}" for n in range(40)]
+    events = [event for item_id in item_ids for event in main.item_activity_events(item_id, None, {"name": item_id, "status": "OUT", "location": {"roomId": "r1", "binNumber": 1}}, "u1")]
+    batch = fake_db.batch()
+
+    writes = main.add_activity_writes(fake_db, batch, "h1", events)
+
+    rollups = {path.rsplit("/", 1)[-1]: data for op, path, data, merge in batch.writes if "/activityDaily/" in path}
+    shards = {main._activity_rollup_shard(item_id) for item_id in item_ids}
+    assert len(rollups) == len(shards) <= main.ACTIVITY_ROLLUP_SHARDS
+    assert writes == len(events) + len(item_ids) + len(rollups) == len(batch.writes)
+    for item_id in item_ids:
+        # Each item's counts land in exactly one shard
+        holders = [name for name, rollup in rollups.items() if item_id in rollup["byItem"]]
+        assert holders == [f"{rollups[holders[0]]['date']}_{main._activity_rollup_shard(item_id)}"]
+    assert sum(rollup["events"].value for rollup in rollups.values()) == len(events)
+
+
+def test_bulk_import_chunks_and_records_created_events(fake_db, monkeypatch, user):
+    user("u1", householdId="h1")
+    fake_db.docs["households/h1/rooms/r1"] = {"name": "Garage", "nBins": 4}
+    monkeypatch.setattr(main, "get_household_id_for_request", lambda req: "h1")
+    monkeypatch.setattr(main, "note_household_write", lambda household_id: None)
+    rows = "".join(f"Item {n},Garage,{n % 4 + 1}\n" for n in range(300))
+    req = make_request("POST", "/api/items/bulk", data={"file": (io.BytesIO(f"name,roomName,binNumber\n{rows}Bad,Attic,1\n".encode()), "items.csv")})
+
+    response = main._bulk_import_items_logic(req)
+
+    assert response.status_code == 200
+    assert response_json(response)["data"] == {"count": 300, "failed": 0}
+    assert len(fake_db.batches) == 3
+    assert all(len(batch.writes) <= main.FIRESTORE_BATCH_LIMIT for batch in fake_db.batches)
+    writes = [write for batch in fake_db.batches for write in batch.writes]
+    created = [data for op, path, data, _ in writes if "/activity/" in path]
+    assert len(created) == 300 and {event["type"] for event in created} == {"CREATED"}
+    item_ids = {path.rsplit("/", 1)[-1] for op, path, _, _ in writes if path.rsplit("/", 2)[-2] == "items"}
+    assert {event["itemId"] for event in created} == item_ids
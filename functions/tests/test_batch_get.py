@@ -0,0 +1,52 @@
+import pytest
+from conftest import make_request, response_json
+
+import main
+
+
+@pytest.fixture
+def items(fake_db, monkeypatch, user):
+    user("u1", householdId="h1")
+    monkeypatch.setattr(main, "get_household_id_for_request", lambda req, verify=False: "h1")
+    fake_db.docs.update({
+        "items/a": {"name": "Tent", "householdId": "h1", "isPrivate": False, "creatorUserId": "u2"},
+        "items/b": {"name": "Lamp", "householdId": "h1", "isPrivate": True, "creatorUserId": "u1"},
+        "items/secret": {"name": "Diary", "householdId": "h1", "isPrivate": True, "creatorUserId": "u2"},
+        "items/foreign": {"name": "Saw", "householdId": "h2", "isPrivate": False, "creatorUserId": "u3"},
+    })
+
+
+def batch_get(body):
+    return main._batch_get_items_logic(make_request("POST", "/api/items:batchGet", json_body=body))
+
+
+def test_returns_accessible_items_in_request_order(items):
+    response = batch_get({"ids": ["b", "secret", "a", "gone", "foreign", "b"]})
+
+    data = response_json(response)["data"]
+    assert [item["id"] for item in data["items"]] == ["b", "a"]
+    # Private and foreign items are reported like missing ones, so their existence isn't leaked
+    assert data["missingIds"] == ["secret", "gone", "foreign"]
+
+
+@pytest.mark.parametrize("body, code", [
+    (None, "INVALID_IDS"),
+    ({"ids": []}, "INVALID_IDS"),
+    ({"ids": ["a", 7]}, "INVALID_IDS"),
+    ({"ids": ["households/h2/items/x"]}, "INVALID_IDS"),
+    ({"ids": [f"i{n}" for n in range(main.BATCH_GET_MAX_IDS + 1)]}, "TOO_MANY_IDS"),
+])
+def test_rejects_invalid_ids(items, body, code):
+    response = batch_get(body)
+    assert response.status_code == 400 and response_json(response)["error"]["code"] == code
+
+
+def test_dual_layout_prefers_the_household_copy(fake_db, monkeypatch):
+    monkeypatch.setattr(main, "ITEMS_LAYOUT", "dual")
+    fake_db.docs.update({
+        "items/a": {"name": "old"},
+        "households/h1/items/a": {"name": "new"},
+        "items/b": {"name": "legacy only"},
+    })
+    found = main.get_item_snapshots(["a", "b", "c"], "h1")
+    assert {item_id: doc.to_dict()["name"] for item_id, doc in found.items()} == {"a": "new", "b": "legacy only"}
@@ -0,0 +1,97 @@
+import json
+import threading
+
+import pytest
+from conftest import make_request, response_json
+from firebase_functions import https_fn
+
+import main
+
+
+def batch(requests, token="token-u1"):
+    return make_request("POST", "/api/batch", json_body={"requests": requests}, headers={"Authorization": f"Bearer {token}"})
+
+
+@pytest.mark.parametrize("body, code", [
+    ({}, "INVALID_BATCH"),
+    ({"requests": []}, "INVALID_BATCH"),
+    ({"requests": ["/api/items"]}, "INVALID_BATCH"),
+    ({"requests": [{"path": "/items"}]}, "INVALID_BATCH"),
+    ({"requests": [{"path": "/api/batch/"}]}, "INVALID_BATCH"),
+    ({"requests": [{"path": "/api/items", "method": "PATCH"}]}, "INVALID_BATCH"),
+    ({"requests": [{"id": [], "path": "/api/items"}]}, "INVALID_BATCH"),
+    ({"requests": [{"id": 1, "path": "/api/items"}]}, "INVALID_BATCH"),
+    ({"requests": [{"id": "a", "path": "/api/items"}, {"id": "a", "path": "/api/rooms"}]}, "INVALID_BATCH"),
+    ({"requests": [{"path": "/api/items"}] * (main.BATCH_MAX_SUBREQUESTS + 1)}, "BATCH_TOO_LARGE"),
+])
+def test_invalid_batches_are_rejected(monkeypatch, body, code):
+    monkeypatch.setattr(main, "_route_api_request", lambda req: pytest.fail("sub-request routed"))
+    response = main._batch_requests_logic(make_request("POST", "/api/batch", json_body=body))
+    assert response.status_code == 400
+    assert response_json(response)["error"]["code"] == code
+
+
+@pytest.fixture
+def routed(monkeypatch, user):
+    """Routes sub-requests from u1 to a fake handler that reads the caller's profile."""
+    user("u1")
+    monkeypatch.setattr(main, "_rate_limit_buckets", {})
+    monkeypatch.setattr(main, "_household_by_uid", {})
+    calls = []
+    profile_reads = []
+    get_barrier = threading.Barrier(2, timeout=5)
+    monkeypatch.setattr(main, "_read_user_profile", lambda uid: profile_reads.append(uid) or {"householdId": "h1"})
+
+    def route(req):
+        calls.append((req.method, req.path, req.headers.get("Authorization")))
+        if req.path == "/api/broken":
+            raise RuntimeError("handler failed")
+        if req.path == "/api/photo":
+            return https_fn.Response(status=200, response=b"\x89PNG", mimetype="image/png")
+        if req.method == "GET" and req.path.startswith("/api/concurrent"):
+            get_barrier.wait() # Both GETs of the stage must be in flight together
+        profile = main.get_user_data_from_firestore("u1")
+        return https_fn.Response(status=201 if req.method == "POST" else 200, response=json.dumps({"success": True, "data": {"path": req.path, "householdId": profile["householdId"], "body": req.get_json(silent=True)}}), mimetype="application/json")
+
+    monkeypatch.setattr(main, "_route_api_request", route)
+    return calls, profile_reads
+
+
+def test_responses_come_back_in_request_order(routed):
+    calls, profile_reads = routed
+    response = main._batch_requests_logic(batch([
+        {"id": "a", "path": "/api/concurrent/a"},
+        {"id": "b", "path": "/api/concurrent/b"},
+        {"id": "write", "method": "post", "path": "/api/items", "body": {"name": "Tent"}},
+        {"path": "/api/rooms"},
+        {"id": "photo", "path": "/api/photo"},
+    ]))
+
+    assert response.status_code == 200
+    responses = response_json(response)["data"]["responses"]
+    assert [(entry["id"], entry["status"]) for entry in responses] == [("a", 200), ("b", 200), ("write", 201), ("3", 200), ("photo", 415)]
+    assert responses[2]["body"]["data"]["body"] == {"name": "Tent"}
+    assert responses[4]["body"]["error"]["code"] == "UNSUPPORTED_SUBREQUEST"
+    assert calls[2] == ("POST", "/api/items", "Bearer token-u1")
+    assert {call[1] for call in calls[:2]} == {"/api/concurrent/a", "/api/concurrent/b"}
+    # One read for the first stage, and one more since the write may have changed the profile
+    assert profile_reads == ["u1", "u1"]
+
+
+def test_each_sub_request_is_charged(routed, monkeypatch):
+    calls, _ = routed
+    monkeypatch.setattr(main, "RATE_LIMIT_USER_CAPACITY", 2)
+    response = main._batch_requests_logic(batch([{"method": "POST", "path": f"/api/items/{n}"} for n in range(4)]))
+
+    responses = response_json(response)["data"]["responses"]
+    assert [entry["status"] for entry in responses] == [201, 201, 429, 429]
+    assert responses[2]["body"]["error"]["code"] == "RATE_LIMITED"
+    assert len(calls) == 2
+
+
+def test_failing_sub_request_becomes_an_error_entry(routed):
+    response = main._batch_requests_logic(batch([{"id": "a", "path": "/api/broken"}, {"id": "b", "path": "/api/rooms"}]))
+    assert response.status_code == 200
+    responses = response_json(response)["data"]["responses"]
+    assert [(entry["id"], entry["status"]) for entry in responses] == [("a", 500), ("b", 200)]
+    assert responses[0]["body"]["error"]["code"] == "INTERNAL_SERVER_ERROR"
@@ -0,0 +1,77 @@
+import pytest
+from conftest import make_request, response_json
+
+import main
+
+ROOMS = {"r1": {"name": "Garage", "nBins": 4}}
+
+
+@pytest.mark.parametrize("payload, code", [
+    ({"name": "Tent", "status": "OUT", "isPrivate": True, "location": {"roomId": "r1", "binNumber": 4}}, None),
+    ({"expiresAt": None}, None),
+    ({"name": "  "}, "INVALID_NAME"),
+    ({"status": "LOST"}, "INVALID_STATUS"),
+    ({"isPrivate": "yes"}, "INVALID_ISPRIVATE"),
+    ({"expiresAt": "soon"}, "INVALID_EXPIRES_AT"),
+    ({"location": {"roomId": "r1"}}, "INVALID_LOCATION_FORMAT"),
+    ({"location": {"roomId": "r1", "binNumber": 0}}, "INVALID_BIN_NUMBER"),
+    ({"location": {"roomId": "r9", "binNumber": 1}}, "ROOM_NOT_FOUND"),
+    ({"location": {"roomId": "r1", "binNumber": 5}}, "BIN_NUMBER_OUT_OF_RANGE"),
+])
+def test_validate_item_update(payload, code):
+    error = main._validate_item_update(payload, ROOMS)
+    assert (error[0] if error else None) == code
+
+
+def test_commit_in_chunks_reports_failed_keys(fake_db, monkeypatch):
+    batch_type = type(fake_db.batch())
+    commit = batch_type.commit
+
+    def commit_unless_k3(batch):
+        if any(path == "c/k3" for _, path, _, _ in batch.writes):
+            raise RuntimeError("commit failed")
+        return commit(batch)
+
+    monkeypatch.setattr(batch_type, "commit", commit_unless_k3)
+    fake_db.batches.clear()
+    collection = fake_db.collection("c")
+    writes = [(f"k{n}", lambda batch, n=n: batch.set(collection.document(f"k{n}"), {})) for n in range(5)]
+    chunk_keys = []
+
+    failed = main._commit_in_chunks(fake_db, writes, chunk_size=2, on_chunk=lambda batch, keys: chunk_keys.append(keys))
+
+    assert failed == ["k2", "k3"]
+    assert sorted(chunk_keys) == [["k0", "k1"], ["k2", "k3"], ["k4"]]
+    assert sorted(len(batch.writes) for batch in fake_db.batches) == [1, 2, 2]
+
+
+def test_batch_update_reports_each_operation(fake_db, monkeypatch, user):
+    user("u1", householdId="h1")
+    monkeypatch.setattr(main, "get_household_id_for_request", lambda req, verify=False: "h1")
+    monkeypatch.setattr(main, "note_household_write", lambda household_id: None)
+    fake_db.docs["households/h1/rooms/r1"] = ROOMS["r1"]
+    for item_id, data in {"a": {}, "b": {}, "c": {}, "secret": {"isPrivate": True, "creatorUserId": "u2"}}.items():
+        fake_db.docs[f"items/{item_id}"] = {"name": item_id, "householdId": "h1", "status": "STORED", "isPrivate": False, "creatorUserId": "u1", **data}
+
+    response = main._batch_update_items_logic(make_request("POST", "/api/items:batchUpdate", json_body={"operations": [
+        {"id": "a", "update": {"status": "OUT", "location": {"roomId": "r1", "binNumber": 2}}},
+        {"id": "b", "delete": True},
+        {"id": "a", "delete": True},
+        {"id": "secret", "update": {"status": "OUT"}},
+        {"id": "gone", "delete": True},
+        {"id": "b2"},
+        {"id": "c", "update": {"status": "LOST"}},
+    ]}))
+
+    results = response_json(response)["data"]["results"]
+    assert [(result["id"], result["status"], (result["error"] or {}).get("code")) for result in results] == [
+        ("a", "UPDATED", None),
+        ("b", "DELETED", None),
+        ("a", "ERROR", "DUPLICATE_ITEM_ID"),
+        ("secret", "ERROR", "FORBIDDEN"),
+        ("gone", "ERROR", "ITEM_NOT_FOUND"),
+        ("b2", "ERROR", "NO_UPDATE_FIELDS"),
+        ("c", "ERROR", "INVALID_STATUS"),
+    ]
+    writes = [(op, path) for batch in fake_db.batches for op, path, _, _ in batch.writes if path.startswith("items/")]
+    assert sorted(writes) == [("delete", "items/b"), ("update", "items/a")]
@@ -0,0 +1,78 @@
+import pytest
+
+from conftest import FakeSnapshot
+
+import main
+
+
+def at(room_id, bin_number):
+    return {"name": "Tent", "location": {"roomId": room_id, "binNumber": bin_number}}
+
+
+def index_updates(batch):
+    """Maps (room, bin, "ArrayUnion"/"ArrayRemove") to the item IDs written."""
+    updates = {}
+    for op, path, data, merge in batch.writes:
+        assert (op, merge) == ("set", True)
+        for bin_key, entry in data["bins"].items():
+            updates[(path.rsplit("/", 1)[-1], bin_key, type(entry["itemIds"]).__name__)] = entry["itemIds"].values
+    return updates
+
+
+def test_bin_index_writes_group_changes_by_room(fake_db):
+    batch = fake_db.batch()
+    changes = [
+        ("a", None, at("r1", 1)),  # created
+        ("b", at("r1", 1), at("r1", 2)),  # moved within the room
+        ("c", at("r1", 2), at("r2", 1)),  # moved to another room
+        ("d", at("r2", 3), None),  # deleted
+        ("e", at("r1", 1), at("r1", 1)),  # unchanged
+        ("f", {"location": {"roomId": "r1", "binNumber": "1"}}, None),  # no valid slot
+    ]
+    assert main.add_bin_index_writes(fake_db, batch, "h1", changes) == 4
+    assert all(path.startswith("households/h1/binIndex/") for _, path, _, _ in batch.writes)
+    assert index_updates(batch) == {
+        ("r1", "1", "ArrayRemove"): ["b"],
+        ("r1", "2", "ArrayRemove"): ["c"],
+        ("r2", "3", "ArrayRemove"): ["d"],
+        ("r1", "1", "ArrayUnion"): ["a"],
+        ("r1", "2", "ArrayUnion"): ["b"],
+        ("r2", "1", "ArrayUnion"): ["c"],
+    }
+
+
+def test_bin_occupancy_lists_every_bin():
+    index_data = {"nBins": 3, "bins": {"2": {"itemIds": ["a", "b"]}, "7": {"itemIds": ["c"]}}}
+    assert main.bin_occupancy(index_data) == [
+        {"binNumber": 1, "count": 0, "itemIds": []},
+        {"binNumber": 2, "count": 2, "itemIds": ["a", "b"]},
+        {"binNumber": 3, "count": 0, "itemIds": []},
+    ]
+
+
+def test_missing_index_is_rebuilt_in_the_transaction(fake_db, monkeypatch):
+    fake_db.docs["households/h1/rooms/r1"] = {"name": "Garage", "nBins": 4}
+    # An item written before the index was built leaves a partial index doc behind
+    fake_db.docs["households/h1/binIndex/r1"] = {"roomId": "r1", "bins": {"1": {"itemIds": ["a"]}}}
+    items = [FakeSnapshot(fake_db.collection("items").document(item_id), at("r1", bin_number)) for item_id, bin_number in (("a", 1), ("b", 1), ("c", 4))]
+    streamed = []
+    monkeypatch.setattr(main, "stream_household_items", lambda household_id, room_id=None, transaction=None: streamed.append(transaction) or items)
+    transaction = fake_db.batch()
+
+    index_data = main._load_bin_index_in(transaction, "h1", "r1")
+
+    assert index_data == {"roomId": "r1", "nBins": 4, "built": True, "bins": {"1": {"itemIds": ["a", "b"]}, "4": {"itemIds": ["c"]}}}
+    assert streamed == [transaction]
+    assert transaction.writes == [("set", "households/h1/binIndex/r1", index_data, False)]
+
+
+def test_built_index_is_not_rebuilt(fake_db, monkeypatch):
+    fake_db.docs["households/h1/binIndex/r1"] = {"roomId": "r1", "nBins": 2, "built": True, "bins": {}}
+    monkeypatch.setattr(main, "stream_household_items", lambda *args, **kwargs: pytest.fail("rebuilt a built index"))
+    transaction = fake_db.batch()
+    assert main._load_bin_index_in(transaction, "h1", "r1")["nBins"] == 2
+    assert transaction.writes == []
+
+
+def test_index_of_missing_room_is_none(fake_db):
+    assert main._load_bin_index_in(fake_db.batch(), "h1", "missing") is None
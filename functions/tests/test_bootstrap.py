@@ -0,0 +1,58 @@
+import pytest
+from conftest import make_request, response_json
+
+import main
+
+
+@pytest.mark.parametrize("rooms, code", [
+    ([], None),
+    ([{"name": "Garage", "nBins": 16}], None),
+    ({"name": "Garage", "nBins": 16}, "INVALID_ROOMS"),
+    ([{"name": " ", "nBins": 2}], "MISSING_FIELDS"),
+    (["Garage"], "MISSING_FIELDS"),
+    ([{"name": "Garage", "nBins": 0}], "INVALID_NBINS"),
+    ([{"name": "Garage", "nBins": True}], "INVALID_NBINS"),
+    ([{"name": "Garage", "nBins": "4"}], "INVALID_NBINS"),
+    ([{"name": "Room", "nBins": 1}] * (main.BOOTSTRAP_MAX_ROOMS + 1), "TOO_MANY_ROOMS"),
+])
+def test_validate_rooms_payload(rooms, code):
+    error = main._validate_rooms_payload(rooms)
+    assert (error[0] if error else None) == code
+
+
+def test_bootstrap_writes_everything_in_one_batch(fake_db, monkeypatch, user):
+    user("u1")
+    fake_db.docs["users/u1"] = {"email": "u1@example.com"}
+    claims = []
+    monkeypatch.setattr(main, "set_household_claim", lambda uid, household_id: claims.append((uid, household_id)))
+    monkeypatch.setattr(main, "queue_entity_rename", lambda *args: None)
+
+    response = main._bootstrap_household_logic(make_request("POST", "/api/households:bootstrap", json_body={
+        "name": " Home ", "rooms": [{"name": "Garage", "nBins": 16}, {"name": "Attic ", "nBins": 4}],
+    }))
+
+    assert response.status_code == 201
+    data = response_json(response)["data"]
+    assert data["name"] == "Home"
+    assert [(room["name"], room["nBins"]) for room in data["rooms"]] == [("Garage", 16), ("Attic", 4)]
+    [batch] = fake_db.batches
+    assert batch.committed
+    assert [(op, path.split("/")[0]) for op, path, _, _ in batch.writes] == [("set", "households"), ("update", "users"), ("set", "households"), ("set", "households")]
+    assert claims == [("u1", data["id"])]
+
+
+def test_bootstrap_rejects_a_user_with_a_household(fake_db, user):
+    user("u1", householdId="h1")
+    response = main._bootstrap_household_logic(make_request("POST", "/api/households:bootstrap", json_body={"name": "Home"}))
+    assert response.status_code == 400
+    assert response_json(response)["error"]["code"] == "ALREADY_IN_HOUSEHOLD"
+    assert fake_db.batches == []
+
+
+def test_bootstrap_invalid_rooms_write_nothing(fake_db, user):
+    user("u1")
+    fake_db.docs["users/u1"] = {"email": "u1@example.com"}
+    response = main._bootstrap_household_logic(make_request("POST", "/api/households:bootstrap", json_body={"name": "Home", "rooms": [{"name": "Garage"}]}))
+    assert response.status_code == 400
+    assert response_json(response)["error"]["code"] == "INVALID_NBINS"
+    assert fake_db.batches == []
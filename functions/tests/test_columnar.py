@@ -0,0 +1,63 @@
+import json
+
+from conftest import make_request, response_json
+
+import main
+
+
+def decode(encoded):
+    """Mirrors decodeColumnarItems in frontend/src/api/items.ts."""
+    items = []
+    for row in zip(*encoded["columns"]):
+        values = dict(zip(encoded["keys"], row))
+        item = {
+            "id": values["id"],
+            "name": values["name"],
+            "location": {"roomId": encoded["rooms"][values["roomIndex"]], "binNumber": values["binNumber"]},
+            "status": values["status"],
+            "creatorUserId": encoded["creators"][values["creatorIndex"]],
+            "householdId": encoded["householdId"],
+            "isPrivate": values["isPrivate"],
+            "lastUpdated": values["lastUpdated"],
+            "metadata": values["metadata"],
+            "photo": values["photo"],
+        }
+        if values["expiresAt"] is not None:
+            item["expiresAt"] = values["expiresAt"]
+        items.append(item)
+    return items
+
+
+def make_item(n, room_id, creator_id, **extra):
+    return {"id": f"i{n}", "name": f"Item {n}", "location": {"roomId": room_id, "binNumber": n}, "status": "STORED",
+            "creatorUserId": creator_id, "householdId": "h1", "isPrivate": False, "lastUpdated": "2025-01-01T00:00:00+00:00",
+            "metadata": None, "photo": None, **extra}
+
+
+def test_columnar_round_trips_items():
+    items = [make_item(1, "r1", "u1"), make_item(2, "r2", "u1", expiresAt="2025-02-01T00:00:00+00:00"), make_item(3, "r1", "u2", isPrivate=True, metadata={"color": "red"})]
+    encoded = main.encode_items_columnar(items, "h1")
+    assert decode(json.loads(json.dumps(encoded))) == items
+
+
+def test_columnar_interns_rooms_and_creators():
+    items = [make_item(n, f"r{n % 2}", f"u{n % 3}") for n in range(6)]
+    encoded = main.encode_items_columnar(items, "h1")
+    columns = dict(zip(encoded["keys"], encoded["columns"]))
+    assert encoded["count"] == 6
+    assert encoded["rooms"] == ["r0", "r1"]
+    assert encoded["creators"] == ["u0", "u1", "u2"]
+    assert columns["roomIndex"] == [0, 1, 0, 1, 0, 1]
+    assert columns["creatorIndex"] == [0, 1, 2, 0, 1, 2]
+
+
+def test_columnar_of_no_items():
+    encoded = main.encode_items_columnar([], None)
+    assert encoded["count"] == 0
+    assert encoded["columns"] == [[] for _ in main.COLUMNAR_ITEM_KEYS]
+
+
+def test_unknown_format_is_rejected():
+    response = main._get_items_logic(make_request("GET", "/api/items?format=csv"))
+    assert response.status_code == 400
+    assert response_json(response)["error"]["code"] == "INVALID_FORMAT"
@@ -0,0 +1,72 @@
+import gzip
+import json
+import zlib
+
+import pytest
+from conftest import make_request
+from firebase_functions import https_fn
+
+import main
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("", None),
+    ("gzip", "gzip"),
+    ("gzip;q=0", None),
+    ("identity", None),
+    ("deflate, gzip;q=0.5", "gzip"),
+    ("*", "gzip"),
+    ("*;q=0", None),
+    ("gzip;q=bad", None),
+])
+def test_negotiate_encoding_without_brotli(monkeypatch, header, expected):
+    monkeypatch.setattr(main, "brotli", None)
+    assert main._negotiate_encoding(header) == expected
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, br", "br"),
+    ("br;q=0.5, gzip", "gzip"),
+    ("br;q=0, gzip;q=0.1", "gzip"),
+    ("*", "br"),
+])
+def test_negotiate_encoding_prefers_brotli_on_ties(monkeypatch, header, expected):
+    monkeypatch.setattr(main, "brotli", object())
+    assert main._negotiate_encoding(header) == expected
+
+
+def json_response(body, status=200):
+    return https_fn.Response(status=status, response=json.dumps(body), mimetype="application/json")
+
+
+def test_large_body_is_gzipped(monkeypatch):
+    monkeypatch.setattr(main, "brotli", None)
+    body = {"items": [{"name": f"item {n}"} for n in range(200)]}
+    response = main.compress_response(make_request("GET", "/api/items", headers={"Accept-Encoding": "gzip"}), json_response(body))
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.vary
+    assert json.loads(gzip.decompress(response.get_data())) == body
+
+
+@pytest.mark.parametrize("response", [
+    json_response({"ok": True}),
+    json_response({"items": ["x" * 100] * 50}, status=304),
+    https_fn.Response(status=200, response=b"\x89PNG" * 1000, mimetype="image/png"),
+])
+def test_small_or_uncompressible_bodies_are_left_alone(response):
+    before = response.get_data()
+    response = main.compress_response(make_request("GET", "/api/items", headers={"Accept-Encoding": "gzip"}), response)
+    assert "Content-Encoding" not in response.headers
+    assert response.get_data() == before
+
+
+def test_streamed_body_is_compressed_incrementally(monkeypatch):
+    monkeypatch.setattr(main, "brotli", None)
+    rows = [f"row {n}\n" for n in range(500)]
+    response = https_fn.Response(iter(rows), mimetype="text/csv")
+    response.headers["Content-Length"] = "1"
+    response = main.compress_response(make_request("GET", "/api/items/export", headers={"Accept-Encoding": "gzip"}), response)
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    assert zlib.decompress(b"".join(response.response), 31).decode() == "".join(rows)
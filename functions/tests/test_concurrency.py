@@ -0,0 +1,76 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import flask
+import pytest
+from conftest import response_json
+
+import main
+
+
+@pytest.fixture
+def profiles(monkeypatch):
+    """Serves profiles for any uid, slowly, so concurrent requests interleave."""
+    def verify_id_token(id_token):
+        time.sleep(0.001)
+        return {"uid": id_token.removeprefix("token-")}
+
+    def read_user_profile(user_id):
+        time.sleep(0.002)
+        return {"email": f"{user_id}@example.com", "householdId": None}
+
+    monkeypatch.setattr(main.auth, "verify_id_token", verify_id_token)
+    monkeypatch.setattr(main, "_read_user_profile", read_user_profile)
+    monkeypatch.setattr(main, "USAGE_METERING_ENABLED", False)
+    monkeypatch.setattr(main, "RATE_LIMIT_USER_CAPACITY", 1000)
+    monkeypatch.setattr(main, "_rate_limit_buckets", {})
+
+
+app = flask.Flask(__name__)
+
+
+def get_profile(uid: str):
+    # Calls the deployed entry point, whose CORS wrapper needs the request context the functions framework provides
+    with app.test_request_context("/api/profile", method="GET", headers={"Authorization": f"Bearer token-{uid}"}):
+        response = main.api(flask.request._get_current_object())
+    return uid, response.status_code, response_json(response)["data"]["email"]
+
+
+def test_concurrent_requests_keep_their_own_user(profiles):
+    uids = [f"user{n % 24}" for n in range(400)]
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(get_profile, uids))
+
+    assert [status for _, status, _ in results] == [200] * len(uids)
+    assert [email for _, _, email in results] == [f"{uid}@example.com" for uid in uids]
+
+
+def test_request_user_does_not_outlive_the_request(profiles):
+    # Worker threads are reused; a later request on the same thread must not see the earlier user
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        executor.submit(get_profile, "user1").result()
+        assert executor.submit(main.current_user).result() is None
+
+
+def test_handler_keeps_the_framework_context(profiles, monkeypatch):
+    monkeypatch.setattr(main, "_route_api_request", lambda req: main.https_fn.Response(status=200, response=flask.current_app.name, mimetype="text/plain"))
+    with app.test_request_context("/api/profile", method="GET"):
+        response = main.api(flask.request._get_current_object())
+    assert response.get_data(as_text=True) == app.name
+
+
+def test_db_client_is_created_once(monkeypatch):
+    created = []
+
+    def client():
+        time.sleep(0.01)
+        created.append(object())
+        return created[-1]
+
+    monkeypatch.setattr(main, "db", None)
+    monkeypatch.setattr(main.firestore, "client", client)
+    monkeypatch.setattr(main.firebase_admin, "_apps", {"[DEFAULT]": object()})
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        clients = list(executor.map(lambda _: main.get_db(), range(8)))
+
+    assert len(created) == 1 and all(db is created[0] for db in clients)
@@ -0,0 +1,125 @@
+import importlib.util
+import json
+import os
+import threading
+import time
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+from conftest import FakeSnapshot, make_request
+
+import main
+
+STUB_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "scripts", "dialogflow_entity_stub.py")
+
+
+def test_private_items_have_no_entity_name():
+    assert main.entity_item_name({"name": "Tent", "isPrivate": False}) == "Tent"
+    assert main.entity_item_name({"name": "Diary", "isPrivate": True}) is None
+    assert main.entity_item_name(None) is None
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """Runs scripts/dialogflow_entity_stub.py on a free port and points the sync at it."""
+    spec = importlib.util.spec_from_file_location("dialogflow_entity_stub", STUB_PATH)
+    stub_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(stub_module)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), stub_module.StubHandler)
+    server.RequestHandlerClass.log_message = lambda *args: None
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    monkeypatch.setattr(main, "DIALOGFLOW_ENTITY_SYNC_ENABLED", True)
+    monkeypatch.setattr(main, "DIALOGFLOW_API_URL", f"{base_url}/v2")
+    monkeypatch.setattr(main, "DIALOGFLOW_SYNC_INTERVAL_SEC", 0.5)
+    monkeypatch.setattr(main, "_entity_client", None)
+    monkeypatch.setattr(main, "_entity_pending", {})
+    monkeypatch.setattr(main, "_entity_sync_thread", None)
+    monkeypatch.setattr(main, "_entity_value_in_use", lambda entity_type, value: False)
+
+    def entities():
+        with urllib.request.urlopen(f"{base_url}/stub/entities") as response:
+            return json.loads(response.read())
+
+    yield entities
+    server.shutdown()
+
+
+def wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+class FilteringQuery:
+    """Applies equality filters to a list of document data dicts."""
+
+    def __init__(self, docs: list):
+        self.docs = docs
+
+    def where(self, filter):
+        return FilteringQuery([data for data in self.docs if data.get(filter.field_path) == filter.value])
+
+    def limit(self, count):
+        return FilteringQuery(self.docs[:count])
+
+    def stream(self):
+        return iter(self.docs)
+
+
+def test_entity_value_in_use_ignores_case(fake_db, monkeypatch):
+    items = [
+        {"name": "drill", "nameLower": "drill", "isPrivate": False},
+        {"name": "Diary", "nameLower": "diary", "isPrivate": True},
+        {"name": "Saw", "isPrivate": False}, # Written before nameLower existed
+    ]
+    monkeypatch.setattr(fake_db, "collection_group", lambda name: FilteringQuery(items if name == "items" else []))
+    assert main._entity_value_in_use(main.ENTITY_ITEM_NAME, "Drill")
+    assert not main._entity_value_in_use(main.ENTITY_ITEM_NAME, "diary")
+    assert main._entity_value_in_use(main.ENTITY_ITEM_NAME, "Saw")
+    assert not main._entity_value_in_use(main.ENTITY_ROOM_NAME, "Drill")
+
+
+def test_item_renames_store_the_name_key(fake_db):
+    batch = fake_db.batch()
+    item_doc = FakeSnapshot(main.legacy_items_collection().document("i1"), {"name": "Tent"})
+    main.add_item_update(batch, item_doc, "h1", {"name": "Big  Drill", "status": "OUT"})
+    [(_, _, data, _)] = batch.writes
+    assert data["nameLower"] == "big drill"
+
+
+def test_debounced_flush_applies_the_net_changes(stub):
+    main.queue_entity_rename(main.ENTITY_ITEM_NAME, None, "Tent")
+    main.queue_entity_rename(main.ENTITY_ITEM_NAME, "Tent", "Big  tent")
+    main.queue_entity_rename(main.ENTITY_ITEM_NAME, None, "Lamp")
+    main.queue_entity_rename(main.ENTITY_ITEM_NAME, "Lamp", None)
+    main.queue_entity_rename(main.ENTITY_ITEM_NAME, None, main.entity_item_name({"name": "Diary", "isPrivate": True}))
+    main.queue_entity_rename(main.ENTITY_ROOM_NAME, None, "Garage")
+    # Nothing is sent until the background thread's interval elapses
+    assert stub() == {}
+
+    wait_for(lambda: stub() == {"ItemName": ["Big tent"], "RoomName": ["Garage"]})
+
+    main.queue_entity_rename(main.ENTITY_ITEM_NAME, "Big tent", None)
+    wait_for(lambda: stub()["ItemName"] == [])
+
+
+def test_room_delete_retires_its_item_names(fake_db, monkeypatch, user):
+    user("u1", householdId="h1")
+    items = [
+        FakeSnapshot(fake_db.collection("items").document(item_id), {"name": name, "isPrivate": private, "householdId": "h1"})
+        for item_id, name, private in (("i1", "Tent", False), ("i2", "Diary", True))
+    ]
+    monkeypatch.setattr(main, "stream_household_items", lambda household_id, room_id=None: items)
+    monkeypatch.setattr(main, "note_household_write", lambda household_id: None)
+    monkeypatch.setattr(main, "DIALOGFLOW_ENTITY_SYNC_ENABLED", False)  # Skips the room name read
+    queued = []
+    monkeypatch.setattr(main, "queue_entity_rename", lambda entity_type, before, after: queued.append((entity_type, before, after)))
+
+    assert main._delete_room_logic(make_request("DELETE", "/api/households/h1/rooms/r1"), household_id="h1", room_id="r1").status_code == 200
+
+    assert (main.ENTITY_ITEM_NAME, "Tent", None) in queued
+    assert all(before != "Diary" for _, before, _ in queued)
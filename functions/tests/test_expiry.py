@@ -0,0 +1,65 @@
+import datetime
+
+import pytest
+from conftest import FakeSnapshot, make_request, response_json
+
+import main
+
+NOW = datetime.datetime(2026, 10, 19, 6, tzinfo=datetime.timezone.utc)
+UTC = datetime.timezone.utc
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, None),
+    ("2026-11-01", datetime.datetime(2026, 11, 1, tzinfo=UTC)),
+    (" 2026-11-01T08:30:00 ", datetime.datetime(2026, 11, 1, 8, 30, tzinfo=UTC)),
+    ("2026-11-01T08:30:00+02:00", datetime.datetime(2026, 11, 1, 6, 30, tzinfo=UTC)),
+])
+def test_parse_expires_at(value, expected):
+    assert main.parse_expires_at(value) == expected
+
+
+@pytest.mark.parametrize("value", ["", "  ", "next week", "2026-13-01", 20261101])
+def test_parse_expires_at_rejects_invalid_values(value):
+    with pytest.raises(ValueError):
+        main.parse_expires_at(value)
+
+
+def expiring_item(collection, item_id: str, days: int, now: datetime.datetime = NOW, **data):
+    return FakeSnapshot(collection.document(item_id), {"name": item_id, "householdId": "h1", "isPrivate": False, "creatorUserId": "u1", "expiresAt": now + datetime.timedelta(days=days), **data})
+
+
+def test_sweep_counts_dual_layout_items_once(fake_db):
+    scoped = fake_db.collection("households").document("h1").collection("items")
+    fake_db.group_docs["items"] = [expiring_item(fake_db.collection("items"), "i1", 1), expiring_item(scoped, "i1", 1), expiring_item(scoped, "i2", 2)]
+
+    summary = main.sweep_expiring_items(NOW)
+
+    assert summary["expiringItems"] == 2
+    digest = fake_db.batches[0].writes[0][2]
+    assert [item["itemId"] for item in digest["items"]] == ["i1", "i2"]
+    assert (digest["count"], digest["publicCount"], digest["privateCounts"]) == (2, 2, {})
+
+
+def test_truncated_digest_counts_only_visible_items(fake_db, monkeypatch, user):
+    monkeypatch.setattr(main, "EXPIRY_DIGEST_MAX_ITEMS", 2)
+    now = datetime.datetime.now(UTC)
+    items = fake_db.collection("households").document("h1").collection("items")
+    fake_db.group_docs["items"] = [
+        expiring_item(items, "public1", 1, now),
+        expiring_item(items, "secret1", 1, now, isPrivate=True, creatorUserId="u2"),
+        expiring_item(items, "secret2", 2, now, isPrivate=True, creatorUserId="u2"),
+        expiring_item(items, "mine", 2, now, isPrivate=True, creatorUserId="u1"),
+        expiring_item(items, "public2", 3, now),
+    ]
+    main.sweep_expiring_items(now)
+    for _, path, data, _ in fake_db.batches[0].writes:
+        fake_db.docs[path] = data
+    user("u1", householdId="h1")
+
+    digest = response_json(main._get_expiry_digest_logic(make_request("GET", "/api/households/h1/expiryDigest"), "h1"))["data"]
+
+    assert [item["itemId"] for item in digest["items"]] == ["public1"]
+    # public1, public2 and mine, but not u2's private items
+    assert (digest["count"], digest["truncated"]) == (3, True)
+    assert "privateCounts" not in digest and "publicCount" not in digest
@@ -0,0 +1,46 @@
+import threading
+
+import main
+
+
+def test_claim_is_used_without_reading_the_profile(user, monkeypatch):
+    user("u1", householdId="h1")
+    monkeypatch.setattr(main, "get_user_data_from_firestore", lambda uid: (_ for _ in ()).throw(AssertionError("profile read")))
+    assert main.get_household_id_for_request(None) == "h1"
+
+
+def test_missing_claim_is_synced_once_in_the_background(user, monkeypatch):
+    user("u2")
+    monkeypatch.setattr(main, "get_user_data_from_firestore", lambda uid: {"householdId": "h2"})
+    monkeypatch.setattr(main, "_claim_synced", {})
+    calls = []
+    synced = threading.Event()
+
+    def fake_set_household_claim(user_id, household_id):
+        calls.append((user_id, household_id))
+        synced.set()
+        return True
+
+    monkeypatch.setattr(main, "set_household_claim", fake_set_household_claim)
+    for _ in range(5):
+        assert main.get_household_id_for_request(None) == "h2"
+    assert synced.wait(5)
+    assert calls == [("u2", "h2")]
+
+
+def test_changed_household_is_synced_again(monkeypatch):
+    monkeypatch.setattr(main, "_claim_synced", {"u3": "old"})
+    calls = []
+    done = threading.Event()
+    monkeypatch.setattr(main, "set_household_claim", lambda user_id, household_id: (calls.append(household_id), done.set()))
+    main.schedule_household_claim_sync("u3", "old")
+    main.schedule_household_claim_sync("u3", "new")
+    assert done.wait(5)
+    assert calls == ["new"]
+
+
+def test_failed_claim_update_forgets_the_memo(monkeypatch):
+    monkeypatch.setattr(main, "_claim_synced", {"u4": "h4"})
+    monkeypatch.setattr(main.auth, "get_user", lambda uid: (_ for _ in ()).throw(RuntimeError("unavailable")))
+    assert main.set_household_claim("u4", "h4") is False
+    assert "u4" not in main._claim_synced
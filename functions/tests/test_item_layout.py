@@ -0,0 +1,60 @@
+from conftest import FakeSnapshot, make_request, response_json
+
+import main
+
+
+def item(db, path: str, **data):
+    ref = db.collection(path.split("/", 1)[0])
+    for segment in path.split("/")[1:]:
+        ref = ref.document(segment) if hasattr(ref, "document") else ref.collection(segment)
+    return FakeSnapshot(ref, {"name": "Tent", "householdId": "h1", **data})
+
+
+def test_dual_layout_update_moves_legacy_item(fake_db, monkeypatch):
+    monkeypatch.setattr(main, "ITEMS_LAYOUT", "dual")
+    legacy = item(fake_db, "items/i1", expiresAt="2026-01-01")
+    batch = fake_db.batch()
+    target = main.add_item_update(batch, legacy, "h1", {"status": "OUT", "expiresAt": main.firestore.DELETE_FIELD})
+    assert target.path == "households/h1/items/i1"
+    assert batch.writes == [
+        ("set", "households/h1/items/i1", {"name": "Tent", "householdId": "h1", "status": "OUT"}, False),
+        ("delete", "items/i1", None, False),
+    ]
+
+
+def test_scoped_update_stays_in_place(fake_db, monkeypatch):
+    monkeypatch.setattr(main, "ITEMS_LAYOUT", "dual")
+    scoped = item(fake_db, "households/h1/items/i1")
+    batch = fake_db.batch()
+    assert main.add_item_update(batch, scoped, "h1", {"status": "OUT"}) is scoped.reference
+    assert batch.writes == [("update", "households/h1/items/i1", {"status": "OUT"}, False)]
+
+
+def test_dual_layout_delete_removes_both_copies(fake_db, monkeypatch):
+    monkeypatch.setattr(main, "ITEMS_LAYOUT", "dual")
+    batch = fake_db.batch()
+    main.add_item_delete(batch, item(fake_db, "items/i1"), "h1")
+    assert [(op, path) for op, path, _, _ in batch.writes] == [("delete", "items/i1"), ("delete", "households/h1/items/i1")]
+
+
+def test_room_delete_stays_under_the_batch_limit(fake_db, monkeypatch, user):
+    monkeypatch.setattr(main, "ITEMS_LAYOUT", "dual")
+    user("u1", householdId="h1")
+    docs = [item(fake_db, f"items/i{n}", location={"roomId": "r1", "binNumber": 1}) for n in range(400)]
+    monkeypatch.setattr(main, "stream_household_items", lambda household_id, room_id=None: docs)
+    monkeypatch.setattr(main, "note_household_write", lambda household_id: None)
+
+    response = main._delete_room_logic(make_request("DELETE", "/api/households/h1/rooms/r1"), household_id="h1", room_id="r1")
+
+    assert response.status_code == 200, response_json(response)
+    assert all(len(batch.writes) <= main.FIRESTORE_BATCH_LIMIT for batch in fake_db.batches)
+    deleted = [path for batch in fake_db.batches for op, path, _, _ in batch.writes if op == "delete"]
+    assert len(deleted) == 400 * 3 + 2
+    assert sum(path.startswith("households/h1/itemStats/") for path in deleted) == 400
+    # Every item gets a DELETED event and rollup counts, like a single delete
+    events = [data for batch in fake_db.batches for _, path, data, _ in batch.writes if path.startswith("households/h1/activity/")]
+    assert sorted(event["itemId"] for event in events) == sorted(f"i{n}" for n in range(400))
+    assert {event["type"] for event in events} == {"DELETED"}
+    assert any(path.startswith("households/h1/activityDaily/") for batch in fake_db.batches for _, path, _, _ in batch.writes)
+    # The room goes last, so a failed chunk leaves it in place for a retry
+    assert fake_db.batches[-1].writes[0][1] == "households/h1/rooms/r1"
@@ -0,0 +1,70 @@
+import importlib.util
+import os
+
+import pytest
+
+LOADTEST_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "scripts", "loadtest.py")
+spec = importlib.util.spec_from_file_location("loadtest", LOADTEST_PATH)
+loadtest = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(loadtest)
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, {"reads": 0, "writes": 0, "deletes": 0}),
+    ("reads=3,writes=2", {"reads": 3, "writes": 2, "deletes": 0}),
+    ("reads=3, deletes=1, requests=9, writes=x", {"reads": 3, "writes": 0, "deletes": 1}),
+])
+def test_parse_ops(header, expected):
+    assert loadtest.parse_ops(header) == expected
+
+
+def test_parse_mix():
+    assert loadtest.parse_mix("dashboard=3, move") == {"dashboard": 3.0, "move": 1.0}
+    assert set(loadtest.parse_mix(loadtest.DEFAULT_MIX)) == set(loadtest.SCENARIOS)
+    with pytest.raises(ValueError):
+        loadtest.parse_mix("dashboard=1,unknown=2")
+
+
+@pytest.mark.parametrize("fraction, expected", [(0.0, 1), (0.5, 6), (0.9, 10), (1.0, 11)])
+def test_percentile(fraction, expected):
+    assert loadtest.percentile(list(range(1, 12)), fraction) == expected
+
+
+def test_percentile_of_no_samples():
+    assert loadtest.percentile([], 0.5) == 0.0
+
+
+def test_summarize():
+    ops = {"reads": 2, "writes": 1, "deletes": 0}
+    results = loadtest.summarize({"move": [(0.010, True, ops), (0.030, False, ops), (0.020, True, ops)], "room_delete": []}, elapsed=2.0)
+    assert list(results) == ["move"]
+    assert results["move"] == {"runs": 3, "throughputPerSec": 1.5, "errorRate": 0.3333, "p50Ms": 20.0, "p95Ms": 30.0, "p99Ms": 30.0,
+                               "maxMs": 30.0, "opsPerRun": {"reads": 2.0, "writes": 1.0, "deletes": 0.0}}
+
+
+def result(p95=100.0, reads=10.0, throughput=50.0, error_rate=0.0):
+    return {"p50Ms": 50.0, "p95Ms": p95, "p99Ms": 150.0, "throughputPerSec": throughput, "errorRate": error_rate,
+            "opsPerRun": {"reads": reads, "writes": 2.0, "deletes": 0.0}}
+
+
+def test_compare_to_baseline_within_tolerance():
+    baseline = {"scenarios": {"dashboard": result()}}
+    assert loadtest.compare_to_baseline({"dashboard": result(p95=109.0, reads=11.0, throughput=46.0), "move": result(p95=999.0)}, baseline, 0.1) == []
+
+
+def test_compare_to_baseline_reports_regressions():
+    baseline = {"scenarios": {"dashboard": result()}}
+    regressions = loadtest.compare_to_baseline({"dashboard": result(p95=120.0, reads=13.0, throughput=40.0, error_rate=0.05)}, baseline, 0.1)
+    assert regressions == [
+        "dashboard: p95Ms 100.0 -> 120.0",
+        "dashboard: reads/run 10.0 -> 13.0",
+        "dashboard: throughputPerSec 50.0 -> 40.0",
+        "dashboard: errorRate 0.0 -> 0.05",
+    ]
+
+
+@pytest.mark.parametrize("value", ["0", "-2"])
+def test_positive_int_rejects_values_below_one(value):
+    with pytest.raises(loadtest.argparse.ArgumentTypeError):
+        loadtest.positive_int(value)
+    assert loadtest.positive_int("3") == 3
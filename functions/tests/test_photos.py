@@ -0,0 +1,102 @@
+import datetime
+import io
+
+import pytest
+from conftest import FakeDocumentRef, FakeQuery, FakeSnapshot, make_request, response_json
+
+import main
+
+PIL = pytest.importorskip("PIL.Image")
+
+
+def png(width: int, height: int) -> bytes:
+    output = io.BytesIO()
+    PIL.new("RGBA", (width, height), (200, 40, 40, 128)).save(output, "PNG")
+    return output.getvalue()
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = main._LocalPhotoStore(str(tmp_path))
+    monkeypatch.setattr(main, "_photo_store", store)
+    return store
+
+
+@pytest.fixture
+def photo_items(monkeypatch):
+    """Records _set_item_photo calls instead of writing items."""
+    updates = []
+    monkeypatch.setattr(main, "_set_item_photo", lambda item_id, household_id, photo, expected_hash=None: updates.append((item_id, photo, expected_hash)) or True)
+    return updates
+
+
+def test_render_fits_each_size():
+    rendered = main._render_photo_sizes(io.BytesIO(png(800, 400)), {"thumbnail": 200, "preview": 1024})
+    sizes = {name: PIL.open(io.BytesIO(jpeg)) for name, jpeg in rendered.items()}
+    assert {name: (image.format, image.size) for name, image in sizes.items()} == {
+        "thumbnail": ("JPEG", (200, 100)),
+        "preview": ("JPEG", (800, 400)),  # Never upscaled
+    }
+
+
+def test_unreadable_photo_is_marked_failed(store):
+    store.write("households/h1/photos/abc/original.png", b"not an image", "image/png")
+    photo = main._render_photo("h1", {"hash": "abc", "original": "households/h1/photos/abc/original.png", "sizes": {}, "status": "PROCESSING"})
+    assert photo["status"] == "FAILED"
+
+
+def test_missing_original_is_marked_failed(store):
+    photo = main._render_photo("h1", {"hash": "abc", "original": "households/h1/photos/abc/original.png", "sizes": {}, "status": "PROCESSING"})
+    assert photo["status"] == "FAILED"
+
+
+def test_upload_renders_before_responding(store, photo_items, monkeypatch, user):
+    user("u1", householdId="h1")
+    previous = {"hash": "old", "original": "households/h1/photos/old/original.png"}
+    store.write(previous["original"], b"old", "image/png")
+    item_doc = FakeSnapshot(FakeDocumentRef("items/i1"), {"name": "Tent", "householdId": "h1", "photo": previous})
+    monkeypatch.setattr(main, "get_household_id_for_request", lambda req: "h1")
+    monkeypatch.setattr(main, "_get_photo_item", lambda req, item_id, household_id: (item_doc, None))
+    monkeypatch.setattr(main, "_photo_in_use", lambda household_id, digest: False)
+
+    response = main._upload_item_photo_logic(make_request("PUT", "/api/items/i1/photo", data=png(640, 480), headers={"Content-Type": "image/png"}), "i1")
+
+    assert response.status_code == 200
+    photo = response_json(response)["data"]
+    assert photo["status"] == "READY" and set(photo["sizes"]) == set(main.PHOTO_SIZES)
+    assert all(store.exists(path) for path in [photo["original"], *photo["sizes"].values()])
+    assert photo_items == [("i1", photo, None)]
+    # The replaced photo is no longer used by any item
+    assert not store.exists(previous["original"])
+
+
+def test_release_keeps_photos_still_in_use(store, monkeypatch):
+    photos = [{"hash": digest, "original": f"households/h1/photos/{digest}/original.jpg"} for digest in ("shared", "orphan")]
+    for photo in photos:
+        for path in (photo["original"], f"households/h1/photos/{photo['hash']}/thumbnail.jpg"):
+            store.write(path, b"x", "image/jpeg")
+    monkeypatch.setattr(main, "_photo_in_use", lambda household_id, digest: digest == "shared")
+
+    assert main.release_item_photos("h1", [*photos, photos[1], None]) == 1
+
+    assert store.exists("households/h1/photos/shared/original.jpg")
+    assert not store.exists("households/h1/photos/orphan/original.jpg")
+    assert not store.exists("households/h1/photos/orphan/thumbnail.jpg")
+
+
+def test_sweep_renders_stale_photos_once_per_hash(store, photo_items, fake_db, monkeypatch):
+    now = datetime.datetime(2026, 10, 19, 12, tzinfo=datetime.timezone.utc)
+    photo = {"hash": "abc", "original": "households/h1/photos/abc/original.png", "sizes": {}, "status": "PROCESSING"}
+    store.write(photo["original"], png(300, 300), "image/png")
+    docs = [FakeSnapshot(FakeDocumentRef(f"items/{item_id}"), {"householdId": "h1", "photo": photo}) for item_id in ("i1", "i2")]
+    query = FakeQuery(docs)
+    monkeypatch.setattr(fake_db, "collection_group", lambda name: query)
+    renders = []
+    real_render = main._render_photo
+    monkeypatch.setattr(main, "_render_photo", lambda *args: renders.append(args[1]["hash"]) or real_render(*args))
+
+    assert main.sweep_stale_photos(now) == {"stale": 2, "READY": 2, "FAILED": 0}
+
+    assert ("photo.uploadedAt", "<", "2026-10-19T11:45:00+00:00") in query.filters
+    assert renders == ["abc"]
+    assert [(item_id, updated["status"], expected_hash) for item_id, updated, expected_hash in photo_items] == [("i1", "READY", "abc"), ("i2", "READY", "abc")]
@@ -0,0 +1,120 @@
+import pytest
+from conftest import make_request, response_json
+
+import main
+
+
+@pytest.fixture(autouse=True)
+def empty_buckets(monkeypatch):
+    monkeypatch.setattr(main, "_rate_limit_buckets", {})
+    monkeypatch.setattr(main, "_household_by_uid", {})
+    monkeypatch.setattr(main, "RATE_LIMIT_GLOBAL_COUNTERS", False)
+
+
+def test_take_token_drains_and_refills():
+    with main._rate_limit_lock:
+        assert [main._take_token("user/u1", 2, 1, now=0.0) for _ in range(2)] == [0, 0]
+        assert main._take_token("user/u1", 2, 1, now=0.0) == pytest.approx(1.0)
+        assert main._take_token("user/u1", 2, 1, now=0.5) == pytest.approx(0.5)
+        assert main._take_token("user/u1", 2, 1, now=1.0) == 0
+
+
+def test_take_token_refill_is_capped_at_capacity():
+    with main._rate_limit_lock:
+        main._take_token("user/u1", 2, 1, now=0.0)
+        assert [main._take_token("user/u1", 2, 1, now=100.0) for _ in range(3)][2] > 0
+
+
+def test_take_token_drops_full_buckets_when_at_the_limit(monkeypatch):
+    monkeypatch.setattr(main, "RATE_LIMIT_MAX_BUCKETS", 2)
+    with main._rate_limit_lock:
+        main._take_token("user/full", 5, 1, now=0.0)
+        main._rate_limit_buckets["user/full"][0] = 5
+        main._take_token("user/busy", 5, 1, now=0.0)
+        main._take_token("user/new", 5, 1, now=0.0)
+    assert set(main._rate_limit_buckets) == {"user/busy", "user/new"}
+
+
+def test_household_bucket_ignores_unlearned_households(monkeypatch):
+    monkeypatch.setattr(main, "RATE_LIMIT_USER_CAPACITY", 100)
+    monkeypatch.setattr(main, "RATE_LIMIT_HOUSEHOLD_CAPACITY", 1)
+    assert main._check_rate_limit({"uid": "u1", "householdId": "victim"}) is None
+    assert main._check_rate_limit({"uid": "u1", "householdId": "victim"}) is None
+    assert "household/victim" not in main._rate_limit_buckets
+
+    main._remember_household_for_rate_limit("u1", "h1")
+    assert main._check_rate_limit({"uid": "u1"}) is None
+    limited = main._check_rate_limit({"uid": "u1"})
+    assert limited.status_code == 429 and int(limited.headers["Retry-After"]) >= 1
+
+
+def verified_route(monkeypatch, valid_tokens: dict):
+    def verify_id_token(id_token):
+        if id_token not in valid_tokens:
+            raise main.auth.InvalidIdTokenError("bad token")
+        return valid_tokens[id_token]
+    monkeypatch.setattr(main.auth, "verify_id_token", verify_id_token)
+    return main.require_auth(lambda req: main.https_fn.Response(status=200, response="{}", mimetype="application/json"))
+
+
+def test_only_verified_requests_are_charged(monkeypatch):
+    monkeypatch.setattr(main, "RATE_LIMIT_USER_CAPACITY", 1)
+    route = verified_route(monkeypatch, {"good": {"uid": "u1"}})
+    forged = make_request("GET", "/api/profile", headers={"Authorization": "Bearer forged"})
+    for _ in range(3):
+        assert main.contextvars.Context().run(route, forged).status_code == 401
+    assert main._rate_limit_buckets == {}
+
+    good = make_request("GET", "/api/profile", headers={"Authorization": "Bearer good"})
+    assert main.contextvars.Context().run(route, good).status_code == 200
+    limited = main.contextvars.Context().run(route, good)
+    assert limited.status_code == 429 and response_json(limited)["error"]["code"] == "RATE_LIMITED"
+
+
+def test_verified_claim_fills_in_the_household(monkeypatch):
+    route = verified_route(monkeypatch, {"good": {"uid": "u1", "householdId": "h1"}})
+    main.contextvars.Context().run(route, make_request("GET", "/api/profile", headers={"Authorization": "Bearer good"}))
+    assert main._household_by_uid == {"u1": "h1"}
+    assert "household/h1" in main._rate_limit_buckets
+
+
+def test_require_auth_does_not_charge_batch_sub_requests_again(monkeypatch):
+    monkeypatch.setattr(main, "RATE_LIMIT_USER_CAPACITY", 1)
+    route = verified_route(monkeypatch, {"good": {"uid": "u1"}})
+    req = make_request("POST", "/api/batch", headers={"Authorization": "Bearer good"})
+
+    def batch():
+        assert route(req).status_code == 200
+        # Sub-requests carry the batch's token, already verified in this context; _run_subrequest charges them
+        return [route(make_request("GET", "/api/items", headers={"Authorization": "Bearer good"})).status_code for _ in range(3)]
+
+    assert main.contextvars.Context().run(batch) == [200, 200, 200]
+
+
+def test_global_counters_are_flushed_off_the_request_path(monkeypatch, fake_db):
+    monkeypatch.setattr(main, "RATE_LIMIT_GLOBAL_COUNTERS", True)
+    monkeypatch.setattr(main, "_rate_limit_pending_counts", {})
+    monkeypatch.setattr(main, "_rate_limit_flush_thread", None)
+    started = []
+
+    class RecordingThread:
+        def __init__(self, target, name, daemon):
+            self.target = target
+
+        def start(self):
+            started.append(self.target)
+
+    monkeypatch.setattr(main.threading, "Thread", RecordingThread)
+    main._remember_household_for_rate_limit("u1", "h1")
+
+    for _ in range(3):
+        assert main._check_rate_limit({"uid": "u1"}) is None
+
+    assert started == [main._rate_limit_flush_loop]
+    assert fake_db.batches == []
+    assert main._rate_limit_pending_counts == {"user/u1": 3, "household/h1": 3}
+
+    main._flush_rate_limit_counters()
+    [batch] = fake_db.batches
+    assert sorted(path.split("/")[1] for _, path, _, _ in batch.writes) == ["household_h1", "user_u1"]
+    assert main._rate_limit_pending_counts == {}
@@ -0,0 +1,117 @@
+import collections
+import datetime
+import time
+import types
+
+import pytest
+
+import main
+
+
+def change(kind, doc_id, data=None):
+    document = types.SimpleNamespace(id=doc_id, to_dict=lambda: data)
+    return types.SimpleNamespace(type=types.SimpleNamespace(name=kind), document=document)
+
+
+def read_time(seconds_ago=0.0):
+    return datetime.datetime.fromtimestamp(time.time() - seconds_ago, datetime.timezone.utc)
+
+
+@pytest.fixture
+def replicas(monkeypatch):
+    monkeypatch.setattr(main, "READ_REPLICA_ENABLED", True)
+    monkeypatch.setattr(main, "READ_REPLICA_HOT_REQUESTS", 3)
+    monkeypatch.setattr(main, "ITEMS_LAYOUT", "scoped")
+    monkeypatch.setattr(main, "_replicas", collections.OrderedDict())
+    monkeypatch.setattr(main, "_replica_refreshing", {})
+    monkeypatch.setattr(main, "_household_read_counts", {})
+    started = []
+
+    def start(replica):
+        replica.watches = [types.SimpleNamespace(is_active=True), types.SimpleNamespace(is_active=True)]
+        started.append(replica)
+
+    monkeypatch.setattr(main._HouseholdReplica, "start", start)
+    monkeypatch.setattr(main._HouseholdReplica, "stop", lambda replica: None)
+    return started
+
+
+def synced(replica, seconds_ago=0.0, items=()):
+    if not replica.watches:
+        replica.start()
+    replica._on_items_snapshot([], list(items), read_time(seconds_ago))
+    replica._on_rooms_snapshot([], [change("ADDED", "r1", {"name": "Garage", "nBins": 4})], read_time(seconds_ago))
+    return replica
+
+
+def test_replica_item_round_trips_the_api_shape():
+    expires = datetime.datetime(2026, 1, 2, tzinfo=datetime.timezone.utc)
+    data = {"name": "Tent", "location": {"roomId": "r1", "binNumber": 2}, "status": "STORED", "creatorUserId": "u1",
+            "householdId": "h1", "isPrivate": False, "lastUpdated": "2025-01-01T00:00:00+00:00", "expiresAt": expires,
+            "metadata": None, "photo": None}
+    assert main._ReplicaItem("i1", data).to_dict() == {**data, "id": "i1", "expiresAt": expires.isoformat()}
+    # Fields the document doesn't have stay absent, as they are when read from Firestore
+    assert main._ReplicaItem("i2", {"name": "Rope", "location": {"roomId": "r1"}}).to_dict() == {"id": "i2", "name": "Rope", "location": {"roomId": "r1"}}
+
+
+def test_snapshots_apply_changes_and_set_freshness(replicas):
+    replica = main._HouseholdReplica("h1")
+    assert replica.read_time() is None and not replica.is_fresh()
+
+    synced(replica, items=[change("ADDED", "i1", {"name": "Tent"}), change("ADDED", "i2", {"name": "Rope"})])
+    replica._on_items_snapshot([], [change("REMOVED", "i1"), change("MODIFIED", "i2", {"name": "Cord"})], read_time())
+
+    assert [item["name"] for item in replica.items_list()] == ["Cord"]
+    assert replica.rooms_list() == [{"id": "r1", "name": "Garage", "nBins": 4}]
+    assert replica.is_fresh()
+
+    replica.min_read_time = time.time() + 1
+    assert not replica.is_fresh()
+
+
+def test_hot_household_is_replicated_and_promoted(replicas):
+    assert [main.get_fresh_replica("h1") for _ in range(2)] == [None, None]
+    assert replicas == []
+    assert main.get_fresh_replica("h1") is None
+    [replica] = replicas
+
+    synced(replica)
+    assert main.get_fresh_replica("h1") is replica
+    main.note_household_write("h1")
+    assert main.get_fresh_replica("h1") is None
+
+
+def test_quiet_replica_stays_fresh(replicas):
+    quiet = synced(main._HouseholdReplica("h1"), seconds_ago=3600)
+    main._replicas["h1"] = quiet
+    assert main.get_fresh_replica("h1") is quiet
+    assert replicas == [quiet]
+
+
+def test_stopped_replica_is_rebuilt_in_the_background(replicas):
+    stopped = synced(main._HouseholdReplica("h1"))
+    stopped.watches[0].is_active = False
+    main._replicas["h1"] = stopped
+    assert main.get_fresh_replica("h1") is None
+    [_, rebuilt] = replicas
+    assert main._replicas["h1"] is stopped
+
+    synced(rebuilt)
+    assert main.get_fresh_replica("h1") is rebuilt
+
+
+def test_dual_layout_is_never_replicated(replicas, monkeypatch):
+    monkeypatch.setattr(main, "ITEMS_LAYOUT", "dual")
+    for _ in range(5):
+        assert main.get_fresh_replica("h1") is None
+    assert replicas == []
+
+
+def test_memory_cap_evicts_least_recently_used(replicas, monkeypatch):
+    monkeypatch.setattr(main, "READ_REPLICA_MAX_ITEMS", 3)
+    for household_id in ("h1", "h2"):
+        main._replicas[household_id] = synced(main._HouseholdReplica(household_id), items=[change("ADDED", f"{household_id}-{n}", {}) for n in range(2)])
+    main._household_read_counts.update({"h1": 5, "h2": 5})
+    main._enforce_replica_memory_cap()
+    assert list(main._replicas) == ["h2"]
+    assert main._household_read_counts == {"h2": 5}
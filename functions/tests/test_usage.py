@@ -0,0 +1,61 @@
+import time
+
+import pytest
+from google.auth.credentials import AnonymousCredentials
+from google.cloud import firestore as gcloud_firestore
+
+import main
+
+
+@pytest.mark.parametrize("method, path, label", [
+    ("GET", "/api/items", "GET /api/items"),
+    ("PUT", "/api/items/abc123/", "PUT /api/items/{itemId}"),
+    ("POST", "/api/items/bulk", "POST /api/items/bulk"),
+    ("GET", "/api/households/h1/rooms/r1/bins", "GET /api/households/{householdId}/rooms/{roomId}/bins"),
+    ("GET", "/api/households/h1/stats/most-used", "GET /api/households/{householdId}/stats/most-used"),
+])
+def test_endpoint_label_hides_ids(method, path, label):
+    assert main._usage_endpoint_label(method, path) == label
+
+
+@pytest.fixture
+def meter(monkeypatch):
+    monkeypatch.setattr(main, "USAGE_METERING_ENABLED", True)
+    main._install_firestore_metering()
+    meter = main._UsageMeter("test")
+    token = main._current_usage_meter.set(meter)
+    yield meter
+    main._current_usage_meter.reset(token)
+
+
+def test_batch_and_transaction_writes_are_counted(meter):
+    client = gcloud_firestore.Client(project="demo-test", credentials=AnonymousCredentials())
+    items = client.collection("items")
+    batch = client.batch()
+    batch.create(items.document("a"), {"name": "Tent"})
+    batch.set(items.document("b"), {"name": "Lamp", "lastUpdated": gcloud_firestore.SERVER_TIMESTAMP}, merge=True)
+    batch.update(items.document("c"), {"status": "OUT"})
+    batch.delete(items.document("d"))
+    transaction = client.transaction()
+    transaction.set(items.document("e"), {"name": "Rope"})
+    transaction.delete(items.document("f"))
+
+    assert (meter.reads, meter.writes, meter.deletes) == (0, 4, 2)
+
+
+def test_usage_is_flushed_in_the_background(monkeypatch):
+    flushed = []
+    monkeypatch.setattr(main, "_usage_pending", {})
+    monkeypatch.setattr(main, "_usage_flush_wakeup", main.threading.Event())
+    monkeypatch.setattr(main, "_usage_flush_thread", None)
+    monkeypatch.setattr(main, "USAGE_MAX_PENDING_KEYS", 3)
+    monkeypatch.setattr(main, "_flush_usage_counters", lambda: flushed.append(dict(main._usage_pending)))
+
+    main._record_usage(None, None, "GET /api/items", {"requests": 1, "reads": 2})
+    assert flushed == [] and main._usage_pending
+
+    main._record_usage("h1", "u1", "GET /api/items", {"requests": 1, "reads": 2})  # Crosses USAGE_MAX_PENDING_KEYS
+    deadline = time.monotonic() + 5
+    while not flushed:
+        assert time.monotonic() < deadline, "no background flush"
+        time.sleep(0.01)
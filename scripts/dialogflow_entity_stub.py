@@ -0,0 +1,94 @@
+"""Serves a local, in-memory stand-in for the Dialogflow ES entity type API.
+
+Implements just what the api function's entity sync uses:
+    GET  /v2/projects/{project}/agent/entityTypes
+    POST /v2/projects/{project}/agent/entityTypes
+    POST /v2/projects/{project}/agent/entityTypes/{id}/entities:batchCreate
+    POST /v2/projects/{project}/agent/entityTypes/{id}/entities:batchDelete
+Every call is logged, and GET /stub/entities returns {displayName: [values]} so a
+run can be checked.
+
+Point the functions at it (e.g. in functions/.env.local) with
+    DIALOGFLOW_ENTITY_SYNC_ENABLED=true
+    DIALOGFLOW_API_URL=http://127.0.0.1:8095/v2
+    DIALOGFLOW_SYNC_INTERVAL_SEC=5
+
+Usage:
+    python scripts/dialogflow_entity_stub.py [--port 8095]
+"""
+
+import argparse
+import json
+import re
+import sys
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ENTITY_TYPES_PATH = re.compile(r"^/v2/projects/([^/]+)/agent/entityTypes$")
+ENTITIES_PATH = re.compile(r"^/v2/(projects/[^/]+/agent/entityTypes/[^/:]+)/entities:(batchCreate|batchDelete)$")
+
+lock = threading.Lock()
+entity_types = {} # resource name -> {"name", "displayName", "kind", "entities": [{"value", "synonyms"}]}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def send_json(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length)) if length else {}
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        with lock:
+            if path == "/stub/entities":
+                return self.send_json(200, {entity_type["displayName"]: sorted(entity["value"] for entity in entity_type["entities"]) for entity_type in entity_types.values()})
+            if ENTITY_TYPES_PATH.match(path):
+                return self.send_json(200, {"entityTypes": list(entity_types.values())})
+        self.send_json(404, {"error": {"code": 404, "message": f"No stub for GET {path}"}})
+
+    def do_POST(self):
+        path = self.path.split("?", 1)[0]
+        body = self.read_json()
+        with lock:
+            match = ENTITY_TYPES_PATH.match(path)
+            if match:
+                name = f"projects/{match.group(1)}/agent/entityTypes/{uuid.uuid4()}"
+                entity_types[name] = {"name": name, "displayName": body.get("displayName"), "kind": body.get("kind", "KIND_MAP"), "entities": []}
+                return self.send_json(200, entity_types[name])
+
+            match = ENTITIES_PATH.match(path)
+            if match and match.group(1) in entity_types:
+                entities = entity_types[match.group(1)]["entities"]
+                if match.group(2) == "batchCreate":
+                    existing = {entity["value"] for entity in entities}
+                    entities.extend(entity for entity in body.get("entities", []) if entity["value"] not in existing)
+                else:
+                    removed = set(body.get("entityValues", []))
+                    entities[:] = [entity for entity in entities if entity["value"] not in removed]
+                return self.send_json(200, {"name": f"projects/stub/operations/{uuid.uuid4()}", "done": True})
+        self.send_json(404, {"error": {"code": 404, "message": f"No stub for POST {path}"}})
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8095)
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), StubHandler)
+    print(f"Dialogflow entity stub listening on http://127.0.0.1:{args.port}/v2")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,510 @@
+"""Load-tests the api function against the Firebase emulators.
+
+Builds realistic households (a user, rooms with bins, thousands of items) through
+the API itself, then replays a weighted mix of scenarios from concurrent workers
+and reports, per scenario: throughput, latency percentiles, error rate and the
+Firestore reads/writes/deletes each run caused (from the X-Firestore-Ops header).
+
+Scenarios:
+    dashboard        GET /api/items and GET /api/households/{id}/rooms, one after the other
+    dashboard_batch  the same two calls multiplexed through POST /api/batch
+    move             PUT /api/items/{id} to a random room and bin
+    bulk_import      POST /api/items/bulk with a small CSV
+    room_delete      create a room, import items into it, then delete it
+
+By default the api function runs in this process (so the numbers exclude HTTP and
+cold starts). Pass --base-url to load a running functions emulator instead; start it
+with USAGE_METERING_ENABLED=true and USAGE_OPS_HEADER=true (e.g. in
+functions/.env.local) to get operation counts.
+In-process runs raise the rate limits unless --keep-rate-limits is given.
+
+Requires FIRESTORE_EMULATOR_HOST and FIREBASE_AUTH_EMULATOR_HOST, e.g.
+    firebase emulators:start --only auth,firestore
+    FIRESTORE_EMULATOR_HOST=127.0.0.1:8081 FIREBASE_AUTH_EMULATOR_HOST=127.0.0.1:9099 \\
+        python scripts/loadtest.py --households 5 --items 2000 --concurrency 16 --duration 60
+
+Save a run with --save-baseline baseline.json, and compare later runs with
+--baseline baseline.json; the exit status is 1 if any scenario regressed by more
+than --tolerance.
+
+--check runs a consistency stress test instead of the mix: concurrent workers move
+items and read their profile and items, checking that every response belongs to
+the caller, then compare every item's location and every room's bin index with the
+moves that succeeded. The exit status is 1 if anything was lost or leaked. Run it
+in-process, or against an emulator started with API_CONCURRENCY > 1, so that
+requests really share an instance.
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+FUNCTIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "functions")
+SCENARIOS = ("dashboard", "dashboard_batch", "move", "bulk_import", "room_delete")
+DEFAULT_MIX = "dashboard=50,dashboard_batch=20,move=20,bulk_import=5,room_delete=5"
+IMPORT_CHUNK_SIZE = 400 # Rows per bulk import request; the api commits each import in chunks of 120 items (BULK_IMPORT_CHUNK_SIZE)
+BASELINE_METRICS = ("p50Ms", "p95Ms", "p99Ms") # Higher is worse
+BASELINE_OPS = ("reads", "writes", "deletes")
+
+
+class InProcessClient:
+    """Calls the api function directly, inside a Flask request context."""
+
+    def __init__(self):
+        import firebase_admin
+        import flask
+        from firebase_admin import credentials
+        from google.auth.credentials import AnonymousCredentials
+
+        class EmulatorCredential(credentials.Base):
+            def get_credential(self):
+                return AnonymousCredentials() # The emulators don't check credentials
+
+        if not firebase_admin._apps:
+            firebase_admin.initialize_app(EmulatorCredential(), {"projectId": os.environ["GCLOUD_PROJECT"]})
+        sys.path.insert(0, os.path.abspath(FUNCTIONS_DIR))
+        import main
+
+        self.flask = flask
+        self.app = flask.Flask("loadtest")
+        self.api = getattr(main.api, "__wrapped__", main.api)
+
+    def request(self, method: str, path: str, token: str | None = None, json_body=None, data: bytes | None = None, content_type: str | None = None):
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        if content_type:
+            headers["Content-Type"] = content_type
+        with self.app.test_request_context(path, method=method, json=json_body, data=data, headers=headers):
+            response = self.api(self.flask.request._get_current_object())
+            return response.status_code, response.get_data(), response.headers.get("X-Firestore-Ops")
+
+
+class HttpClient:
+    """Calls a running api function (e.g. the functions emulator) over HTTP."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+        self.local = threading.local()
+
+    def request(self, method: str, path: str, token: str | None = None, json_body=None, data: bytes | None = None, content_type: str | None = None):
+        if not hasattr(self.local, "session"):
+            self.local.session = requests.Session()
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        if content_type:
+            headers["Content-Type"] = content_type
+        response = self.local.session.request(method, self.base_url + path, json=json_body, data=data, headers=headers, timeout=120)
+        return response.status_code, response.content, response.headers.get("X-Firestore-Ops")
+
+
+def sign_in(email: str, password: str) -> str:
+    """Returns a fresh ID token from the Auth emulator, including current custom claims."""
+    url = f"http://{os.environ['FIREBASE_AUTH_EMULATOR_HOST']}/identitytoolkit.googleapis.com/v1/accounts:signInWithPassword?key=loadtest"
+    response = requests.post(url, json={"email": email, "password": password, "returnSecureToken": True}, timeout=30)
+    response.raise_for_status()
+    return response.json()["idToken"]
+
+
+def parse_ops(header: str | None) -> dict:
+    ops = dict.fromkeys(BASELINE_OPS, 0)
+    for part in (header or "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name in ops and value.isdigit():
+            ops[name] = int(value)
+    return ops
+
+
+def call(client, method: str, path: str, token: str, ops: dict, **kwargs):
+    """Makes one API call, adds its Firestore ops to ops, and returns (status, parsed JSON body)."""
+    status, body, ops_header = client.request(method, path, token, **kwargs)
+    for name, count in parse_ops(ops_header).items():
+        ops[name] += count
+    try:
+        return status, json.loads(body)
+    except ValueError:
+        return status, None
+
+
+def items_csv(rows: list) -> bytes:
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=["name", "roomName", "binNumber", "status", "category"])
+    writer.writeheader()
+    writer.writerows(rows)
+    return output.getvalue().encode("utf-8")
+
+
+def multipart_file(content: bytes) -> tuple[bytes, str]:
+    boundary = uuid.uuid4().hex
+    body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"items.csv\"\r\n"
+            f"Content-Type: text/csv\r\n\r\n").encode("utf-8") + content + f"\r\n--{boundary}--\r\n".encode("utf-8")
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def import_items(client, token: str, rows: list, ops: dict) -> bool:
+    for i in range(0, len(rows), IMPORT_CHUNK_SIZE):
+        body, content_type = multipart_file(items_csv(rows[i:i + IMPORT_CHUNK_SIZE]))
+        status, _ = call(client, "POST", "/api/items/bulk", token, ops, data=body, content_type=content_type)
+        if status != 200:
+            return False
+    return True
+
+
+def random_item_rows(rooms: list, count: int, prefix: str) -> list:
+    return [{
+        "name": f"{prefix} {i}",
+        "roomName": room["name"],
+        "binNumber": random.randint(1, room["nBins"]),
+        "status": random.choice(["STORED", "STORED", "STORED", "OUT"]),
+        "category": random.choice(["Tools", "Kitchen", "Camping", "Holiday", "Documents"]),
+    } for i, room in ((i, random.choice(rooms)) for i in range(count))]
+
+
+def build_household(client, run_id: str, index: int, args) -> dict:
+    """Registers a user and fills a new household with rooms and items through the API."""
+    email = f"loadtest-{run_id}-{index}@example.com"
+    password = f"loadtest-{run_id}"
+    ops = dict.fromkeys(BASELINE_OPS, 0)
+    status, body = call(client, "POST", "/api/register", None, ops, json_body={"email": email, "password": password})
+    if status != 201:
+        raise RuntimeError(f"Registering {email} failed ({status}): {body}")
+
+    rooms = [{"name": f"Room {r}", "nBins": args.bins} for r in range(args.rooms)]
+    status, body = call(client, "POST", "/api/households:bootstrap", sign_in(email, password), ops, json_body={"name": f"Load test {index}", "rooms": rooms})
+    if status != 201:
+        raise RuntimeError(f"Bootstrapping household for {email} failed ({status}): {body}")
+    household_id = body["data"]["id"]
+    token = sign_in(email, password) # Picks up the household claim set by the bootstrap
+
+    if not import_items(client, token, random_item_rows(rooms, args.items, "Item"), ops):
+        raise RuntimeError(f"Importing items for household {household_id} failed")
+    _, rooms_body = call(client, "GET", f"/api/households/{household_id}/rooms", token, ops)
+    _, items_body = call(client, "GET", "/api/items", token, ops)
+    return {
+        "id": household_id,
+        "email": email,
+        "password": password,
+        "token": token,
+        "rooms": rooms_body["data"],
+        "itemIds": [item["id"] for item in items_body["data"]],
+        "lock": threading.Lock(),
+    }
+
+
+def run_scenario(client, name: str, household: dict, ops: dict) -> bool:
+    """Runs one scenario for household. Returns True if every call in it succeeded."""
+    token = household["token"]
+    if name == "dashboard":
+        items_status, _ = call(client, "GET", "/api/items", token, ops)
+        rooms_status, _ = call(client, "GET", f"/api/households/{household['id']}/rooms", token, ops)
+        return items_status == 200 and rooms_status == 200
+
+    if name == "dashboard_batch":
+        status, body = call(client, "POST", "/api/batch", token, ops, json_body={"requests": [
+            {"id": "items", "method": "GET", "path": "/api/items"},
+            {"id": "rooms", "method": "GET", "path": f"/api/households/{household['id']}/rooms"},
+        ]})
+        return status == 200 and all(response["status"] == 200 for response in body["data"]["responses"])
+
+    if name == "move":
+        with household["lock"]:
+            if not household["itemIds"]:
+                return True
+            item_id = random.choice(household["itemIds"])
+            room = random.choice(household["rooms"])
+        status, _ = call(client, "PUT", f"/api/items/{item_id}", token, ops, json_body={"location": {"roomId": room["id"], "binNumber": random.randint(1, room["nBins"])}})
+        return status == 200
+
+    if name == "bulk_import":
+        return import_items(client, token, random_item_rows(household["rooms"], 50, "Imported"), ops)
+
+    if name == "room_delete":
+        room_name = f"Temp {uuid.uuid4().hex[:8]}"
+        status, body = call(client, "POST", f"/api/households/{household['id']}/rooms", token, ops, json_body={"name": room_name, "nBins": 10})
+        if status != 201:
+            return False
+        room = body["data"]
+        if not import_items(client, token, random_item_rows([{"name": room_name, "nBins": 10}], 20, "Temp"), ops):
+            return False
+        status, _ = call(client, "DELETE", f"/api/households/{household['id']}/rooms/{room['id']}", token, ops)
+        return status == 200
+
+    raise ValueError(f"Unknown scenario '{name}'")
+
+
+def run_consistency_check(client, households: list, args) -> list:
+    """Hammers the API from concurrent workers, then checks that nothing was lost or leaked.
+
+    Each worker owns a disjoint set of items, so the last move it saw succeed is the
+    item's expected location. Between moves it reads its profile and the household's
+    items; a request that saw another request's user or household shows up there.
+
+    Returns:
+        A description of each problem found; empty if the run was consistent.
+    """
+    problems = []
+    problems_lock = threading.Lock()
+    owned = [[] for _ in range(args.concurrency)]
+    for household_index, household in enumerate(households):
+        for item_index, item_id in enumerate(household["itemIds"]):
+            owned[(household_index + item_index) % args.concurrency].append((household, item_id))
+    deadline = time.monotonic() + args.duration
+
+    def report(problem: str) -> None:
+        with problems_lock:
+            problems.append(problem)
+
+    def worker(items: list) -> dict:
+        expected = {} # item ID -> location of its last successful move
+        ops = dict.fromkeys(BASELINE_OPS, 0)
+        while items and time.monotonic() < deadline:
+            household, item_id = random.choice(items)
+            token = household["token"]
+            action = random.random()
+            if action < 0.6:
+                room = random.choice(household["rooms"])
+                location = {"roomId": room["id"], "binNumber": random.randint(1, room["nBins"])}
+                status, body = call(client, "PUT", f"/api/items/{item_id}", token, ops, json_body={"location": location})
+                if status != 200:
+                    report(f"Moving item {item_id} failed ({status}): {body}")
+                elif body["data"]["location"] != location:
+                    report(f"Moving item {item_id} to {location} returned {body['data']['location']}")
+                else:
+                    expected[item_id] = location
+            elif action < 0.8:
+                status, body = call(client, "GET", "/api/profile", token, ops)
+                email = body["data"].get("email") if status == 200 else None
+                if email != household["email"]:
+                    report(f"GET /api/profile as {household['email']} returned {status} for {email}")
+            else:
+                status, body = call(client, "GET", "/api/items", token, ops)
+                if status != 200:
+                    report(f"GET /api/items for household {household['id']} failed ({status})")
+                    continue
+                foreign = [item["id"] for item in body["data"] if item.get("householdId") != household["id"]]
+                if foreign:
+                    report(f"GET /api/items for household {household['id']} returned {len(foreign)} items of other households")
+                if len(body["data"]) != len(household["itemIds"]):
+                    report(f"GET /api/items for household {household['id']} returned {len(body['data'])} items, expected {len(household['itemIds'])}")
+        return expected
+
+    print(f"Checking consistency with {args.concurrency} workers for {args.duration:g}s...")
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        expected = {}
+        for moves in executor.map(worker, owned):
+            expected.update(moves)
+
+    ops = dict.fromkeys(BASELINE_OPS, 0)
+    for household in households:
+        status, body = call(client, "GET", "/api/items", household["token"], ops)
+        if status != 200:
+            problems.append(f"GET /api/items for household {household['id']} failed ({status})")
+            continue
+        locations = {item["id"]: item["location"] for item in body["data"]}
+        lost = [item_id for item_id in household["itemIds"] if item_id in expected and locations.get(item_id) != expected[item_id]]
+        if lost:
+            problems.append(f"Household {household['id']}: {len(lost)} items are not where their last move put them, e.g. {lost[0]}")
+
+        for room in household["rooms"]:
+            status, bins_body = call(client, "GET", f"/api/households/{household['id']}/rooms/{room['id']}/bins", household["token"], ops)
+            if status != 200:
+                problems.append(f"Reading the bins of room {room['id']} failed ({status})")
+                continue
+            indexed = {entry["binNumber"]: sorted(entry["itemIds"]) for entry in bins_body["data"]["bins"] if entry["itemIds"]}
+            actual = {}
+            for item_id, location in locations.items():
+                if location.get("roomId") == room["id"]:
+                    actual.setdefault(location["binNumber"], []).append(item_id)
+            if indexed != {bin_number: sorted(item_ids) for bin_number, item_ids in actual.items()}:
+                problems.append(f"Household {household['id']}: the bin index of room {room['id']} doesn't match its items")
+
+    print(f"{len(expected)} items moved; {len(problems)} problems found.")
+    return problems
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+
+def summarize(samples: dict, elapsed: float) -> dict:
+    """Turns raw samples ({scenario: [(latency_sec, ok, ops)]}) into per-scenario metrics."""
+    results = {}
+    for name, runs in samples.items():
+        if not runs:
+            continue
+        latencies = sorted(latency * 1000 for latency, _, _ in runs)
+        errors = sum(1 for _, ok, _ in runs if not ok)
+        results[name] = {
+            "runs": len(runs),
+            "throughputPerSec": round(len(runs) / elapsed, 2),
+            "errorRate": round(errors / len(runs), 4),
+            "p50Ms": round(percentile(latencies, 0.50), 1),
+            "p95Ms": round(percentile(latencies, 0.95), 1),
+            "p99Ms": round(percentile(latencies, 0.99), 1),
+            "maxMs": round(latencies[-1], 1),
+            "opsPerRun": {op: round(sum(ops[op] for _, _, ops in runs) / len(runs), 1) for op in BASELINE_OPS},
+        }
+    return results
+
+
+def print_results(results: dict) -> None:
+    print(f"{'scenario':<16} {'runs':>6} {'/sec':>7} {'err%':>6} {'p50ms':>8} {'p95ms':>8} {'p99ms':>8} {'maxms':>8} {'reads':>7} {'writes':>7} {'deletes':>7}")
+    for name, result in results.items():
+        ops = result["opsPerRun"]
+        print(f"{name:<16} {result['runs']:>6} {result['throughputPerSec']:>7} {result['errorRate'] * 100:>6.1f} {result['p50Ms']:>8} {result['p95Ms']:>8} "
+              f"{result['p99Ms']:>8} {result['maxMs']:>8} {ops['reads']:>7} {ops['writes']:>7} {ops['deletes']:>7}")
+
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float) -> list:
+    """Returns a description of every metric that regressed by more than tolerance."""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get("scenarios", {}).get(name)
+        if before is None:
+            continue
+        for metric in BASELINE_METRICS:
+            if before[metric] and result[metric] > before[metric] * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {before[metric]} -> {result[metric]}")
+        for op in BASELINE_OPS:
+            # Op counts are nearly deterministic, so allow a small absolute slack as well
+            if result["opsPerRun"][op] > before["opsPerRun"][op] * (1 + tolerance) + 1:
+                regressions.append(f"{name}: {op}/run {before['opsPerRun'][op]} -> {result['opsPerRun'][op]}")
+        if result["throughputPerSec"] < before["throughputPerSec"] * (1 - tolerance):
+            regressions.append(f"{name}: throughputPerSec {before['throughputPerSec']} -> {result['throughputPerSec']}")
+        if result["errorRate"] > before["errorRate"] + 0.01:
+            regressions.append(f"{name}: errorRate {before['errorRate']} -> {result['errorRate']}")
+    return regressions
+
+
+def parse_mix(mix: str) -> dict:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario '{name}' (choose from {', '.join(SCENARIOS)})")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="Base URL that serves /api/* from a running api function, e.g. the hosting emulator at http://127.0.0.1:8080. Default: call it in-process.")
+    parser.add_argument("--project", default=os.environ.get("GCLOUD_PROJECT", "demo-loadtest"), help="Emulator project ID.")
+    parser.add_argument("--households", type=positive_int, default=3, help="Households to build before the run.")
+    parser.add_argument("--rooms", type=int, default=8, help="Rooms per household.")
+    parser.add_argument("--bins", type=int, default=20, help="Bins per room.")
+    parser.add_argument("--items", type=int, default=2000, help="Items per household.")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Scenario weights (default: {DEFAULT_MIX}).")
+    parser.add_argument("--concurrency", type=positive_int, default=8, help="Concurrent workers.")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run the mix for.")
+    parser.add_argument("--seed", type=int, help="Random seed, for repeatable scenario sequences.")
+    parser.add_argument("--keep-rate-limits", action="store_true", help="Don't raise the per-user and per-household rate limits (in-process only).")
+    parser.add_argument("--check", action="store_true", help="Run the consistency stress test instead of the scenario mix.")
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    parser.add_argument("--save-baseline", help="Save the results as the baseline in this file.")
+    parser.add_argument("--baseline", help="Compare the results with the baseline in this file.")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative regression against the baseline (default 0.15).")
+    args = parser.parse_args()
+
+    for variable in ("FIRESTORE_EMULATOR_HOST", "FIREBASE_AUTH_EMULATOR_HOST"):
+        if not os.environ.get(variable):
+            print(f"{variable} is not set; the load test only runs against the emulators.")
+            return 2
+    os.environ.setdefault("GCLOUD_PROJECT", args.project)
+    weights = parse_mix(args.mix)
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    if args.base_url:
+        client = HttpClient(args.base_url)
+    else:
+        os.environ["USAGE_METERING_ENABLED"] = "true"
+        os.environ["USAGE_OPS_HEADER"] = "true"
+        if not args.keep_rate_limits:
+            for variable in ("RATE_LIMIT_USER_CAPACITY", "RATE_LIMIT_USER_REFILL_PER_SEC", "RATE_LIMIT_HOUSEHOLD_CAPACITY", "RATE_LIMIT_HOUSEHOLD_REFILL_PER_SEC"):
+                os.environ.setdefault(variable, "1000000")
+        client = InProcessClient()
+
+    run_id = uuid.uuid4().hex[:8]
+    print(f"Building {args.households} households with {args.rooms} rooms and {args.items} items each (run {run_id})...")
+    with ThreadPoolExecutor(max_workers=min(args.households, args.concurrency)) as executor:
+        households = list(executor.map(lambda index: build_household(client, run_id, index, args), range(args.households)))
+
+    if args.check:
+        problems = run_consistency_check(client, households, args)
+        for problem in problems[:50]:
+            print(f"  {problem}")
+        return 1 if problems else 0
+
+    samples = {name: [] for name in weights}
+    samples_lock = threading.Lock()
+    names, name_weights = list(weights), list(weights.values())
+    deadline = time.monotonic() + args.duration
+
+    def worker():
+        while time.monotonic() < deadline:
+            name = random.choices(names, name_weights)[0]
+            ops = dict.fromkeys(BASELINE_OPS, 0)
+            started = time.perf_counter()
+            try:
+                ok = run_scenario(client, name, random.choice(households), ops)
+            except Exception as e:
+                print(f"{name} raised: {e}")
+                ok = False
+            latency = time.perf_counter() - started
+            with samples_lock:
+                samples[name].append((latency, ok, ops))
+
+    print(f"Running {args.mix} with {args.concurrency} workers for {args.duration:g}s...")
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        for future in [executor.submit(worker) for _ in range(args.concurrency)]:
+            future.result()
+    results = summarize(samples, time.monotonic() - started)
+    print_results(results)
+
+    report = {
+        "config": {key: getattr(args, key) for key in ("households", "rooms", "bins", "items", "mix", "concurrency", "duration")},
+        "target": args.base_url or "in-process",
+        "scenarios": results,
+    }
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as output:
+                json.dump(report, output, indent=2)
+            print(f"Wrote {path}")
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get("config") != report["config"]:
+            print("Warning: the baseline was recorded with a different configuration.")
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print("Regressions against the baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("No regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
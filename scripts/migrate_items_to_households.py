@@ -0,0 +1,195 @@
+"""Moves items from the top-level `items` collection to households/{householdId}/items.
+
+Run with ITEMS_LAYOUT=dual deployed so the API reads from both layouts while this
+script copies. Once every household verifies, switch the API to ITEMS_LAYOUT=scoped
+and (optionally) rerun with --delete-legacy to remove the old documents.
+
+The copy is checkpointed in Firestore (migrations/itemsToHouseholds), so an
+interrupted run picks up after the last fully copied page. Items that already exist
+in the household subcollection are never overwritten: they were either copied by an
+earlier run or have since been updated through the API. Each page is copied in
+parallel chunks of --chunk-size items, each chunk in one transaction that re-reads
+its legacy documents, so an item the API updates or deletes while a page is being
+copied is neither overwritten nor brought back.
+
+Usage:
+    python scripts/migrate_items_to_households.py [--project my-project]
+    python scripts/migrate_items_to_households.py --verify-only
+    python scripts/migrate_items_to_households.py --delete-legacy
+
+Set FIRESTORE_EMULATOR_HOST to run against the emulator.
+"""
+
+import argparse
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import firebase_admin
+from firebase_admin import firestore
+
+CHECKPOINT_COLLECTION = "migrations"
+CHECKPOINT_DOC = "itemsToHouseholds"
+FIRESTORE_BATCH_LIMIT = 500
+
+
+def commit_in_parallel(db, writes: list, chunk_size: int, workers: int) -> None:
+    """Commits (apply) callables in parallel batches of chunk_size.
+
+    Raises the first commit error after all chunks have finished, so the caller
+    doesn't advance its checkpoint past a partially written page.
+    """
+    chunks = [writes[i:i + chunk_size] for i in range(0, len(writes), chunk_size)]
+
+    def commit_chunk(chunk):
+        batch = db.batch()
+        for apply in chunk:
+            apply(batch)
+        batch.commit()
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(chunks)))) as executor:
+        futures = [executor.submit(commit_chunk, chunk) for chunk in chunks]
+        errors = [future.exception() for future in futures if future.exception() is not None]
+    if errors:
+        raise errors[0]
+
+
+def copy_in_parallel(db, targets: list, chunk_size: int, workers: int) -> int:
+    """Copies (legacy_ref, target_ref) pairs in parallel chunks of chunk_size, one transaction per chunk.
+
+    Returns:
+        How many items were copied. The others already had a scoped copy or were
+        deleted since the page was read.
+    """
+    @firestore.transactional
+    def copy_chunk(transaction, chunk):
+        refs = [ref for pair in chunk for ref in pair]
+        docs = {doc.reference.path: doc for doc in transaction.get_all(refs)}
+        copied = 0
+        for legacy_ref, target_ref in chunk:
+            legacy_doc = docs.get(legacy_ref.path)
+            target_doc = docs.get(target_ref.path)
+            if legacy_doc is None or not legacy_doc.exists or (target_doc is not None and target_doc.exists):
+                continue
+            transaction.create(target_ref, legacy_doc.to_dict())
+            copied += 1
+        return copied
+
+    chunks = [targets[i:i + chunk_size] for i in range(0, len(targets), chunk_size)]
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(chunks)))) as executor:
+        return sum(executor.map(lambda chunk: copy_chunk(db.transaction(), chunk), chunks))
+
+
+def load_checkpoint(db) -> dict:
+    checkpoint_doc = db.collection(CHECKPOINT_COLLECTION).document(CHECKPOINT_DOC).get()
+    if checkpoint_doc.exists:
+        return checkpoint_doc.to_dict()
+    return {"lastDocId": None, "copied": 0, "skipped": 0, "orphaned": 0}
+
+
+def save_checkpoint(db, checkpoint: dict) -> None:
+    db.collection(CHECKPOINT_COLLECTION).document(CHECKPOINT_DOC).set({**checkpoint, "updatedAt": firestore.SERVER_TIMESTAMP})
+
+
+def copy_items(db, args) -> dict:
+    """Copies legacy items into their household's subcollection, one page at a time."""
+    checkpoint = {"lastDocId": None, "copied": 0, "skipped": 0, "orphaned": 0} if args.reset else load_checkpoint(db)
+    if checkpoint.get("lastDocId"):
+        print(f"Resuming after item {checkpoint['lastDocId']} ({checkpoint['copied']} copied so far)")
+
+    legacy_items = db.collection("items")
+    while True:
+        query = legacy_items.order_by("__name__").limit(args.page_size)
+        if checkpoint.get("lastDocId"):
+            # A document-ID cursor still works if that item has since been moved by the API
+            query = query.start_after({"__name__": checkpoint["lastDocId"]})
+        page = list(query.stream())
+        if not page:
+            break
+
+        targets = []
+        for item_doc in page:
+            household_id = (item_doc.to_dict() or {}).get("householdId")
+            if not household_id:
+                checkpoint["orphaned"] += 1
+                continue
+            targets.append((item_doc, db.collection("households").document(household_id).collection("items").document(item_doc.id)))
+
+        existing_ids = {doc.id for doc in db.get_all([target for _, target in targets]) if doc.exists} if targets else set()
+        to_copy = [(item_doc.reference, target) for item_doc, target in targets if item_doc.id not in existing_ids]
+        copied = len(to_copy) if args.dry_run else copy_in_parallel(db, to_copy, args.chunk_size, args.workers)
+        checkpoint["skipped"] += len(targets) - copied
+        checkpoint["copied"] += copied
+        checkpoint["lastDocId"] = page[-1].id
+        if not args.dry_run:
+            save_checkpoint(db, checkpoint)
+        print(f"Copied {checkpoint['copied']}, skipped {checkpoint['skipped']}, orphaned {checkpoint['orphaned']} (at {checkpoint['lastDocId']})")
+
+    return checkpoint
+
+
+def verify_household(db, household_id: str) -> dict:
+    """Compares a household's legacy and scoped items.
+
+    Returns:
+        A dict with legacyCount, scopedCount and missingIds (legacy items with no scoped copy).
+    """
+    legacy_query = db.collection("items").where(filter=firestore.FieldFilter("householdId", "==", household_id))
+    scoped_items = db.collection("households").document(household_id).collection("items")
+    legacy_ids = [doc.id for doc in legacy_query.select([]).stream()]
+    scoped_count = scoped_items.count().get()[0][0].value
+
+    missing_ids = []
+    for i in range(0, len(legacy_ids), FIRESTORE_BATCH_LIMIT):
+        chunk = legacy_ids[i:i + FIRESTORE_BATCH_LIMIT]
+        missing_ids.extend(doc.id for doc in db.get_all([scoped_items.document(item_id) for item_id in chunk]) if not doc.exists)
+    return {"legacyCount": len(legacy_ids), "scopedCount": scoped_count, "missingIds": missing_ids}
+
+
+def delete_legacy_items(db, household_id: str, args) -> int:
+    legacy_query = db.collection("items").where(filter=firestore.FieldFilter("householdId", "==", household_id))
+    refs = [doc.reference for doc in legacy_query.select([]).stream()]
+    if not args.dry_run:
+        commit_in_parallel(db, [lambda batch, ref=ref: batch.delete(ref) for ref in refs], args.chunk_size, args.workers)
+    return len(refs)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--project", help="Google Cloud project ID (defaults to the environment's).")
+    parser.add_argument("--page-size", type=int, default=1000, help="Legacy items read per page (checkpoint granularity).")
+    parser.add_argument("--chunk-size", type=int, default=250, help="Items per copy transaction, and deletes per batch commit (max 500).")
+    parser.add_argument("--workers", type=int, default=4, help="Copy transactions and delete batches committed in parallel.")
+    parser.add_argument("--reset", action="store_true", help="Ignore the saved checkpoint and start from the beginning.")
+    parser.add_argument("--verify-only", action="store_true", help="Skip the copy and only verify households.")
+    parser.add_argument("--delete-legacy", action="store_true", help="After verification, delete legacy items of households that verified.")
+    parser.add_argument("--dry-run", action="store_true", help="Read and report, but don't write anything.")
+    args = parser.parse_args()
+    args.chunk_size = max(1, min(args.chunk_size, FIRESTORE_BATCH_LIMIT))
+
+    firebase_admin.initialize_app(options={"projectId": args.project} if args.project else None)
+    db = firestore.client()
+
+    if not args.verify_only:
+        copy_items(db, args)
+
+    failed_households = []
+    for household in db.collection("households").select([]).stream():
+        result = verify_household(db, household.id)
+        ok = not result["missingIds"]
+        print(f"Household {household.id}: legacy={result['legacyCount']} scoped={result['scopedCount']} missing={len(result['missingIds'])} {'OK' if ok else 'MISMATCH'}")
+        if not ok:
+            failed_households.append(household.id)
+            continue
+        if args.delete_legacy and result["legacyCount"]:
+            deleted = delete_legacy_items(db, household.id, args)
+            print(f"Household {household.id}: deleted {deleted} legacy items")
+
+    if failed_households:
+        print(f"{len(failed_households)} household(s) failed verification; rerun the copy before switching to ITEMS_LAYOUT=scoped.")
+        return 1
+    print("All households verified.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())